@@ -1,9 +1,11 @@
-from flask import Flask, send_from_directory, render_template_string
+from flask import Flask, send_from_directory, render_template_string, abort
 from dotenv import load_dotenv
 from flask_cors import CORS
+import hashlib
 import os
-from services import close_db, load_model
+from services import close_db, load_model, init_metrics, init_profiling, encoding_refresher
 from routes import register_blueprints  # Import the function that registers Blueprints
+from static_pipeline import StaticPipeline, compress_variants, send_variant
 
 # Load environment variables
 load_dotenv()
@@ -14,25 +16,71 @@ stand_model = None
 
 app = Flask(__name__, static_folder='../frontend/static')
 CORS(app)
+init_metrics(app) # Time every request
+init_profiling(app) # Opt-in per-request profiles (PROFILING_ENABLED)
 register_blueprints(app) # Register Blueprints
 
 # Load the model only once when the server starts
 with app.app_context():
     load_model()
 
-# Serve the frontend (HTML, JS, CSS) from Flask
-@app.route("/")
-def index():
+# Keep the station encodings current from bike.availability (ENCODING_REFRESH_SECONDS).
+# Started by the first request, so that it runs in the processes serving requests and not
+# in a gunicorn master preloading the app (or the reloader process of `python app.py`)
+@app.before_request
+def start_encoding_refresh():
+    encoding_refresher.start()
+
+# Fingerprint and precompress the frontend assets once at startup
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend")
+INDEX_PATH = os.path.join(FRONTEND_DIR, "index.html")
+static_pipeline = StaticPipeline(os.path.join(FRONTEND_DIR, "static")).build()
+
+# Rendered index page, rebuilt only when index.html changes on disk
+index_cache = {"mtime": None, "variants": None, "etag": None}
+
+def render_index():
+    """
+    Renders index.html into `index_cache` if the file changed since the last render.
+    """
+    mtime = os.path.getmtime(INDEX_PATH)
+    if index_cache["mtime"] == mtime:
+        return
+
     # Read the HTML file as a template
-    # index_path = os.path.join("../frontend", 'index.html')
-    with open("../frontend/index.html", encoding='utf-8') as f:
+    with open(INDEX_PATH, encoding='utf-8') as f:
         index_html = f.read()
 
+    # Pick up edited assets together with the edited page
+    if index_cache["mtime"] is not None:
+        static_pipeline.build()
+
     # Replace placeholder with actual base URL from environment variable
-    base_url = os.getenv("BASE_URL")
-    rendered_html = index_html.replace("{{ BASE_URL }}", base_url)
+    base_url = os.getenv("BASE_URL", "")
+    rendered_html = render_template_string(index_html.replace("{{ BASE_URL }}", base_url))
+    body = static_pipeline.rewrite_html(rendered_html).encode("utf-8")
+
+    index_cache.update(
+        mtime=mtime,
+        variants=compress_variants(body),
+        etag=hashlib.sha256(body).hexdigest()[:32],
+    )
+
+# Serve the frontend (HTML, JS, CSS) from Flask
+@app.route("/")
+def index():
+    render_index()
+
+    # The page itself must be revalidated so new asset fingerprints are picked up
+    return send_variant(index_cache["variants"], "text/html", index_cache["etag"], "no-cache")
 
-    return render_template_string(rendered_html)
+# Serve fingerprinted static assets from memory
+@app.route("/assets/<path:hashed_name>")
+def hashed_asset(hashed_name):
+    response = static_pipeline.serve(hashed_name)
+    if response is None:
+        abort(404)
+    return response
 
 # Ensure database connections are properly closed
 @app.teardown_appcontext
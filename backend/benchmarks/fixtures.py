@@ -0,0 +1,74 @@
+"""
+Synthetic inputs shared by the benchmark scripts.
+"""
+import os
+import pickle
+import random
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from services.model_registry import BUNDLE_FILES
+from services.prediction import FEATURE_COLUMNS
+
+
+def make_stations(count, seed=42):
+    """
+    Generates `count` station dictionaries shaped like `get_all_stations()['data']`.
+    """
+    rnd = random.Random(seed)
+    stations = []
+    for i in range(1, count + 1):
+        capacity = rnd.randint(15, 40)
+        bikes = rnd.randint(0, capacity)
+        stations.append({
+            "id": i,
+            "name": f"STATION {i} STREET",
+            "address": f"Station {i} Street",
+            "lat": round(53.30 + rnd.random() * 0.1, 6),
+            "lon": round(-6.35 + rnd.random() * 0.15, 6),
+            "details": {
+                "status": "OPEN",
+                "last_update": f"2025-04-03 18:{rnd.randint(10, 59)}:{rnd.randint(10, 59)}",
+                "available_bikes": bikes,
+                "available_bike_stands": capacity - bikes,
+                "capacity": capacity,
+            },
+        })
+    return stations
+
+
+def make_training_frame(target, encoding, rows=20000, seed=0):
+    """
+    Generates model features for `target` ("bike" or "stand") and a target with a daily cycle.
+
+    Parameters:
+        encoding (Series): Station encoding used for the station feature.
+
+    Returns:
+        tuple: (X DataFrame with FEATURE_COLUMNS[target], y Series)
+    """
+    rng = np.random.default_rng(seed)
+    stations = rng.choice(encoding.index, rows)
+    X = pd.DataFrame({
+        FEATURE_COLUMNS[target][0]: encoding[stations].values,
+        "max_air_temperature_celsius": rng.uniform(-2, 25, rows),
+        "hour": rng.integers(0, 24, rows),
+        "day_of_week": rng.integers(0, 7, rows),
+    })
+    y = X.iloc[:, 0] + np.sin(X["hour"] / 24 * 2 * np.pi) * 5 + rng.normal(0, 2, rows)
+    return X, y
+
+
+def make_forest_bundle(trees, path):
+    """Trains a RandomForestRegressor pair on synthetic data and saves it as a bundle."""
+    encoding = pd.Series(np.random.default_rng(0).uniform(2, 20, 120), index=np.arange(120))
+    for target, filename, encoding_file in (
+        ("bike", BUNDLE_FILES["bike_model"], BUNDLE_FILES["bike_encoding"]),
+        ("stand", BUNDLE_FILES["stand_model"], BUNDLE_FILES["stand_encoding"]),
+    ):
+        X, y = make_training_frame(target, encoding)
+        model = RandomForestRegressor(n_estimators=trees, min_samples_leaf=5, random_state=0, n_jobs=-1).fit(X, y)
+        with open(os.path.join(path, filename), "wb") as f:
+            pickle.dump(model, f)
+        with open(os.path.join(path, encoding_file), "wb") as f:
+            pickle.dump(encoding, f)
@@ -0,0 +1,167 @@
+"""
+Benchmark: history and historical-weather endpoints as the database grows.
+
+The database is filled with synthetic data from
+`local_db_setup/synthetic_data.py` (5-minute availability and hourly weather
+with daily and weekly seasonality) in growing steps, e.g. 1M, 10M, 100M and
+1B availability rows. History is added further back in time at each step, so
+the demo day (2025-02-23) is always present. The station count is raised as far
+as needed for the largest step to span at most --max-days days (1B rows are
+about 3,200 stations over three years rather than 115 stations since 1942). After each step, the endpoints are
+timed in-process through Flask's test client:
+
+    /api/stations/history/<id>        one station, a 12-hour range
+    /api/stations/history/demo/<id>   one station, hourly averages of the demo day
+    /api/weather/historical           the whole weather.current_data table
+
+/api/weather/historical returns every row it stores, so it is only timed while
+the weather table is below `--max-weather-rows`.
+
+Databases:
+    sqlite  Temporary SQLite files with the db_setup tables (the default; self-contained).
+    mysql   The MySQL server from the DB_* settings in .env. Its bike and weather
+            tables are RECREATED through DBSetUp and loaded with its loader.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.history_queries --sizes 1e5 1e6
+    python -m benchmarks.history_queries --stations 500 --sizes 1e6 1e7 1e8
+    python -m benchmarks.history_queries --database mysql --sizes 1e6 1e7 1e8 1e9
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from benchmarks.load_stubs import BIKE_TABLES, WEATHER_TABLES
+
+LOCAL_DB_SETUP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "local_db_setup")
+sys.path.insert(0, LOCAL_DB_SETUP)
+from synthetic_data import SyntheticDataGenerator, DEFAULT_END, MAX_DAYS  # noqa: E402
+
+
+class SQLiteTarget:
+    """Temporary bike.db and weather.db files with the db_setup tables."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.database_url = "sqlite:///" + os.path.join(directory, "{db_name}.db")
+        with sqlite3.connect(os.path.join(directory, "bike.db")) as conn:
+            conn.executescript(BIKE_TABLES)
+        with sqlite3.connect(os.path.join(directory, "weather.db")) as conn:
+            conn.executescript(WEATHER_TABLES)
+
+    def load(self, generator, start, end, include_stations):
+        with sqlite3.connect(os.path.join(self.directory, "bike.db")) as conn:
+            if include_stations:
+                self._append(conn, "station", generator.stations())
+            for chunk in generator.availability_chunks(start, end):
+                self._append(conn, "availability", chunk)
+        with sqlite3.connect(os.path.join(self.directory, "weather.db")) as conn:
+            for chunk in generator.weather_chunks(start, end):
+                self._append(conn, "current_data", chunk)
+
+    @staticmethod
+    def _append(conn, table, frame):
+        # Timestamps as "YYYY-MM-DD HH:MM:SS" text, like MySQL DATETIME values read back
+        for column in frame.columns:
+            if str(frame[column].dtype).startswith("datetime64"):
+                frame[column] = frame[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+        frame = frame.astype({column: str for column in frame.columns if frame[column].dtype == object})
+        placeholders = ", ".join("?" * len(frame.columns))
+        conn.executemany(f"INSERT INTO {table} ({', '.join(frame.columns)}) VALUES ({placeholders})",
+                         frame.itertuples(index=False, name=None))
+
+
+class MySQLTarget:
+    """The configured MySQL server, with tables recreated and loaded through DBSetUp."""
+
+    database_url = None
+
+    def __init__(self):
+        from db_setup import DBSetUp
+        self.setup = DBSetUp()
+        self.setup.create_bike_database()
+        self.setup.create_bike_station()
+        self.setup.create_bike_availability()
+        self.setup.create_weather_schema()
+        self.setup.create_weather_current_date()
+
+    def load(self, generator, start, end, include_stations):
+        self.setup.load_synthetic_data(generator, start, end, include_stations)
+
+
+def time_endpoint(client, make_url, repeat):
+    """Returns (median ms, response KiB) over `repeat` requests after one warm-up request."""
+    client.get(make_url())
+    timings, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(make_url())
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(response.data) / 1024
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code}: {response.data[:200]}")
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e6, 1e7, 1e8, 1e9], help="Availability rows per step")
+    parser.add_argument("--stations", type=int, default=115, help="Minimum stations; more are added for large sizes")
+    parser.add_argument("--max-days", type=int, default=MAX_DAYS, help="Longest history of the largest step")
+    parser.add_argument("--database", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed requests per endpoint and step")
+    parser.add_argument("--max-weather-rows", type=float, default=2e6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(prefix="history-queries-")
+    target = SQLiteTarget(workdir.name) if args.database == "sqlite" else MySQLTarget()
+    if target.database_url:
+        from services import db_config
+        db_config.DATABASE_URL = target.database_url
+    from app import app
+    client = app.test_client()
+
+    stations = SyntheticDataGenerator.stations_for_rows(max(args.sizes), args.stations, args.max_days)
+    generator = SyntheticDataGenerator(stations, seed=args.seed)
+    rnd = random.Random(args.seed)
+    station_id = lambda: rnd.randint(1, stations)
+    endpoints = {
+        "history": lambda: f"/api/stations/history/{station_id()}?start_time=2025-02-23 06:00:00&end_time=2025-02-23 18:00:00",
+        "history_demo": lambda: f"/api/stations/history/demo/{station_id()}",
+        "weather": lambda: "/api/weather/historical",
+    }
+
+    loaded_days = 0
+    print(f"{stations:,} stations")
+    print(f"{'rows':>14}{'days':>8}{'load s':>9}{'rows/s':>11}  " + "".join(f"{name + ' ms':>17}" for name in endpoints))
+    for size in sorted(args.sizes):
+        days = SyntheticDataGenerator.days_for_rows(size, stations)
+        start = DEFAULT_END - datetime.timedelta(days=days)
+        end = DEFAULT_END - datetime.timedelta(days=loaded_days)
+        load_start = time.perf_counter()
+        target.load(generator, start, end, include_stations=loaded_days == 0)
+        load_seconds = time.perf_counter() - load_start
+        added = SyntheticDataGenerator.rows_per_day(stations, datetime.timedelta(minutes=5)) * (days - loaded_days)
+        loaded_days = days
+
+        rows = SyntheticDataGenerator.rows_per_day(stations, datetime.timedelta(minutes=5)) * days
+        weather_rows = SyntheticDataGenerator.rows_per_day(stations, datetime.timedelta(hours=1)) * days
+        cells = []
+        for name, make_url in endpoints.items():
+            if name == "weather" and weather_rows > args.max_weather_rows:
+                cells.append(f"{'skipped':>17}")
+                continue
+            ms, kib = time_endpoint(client, make_url, args.repeat)
+            cells.append(f"{ms:>9.1f} ({kib:>5.0f}K)")
+        print(f"{rows:>14,}{days:>8}{load_seconds:>9.1f}{added / max(load_seconds, 1e-9):>11,.0f}  " + "".join(cells))
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
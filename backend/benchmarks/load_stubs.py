@@ -0,0 +1,310 @@
+"""
+Local stand-ins for everything the app talks to, used by the load test.
+
+- A JCDecaux stub serving `/vls/v1/stations`, replaying the raw responses saved by
+  the scraper in `local_db_setup/bike_data/` (round-robin), or synthetic stations
+  when no recordings are available.
+- An OpenWeather stub serving `/onecall` and `/onecall/timemachine`, replaying
+  `local_db_setup/weather_data/*/weather_*` recordings or synthetic weather.
+- A SQLite copy of the `bike` and `weather` schemas filled with synthetic
+  5-minute availability and hourly weather, served through DATABASE_URL.
+
+Both stubs add a configurable latency to every response, so the app sees upstream
+calls that cost about as much as the real ones.
+"""
+import datetime
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from benchmarks.fixtures import make_stations
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "local_db_setup")
+DEMO_DAY = datetime.date(2025, 2, 23)  # The day queried by /api/stations/history/demo/<id>
+
+
+class StubServer:
+    """
+    A ThreadingHTTPServer on a free local port, running in a daemon thread.
+
+    `routes` maps a URL path to a function (query dict) -> (status, JSON-serializable body).
+    """
+
+    def __init__(self, routes, latency=0.0):
+        self.routes = routes
+        self.latency = latency
+        self.hits = {path: 0 for path in routes}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                route = stub.routes.get(url.path)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if route is None:
+                    status, body = 404, {"error": "Not found"}
+                else:
+                    with stub._lock:
+                        stub.hits[url.path] += 1
+                    status, body = route({k: v[0] for k, v in parse_qs(url.query).items()})
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Keep the load test output readable
+
+        return Handler
+
+
+class Replay:
+    """Round-robin over recorded payloads, thread safe."""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.position = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.payloads)
+
+    def next(self):
+        with self._lock:
+            payload = self.payloads[self.position % len(self.payloads)]
+            self.position += 1
+        return payload
+
+
+def load_bike_recordings(contract, directory=RECORDINGS_DIR):
+    """
+    Returns the recorded JCDecaux responses of `contract`, oldest first. The first
+    contract's files have no suffix (bikes_2025-02-23_14-05-00), the others end in _<contract>.
+    """
+    payloads = {}
+    for path in sorted(glob.glob(os.path.join(directory, "bike_data", "bikes_*"))):
+        match = re.fullmatch(r"bikes_[\d-]+_[\d-]+(?:_(\w+))?", os.path.basename(path))
+        if match and match.group(1) in (None, contract):
+            with open(path) as file:
+                try:
+                    payloads.setdefault(match.group(1), []).append(json.load(file))
+                except ValueError:
+                    continue
+    return payloads.get(contract) or payloads.get(None, [])
+
+
+def load_weather_recordings(directory=RECORDINGS_DIR):
+    """Returns the recorded One Call responses (with a "current" block)."""
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(directory, "weather_data", "*", "weather_*"))):
+        with open(path) as file:
+            try:
+                payload = json.load(file)
+            except ValueError:
+                continue
+        if "current" in payload:
+            payloads.append(payload)
+    return payloads
+
+
+def synthetic_bike_payload(stations, seed):
+    """Raw JCDecaux records for `stations` (as made by `make_stations`), with fresh counts."""
+    rng = np.random.default_rng(seed)
+    now_ms = int(time.time() * 1000)
+    payload = []
+    for station in stations:
+        capacity = station["details"]["capacity"]
+        bikes = int(rng.integers(0, capacity + 1))
+        payload.append({
+            "number": station["id"],
+            "contract_name": "dublin",
+            "name": station["name"],
+            "address": station["address"],
+            "position": {"lat": station["lat"], "lng": station["lon"]},
+            "banking": False,
+            "bonus": False,
+            "bike_stands": capacity,
+            "available_bike_stands": capacity - bikes,
+            "available_bikes": bikes,
+            "status": "OPEN",
+            "last_update": now_ms,
+        })
+    return payload
+
+
+def synthetic_current_weather(timestamp):
+    """A One Call "current" block with a daily temperature cycle."""
+    hour = datetime.datetime.fromtimestamp(timestamp).hour
+    temp = round(9 + 4 * np.sin((hour - 9) / 24 * 2 * np.pi), 2)
+    return {
+        "dt": int(timestamp), "sunrise": int(timestamp) - 6 * 3600, "sunset": int(timestamp) + 6 * 3600,
+        "temp": temp, "feels_like": temp - 2, "pressure": 1012, "humidity": 80, "dew_point": 5.0,
+        "uvi": 0.5, "clouds": 75, "visibility": 10000, "wind_speed": 5.1, "wind_deg": 240,
+        "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+    }
+
+
+def start_bike_stub(latency=0.0, stations=115):
+    """
+    Starts the JCDecaux stub. Recorded responses are replayed per contract when
+    available; otherwise every call returns synthetic counts for `stations` stations.
+    """
+    synthetic_stations = make_stations(stations)
+    replays = {}
+    calls = [0]
+
+    def get_stations(query):
+        contract = query.get("contract", "dublin")
+        if contract not in replays:
+            replays[contract] = Replay(load_bike_recordings(contract))
+        if replays[contract]:
+            return 200, replays[contract].next()
+        calls[0] += 1
+        return 200, synthetic_bike_payload(synthetic_stations, calls[0])
+
+    return StubServer({"/vls/v1/stations": get_stations}, latency).start()
+
+
+def start_weather_stub(latency=0.0):
+    """Starts the OpenWeather stub, replaying recordings when available."""
+    replay = Replay(load_weather_recordings())
+
+    def current(timestamp):
+        return replay.next()["current"] if replay else synthetic_current_weather(timestamp)
+
+    def onecall(query):
+        return 200, {"lat": float(query.get("lat", 0)), "lon": float(query.get("lon", 0)), "current": current(time.time())}
+
+    def timemachine(query):
+        return 200, {"lat": float(query.get("lat", 0)), "lon": float(query.get("lon", 0)),
+                     "data": [current(int(query.get("dt", time.time())))]}
+
+    return StubServer({"/data/3.0/onecall": onecall, "/data/3.0/onecall/timemachine": timemachine}, latency).start()
+
+
+# === Database Stand-in (SQLite versions of the db_setup tables) ===
+BIKE_TABLES = """
+CREATE TABLE IF NOT EXISTS station (
+    contract VARCHAR(32) NOT NULL DEFAULT 'dublin',
+    id INTEGER NOT NULL,
+    name VARCHAR(128) NOT NULL,
+    address VARCHAR(128) NOT NULL,
+    position_lat FLOAT NOT NULL,
+    position_lng FLOAT NOT NULL,
+    PRIMARY KEY (contract, id)
+);
+CREATE TABLE IF NOT EXISTS availability (
+    contract VARCHAR(32) NOT NULL DEFAULT 'dublin',
+    station_id INTEGER NOT NULL,
+    status VARCHAR(128) NOT NULL,
+    available_bikes INTEGER NOT NULL,
+    available_bike_stands INTEGER NOT NULL,
+    last_update DATETIME NOT NULL,
+    record_time DATETIME NOT NULL,
+    PRIMARY KEY (contract, station_id, record_time)
+);
+"""
+
+WEATHER_TABLES = """
+CREATE TABLE IF NOT EXISTS current_data (
+    station_id INTEGER NOT NULL,
+    position_lat FLOAT NOT NULL,
+    position_lng FLOAT NOT NULL,
+    record_time DATETIME NOT NULL,
+    record_date DATE NOT NULL,
+    record_hour INTEGER NOT NULL,
+    sunrise DATETIME NOT NULL,
+    sunset DATETIME NOT NULL,
+    temp FLOAT NOT NULL,
+    feels_like FLOAT NOT NULL,
+    pressure INTEGER NOT NULL,
+    humidity INTEGER NOT NULL,
+    uvi FLOAT NOT NULL,
+    weather_id INTEGER NOT NULL,
+    wind_speed FLOAT NOT NULL,
+    wind_gust FLOAT NOT NULL DEFAULT 0,
+    rain_1h FLOAT NOT NULL DEFAULT 0,
+    snow_1h FLOAT NOT NULL DEFAULT 0,
+    PRIMARY KEY (station_id, record_date, record_hour)
+);
+"""
+
+
+def build_database(directory, stations=115, days=2, seed=0):
+    """
+    Creates bike.db and weather.db in `directory`, with `days` days of 5-minute
+    availability and hourly weather for `stations` stations, ending on DEMO_DAY.
+
+    Returns:
+        str: The DATABASE_URL template for the app ("sqlite:///<directory>/{db_name}.db").
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    station_list = make_stations(stations)
+    start = datetime.datetime.combine(DEMO_DAY - datetime.timedelta(days=days - 1), datetime.time())
+    times = [start + datetime.timedelta(minutes=5 * i) for i in range(days * 288)]
+    time_strings = [t.strftime("%Y-%m-%d %H:%M:%S") for t in times]
+    # Daily cycle: stations empty out in the morning peak and refill in the evening
+    cycle = np.sin((np.array([t.hour * 60 + t.minute for t in times]) / 1440 - 0.3) * 2 * np.pi)
+
+    for name in ("bike", "weather"):
+        path = os.path.join(directory, f"{name}.db")
+        if os.path.exists(path):
+            os.remove(path)
+
+    with sqlite3.connect(os.path.join(directory, "bike.db")) as conn:
+        conn.executescript(BIKE_TABLES)
+        conn.executemany(
+            "INSERT INTO station VALUES ('dublin', ?, ?, ?, ?, ?)",
+            [(s["id"], s["name"], s["address"], s["lat"], s["lon"]) for s in station_list],
+        )
+        for s in station_list:
+            capacity = s["details"]["capacity"]
+            bikes = np.clip(np.round(capacity / 2 * (1 + 0.8 * cycle) + rng.normal(0, 2, len(times))), 0, capacity).astype(int)
+            conn.executemany(
+                "INSERT INTO availability VALUES ('dublin', ?, 'OPEN', ?, ?, ?, ?)",
+                [(s["id"], b, capacity - b, t, t) for b, t in zip(bikes.tolist(), time_strings)],
+            )
+
+    with sqlite3.connect(os.path.join(directory, "weather.db")) as conn:
+        conn.executescript(WEATHER_TABLES)
+        rows = []
+        for s in station_list:
+            for t in times[::12]:
+                weather = synthetic_current_weather(t.timestamp())
+                rows.append((
+                    s["id"], s["lat"], s["lon"], t.strftime("%Y-%m-%d %H:%M:%S"), t.date().isoformat(), t.hour,
+                    t.replace(hour=7, minute=30).strftime("%Y-%m-%d %H:%M:%S"), t.replace(hour=18, minute=0).strftime("%Y-%m-%d %H:%M:%S"),
+                    weather["temp"], weather["feels_like"], weather["pressure"], weather["humidity"], weather["uvi"],
+                    weather["weather"][0]["id"], weather["wind_speed"], 0, 0, 0,
+                ))
+        conn.executemany(f"INSERT INTO current_data VALUES ({', '.join('?' * 18)})", rows)
+
+    return "sqlite:///" + os.path.join(os.path.abspath(directory), "{db_name}.db")
@@ -0,0 +1,268 @@
+"""
+Load test: latency percentiles and throughput of the main endpoints at a fixed request rate.
+
+The app is started as a real server (gunicorn with gunicorn.conf.py, or Flask's
+threaded development server) against local stand-ins from `benchmarks.load_stubs`:
+JCDecaux and OpenWeather stubs replaying recorded payloads with a configurable
+latency, and a SQLite copy of the database with synthetic history.
+
+Each scenario is driven open-loop: requests are sent on a fixed schedule whether
+or not earlier ones have returned, and latency is measured from the scheduled send
+time. A server that falls behind therefore shows up as growing latency instead of
+a silently lower request rate.
+
+Scenarios:
+    stations         GET /api/stations around random points
+    journey_live     GET /api/plan-journey between random points (live counts)
+    journey_future   GET /api/plan-journey with a timestamp two hours ahead (model)
+    history          GET /api/stations/history/<id> over the database range
+    history_demo     GET /api/stations/history/demo/<id> (hourly aggregate)
+    weather_history  GET /api/weather/historical
+
+Errors are failed requests and 5xx responses; 4xx answers such as "no station
+with enough bikes nearby" are valid results of the random journeys.
+
+With `--output` the results are saved as JSON; with `--baseline` they are compared
+to an earlier run and the exit status is 1 if any scenario's p95 latency rose, or
+its throughput fell, by more than `--tolerance`.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --rate 50 --duration 30 --upstream-latency 80 --output load.json
+    python -m benchmarks.load_test --baseline load.json --tolerance 0.2
+    python -m benchmarks.load_test --url http://localhost:8000 --scenarios stations
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from benchmarks.load_stubs import start_bike_stub, start_weather_stub, build_database, DEMO_DAY
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def random_point(rnd, stations, spread=0.002):
+    """A point within a few hundred metres of a random station."""
+    station = rnd.choice(stations)
+    return round(station["lat"] + rnd.uniform(-spread, spread), 6), round(station["lon"] + rnd.uniform(-spread, spread), 6)
+
+
+def journey_url(rnd, stations, future=False):
+    (start_lat, start_lon), (dest_lat, dest_lon) = random_point(rnd, stations), random_point(rnd, stations)
+    url = f"/api/plan-journey?start_lat={start_lat}&start_lon={start_lon}&dest_lat={dest_lat}&dest_lon={dest_lon}"
+    if future:
+        url += f"&timestamp={int(time.time()) + 2 * 3600}"
+    return url
+
+
+def stations_url(rnd, stations):
+    lat, lng = random_point(rnd, stations)
+    return f"/api/stations?position_lat={lat}&position_lng={lng}&maxdist=1"
+
+
+# Scenario name -> function (random.Random, live stations) -> URL
+SCENARIOS = {
+    "stations": stations_url,
+    "journey_live": journey_url,
+    "journey_future": lambda rnd, stations: journey_url(rnd, stations, future=True),
+    "history": lambda rnd, stations: f"/api/stations/history/{rnd.choice(stations)['id']}"
+                                     f"?start_time={DEMO_DAY} 06:00:00&end_time={DEMO_DAY} 18:00:00",
+    "history_demo": lambda rnd, stations: f"/api/stations/history/demo/{rnd.choice(stations)['id']}",
+    "weather_history": lambda rnd, stations: "/api/weather/historical",
+}
+
+
+class LoadGenerator:
+    """
+    Sends `rate` requests per second for `duration` seconds, from a pool of
+    `concurrency` threads each holding its own HTTP session.
+    """
+
+    def __init__(self, base_url, rate, duration, concurrency, timeout=30):
+        self.base_url = base_url
+        self.rate = rate
+        self.duration = duration
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(concurrency)
+        self.local = threading.local()
+
+    def send(self, url, scheduled):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        try:
+            status = session.get(self.base_url + url, timeout=self.timeout).status_code
+        except requests.RequestException:
+            status = 0
+        return time.perf_counter() - scheduled, status
+
+    def run(self, make_url):
+        """
+        Returns:
+            dict: Latency percentiles in ms, achieved throughput and error count of the run.
+        """
+        total = int(self.rate * self.duration)
+        futures = []
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i / self.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(self.pool.submit(self.send, make_url(), scheduled))
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        latencies = np.array([latency for latency, _ in results]) * 1000
+        # Answers like "no station with enough bikes nearby" (4xx) are valid; failures are 5xx or no response
+        errors = sum(1 for _, status in results if status == 0 or status >= 500)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if total else (0, 0, 0)
+        return {
+            "requests": total,
+            "errors": errors,
+            "throughput": round((total - errors) / elapsed, 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(latencies.max()), 2) if total else 0,
+        }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(server, port, env, workers, log_path):
+    if server == "gunicorn":
+        env = dict(env, GUNICORN_BIND=f"127.0.0.1:{port}", GUNICORN_WORKERS=str(workers))
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        command = [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    with open(log_path, "wb") as log:
+        return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(base_url, process, log_path, timeout=120):
+    """Waits for the app to serve /api/stations and returns the live stations."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            with open(log_path, errors="replace") as log:
+                raise RuntimeError(f"App exited during startup:\n{log.read()[-2000:]}")
+        try:
+            response = requests.get(base_url + "/api/stations", timeout=5)
+            if response.status_code == 200 and response.json()["data"]:
+                return response.json()["data"]
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"App not ready after {timeout} s")
+
+
+def compare(results, baseline, tolerance):
+    """Returns the regressions of `results` against `baseline` as readable lines."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput']} -> {current['throughput']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--rate", type=float, default=20, help="Requests per second per scenario")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of unrecorded load before each scenario")
+    parser.add_argument("--concurrency", type=int, default=64, help="Client threads")
+    parser.add_argument("--server", choices=["gunicorn", "flask"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=2, help="Gunicorn worker processes")
+    parser.add_argument("--upstream-latency", type=float, default=50, help="Added to every stub response (ms)")
+    parser.add_argument("--stations", type=int, default=115, help="Synthetic stations when no recordings are replayed")
+    parser.add_argument("--days", type=int, default=2, help="Days of synthetic history in the database stand-in")
+    parser.add_argument("--url", help="Load an already running server instead of starting one with stubs")
+    parser.add_argument("--output", help="Save the results as JSON")
+    parser.add_argument("--baseline", help="Compare against the JSON results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    process, stubs = None, []
+    workdir = tempfile.TemporaryDirectory(prefix="loadtest-")
+    log_path = os.path.join(workdir.name, "app.log")
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            latency = args.upstream_latency / 1000
+            stubs = [start_bike_stub(latency, args.stations), start_weather_stub(latency)]
+            print(f"Building database stand-in ({args.stations} stations, {args.days} days)...")
+            database_url = build_database(os.path.join(workdir.name, "db"), args.stations, args.days)
+            env = dict(
+                os.environ,
+                BIKE_API_KEY="stub",
+                WEATHER_API_KEY="stub",
+                BIKE_NAME="dublin",
+                BIKE_STATIONS_URL=f"{stubs[0].url}/vls/v1/stations",
+                WEATHER_API_URL=f"{stubs[1].url}/data/3.0",
+                DATABASE_URL=database_url,
+                STATION_MATRIX_DIR=os.path.join(workdir.name, "matrices"),
+                PROFILING_ENABLED="0",
+            )
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            print(f"Starting the app with {args.server}...")
+            process = start_app(args.server, port, env, args.workers, log_path)
+        stations = wait_until_ready(base_url, process, log_path)
+
+        rnd = random.Random(args.seed)
+        results = {}
+        print(f"\n{'scenario':<16}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+        for name in args.scenarios:
+            make_url = lambda: SCENARIOS[name](rnd, stations)
+            if args.warmup:
+                LoadGenerator(base_url, args.rate, args.warmup, args.concurrency).run(make_url)
+            result = results[name] = LoadGenerator(base_url, args.rate, args.duration, args.concurrency).run(make_url)
+            print(f"{name:<16}{result['throughput']:>9.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                  f"{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}{result['errors']:>8}")
+
+        if stubs:
+            print("\nUpstream calls: " + ", ".join(f"{path} {count}" for stub in stubs for path, count in stub.hits.items()))
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump({"config": vars(args), "results": results}, file, indent=2)
+            print(f"Results saved to {args.output}")
+        if args.baseline:
+            with open(args.baseline) as file:
+                regressions = compare(results, json.load(file)["results"], args.tolerance)
+            if regressions:
+                print("\nRegressions beyond the tolerance:\n  " + "\n  ".join(regressions))
+                sys.exit(1)
+            print("\nNo regressions beyond the tolerance.")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        for stub in stubs:
+            stub.stop()
+        workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: request latency with and without the metrics instrumentation.
+
+Requests are served in-process through Flask's test client from a synthetic
+station snapshot, so the numbers isolate the cost of the request timer and
+spans from network and upstream time. Plain and instrumented requests are
+run in alternating blocks of --block requests, and the median block of each
+is compared, so bursts of background work (station polls, nowcast rebuilds)
+hit both sides alike.
+
+The end-to-end difference is still of the order of the noise of a full
+request, so the overhead is also computed from its parts: the request timer
+and a span are timed in isolation, times the spans one request records. With
+`--max-overhead`, the script exits with status 1 if that estimate exceeds the
+given percentage of a plain request.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --requests 2000 --block 50 --max-overhead 1
+"""
+import os
+
+# No background refreshes or watchers, which would only add noise
+os.environ.setdefault("ENCODING_REFRESH_SECONDS", "0")
+os.environ.setdefault("MODEL_RELOAD_SECONDS", "0")
+
+import argparse
+import statistics
+import sys
+import time
+from benchmarks.fixtures import make_stations
+from services import live_stations, metrics
+
+URLS = [
+    "/api/stations?position_lat=53.35&position_lng=-6.26&maxdist=1",
+    "/api/plan-journey?start_lat=53.35&start_lon=-6.26&dest_lat=53.33&dest_lon=-6.28&top_k=5",
+]
+
+
+def run(client, url, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(url)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def per_call(function, calls=200000):
+    """Median cost of `function` in microseconds, net of the loop and call itself."""
+    def best(f):
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(calls // 5):
+                f()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) / (calls // 5) * 1e6
+    return best(function) - best(lambda: None)
+
+
+def empty_span():
+    with metrics.span("benchmark"):
+        pass
+
+
+def span_count():
+    """Spans recorded so far, over all span names."""
+    return sum(sum(counts) for counts, _ in list(metrics.span_duration.values.values()))
+
+
+def timer_cost(app, url):
+    """Cost of the request timer of one request to `url`, in microseconds."""
+    timer = metrics.RequestTimer(lambda environ, start_response: start_response("200 OK", []))
+    with app.test_request_context(url) as context:
+        environ = context.request.environ
+        return per_call(lambda: timer(environ, lambda status, headers, exc_info=None: None), calls=50000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per URL and mode")
+    parser.add_argument("--block", type=int, default=50, help="Requests per block; modes alternate every block")
+    parser.add_argument("--max-overhead", type=float, help="Fail if the estimated overhead exceeds this percentage")
+    args = parser.parse_args()
+
+    stations = make_stations(115)
+    live_stations.get_all_stations = lambda contract=None: {"data": stations}
+    from app import app
+    client = app.test_client()
+
+    # The request timer installed by init_metrics, removed for the plain runs
+    timer = app.wsgi_app
+
+    def set_enabled(enabled):
+        metrics.METRICS_ENABLED = enabled
+        app.wsgi_app = timer if enabled else timer.wsgi_app
+
+    span_us = per_call(empty_span)
+    print(f"span: {span_us:.2f} us, request histogram update: "
+          f"{per_call(lambda: metrics.request_duration.observe(0.004, 'GET', '/api/benchmark', '200')):.2f} us")
+
+    over = False
+    for url in URLS:
+        run(client, url, 50)  # Warm up caches and matrices
+        before = span_count()
+        client.get(url)
+        spans = span_count() - before
+
+        timings = {True: [], False: []}
+        for block in range(2 * max(args.requests // args.block, 1)):
+            # Alternate which mode goes first, so neither always follows the other
+            enabled = (block % 2 == 0) == (block % 4 < 2)
+            set_enabled(enabled)
+            timings[enabled].append(run(client, url, args.block))
+        plain, instrumented = statistics.median(timings[False]), statistics.median(timings[True])
+
+        estimate = timer_cost(app, url) + spans * span_us
+        over = over or (args.max_overhead is not None and estimate / plain * 100 > args.max_overhead)
+        print(f"{url}\n  plain {plain:8.1f} us  instrumented {instrumented:8.1f} us  "
+              f"measured {instrumented - plain:+6.1f} us ({(instrumented / plain - 1) * 100:+.2f}%)  "
+              f"estimated {estimate:5.1f} us ({estimate / plain * 100:.2f}%, timer + {spans} spans)")
+    set_enabled(True)
+    if over:
+        print(f"Estimated overhead above {args.max_overhead}% of a plain request")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
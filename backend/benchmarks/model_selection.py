@@ -0,0 +1,232 @@
+"""
+Benchmark: accuracy versus serving cost of the available model bundles.
+
+Every candidate (a bundle version and prediction engine) is loaded in a fresh
+process through `ModelRegistry.load`, the path `services.prediction.load_model`
+takes, and warmed with the registry's smoke test. It then replays a held-out slice
+of historical availability through `predict_availability_batch` and reports:
+
+    accuracy   MAE, RMSE and the share of rows predicted within --tolerance bikes/stands
+    latency    median and p95 of a single-row call and of a journey-sized batch,
+               plus rows per second for large batches
+    cost       artifact size on disk, load time and resident memory added by the bundle
+
+Per target, candidates that no other candidate beats on both MAE and single-row
+latency form the Pareto front; with `--budget-us`, the most accurate candidate on
+the front within that latency is marked as the pick. Candidates whose training data
+(schema.json) overlaps the replayed slice are flagged, since their error is in-sample.
+
+The slice is read from the Parquet training set of `machine_learning.training_data`
+(or a CSV with the same columns) and defaults to its last --days days.
+
+Resident memory is read from /proc, so this runs on Linux only.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.model_selection
+    python -m benchmarks.model_selection --engines sklearn compiled --days 3 --budget-us 500
+    python -m benchmarks.model_selection --data final_merged_data.csv --bundle path/to/bundle --output models.json
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+from services.model_registry import BUNDLE_FILES, ModelRegistry
+from services.prediction import MODEL_DIR, ARTIFACTS_DIR, MODEL_ENGINE, smoke_test, predict_availability_batch
+from services.features import TARGET_COLUMNS
+from machine_learning.training_data import TRAINING_DATA_DIR
+from machine_learning.train import load_data, LATENCY_BATCH, THROUGHPUT_BATCH
+from benchmarks.worker_memory import read_memory
+
+ENGINES = ("sklearn", "compiled")
+
+
+def held_out_slice(path, start=None, end=None, days=7, rows=50000, seed=0):
+    """
+    Returns the replayed rows: those in [start, end] (dates), or the last `days` days
+    of the data, sampled down to `rows` rows. Adds the Unix `timestamp` the server
+    would receive for each row.
+    """
+    data = load_data(path)
+    if start or end:
+        dates = data["last_reported"].dt.strftime("%Y-%m-%d")
+        data = data[(dates >= (start or "")) & (dates <= (end or "9999"))]
+    else:
+        data = data[data["last_reported"] > data["last_reported"].iloc[-1] - pd.Timedelta(days=days)]
+    if len(data) > rows:
+        data = data.sample(rows, random_state=seed).sort_values("last_reported", kind="stable")
+    if data.empty:
+        raise ValueError("The held-out slice is empty.")
+
+    # Local time, as `extract_features` converts timestamps with datetime.fromtimestamp
+    unique_times = data["last_reported"].unique()
+    timestamps = {t: int(time.mktime(pd.Timestamp(t).timetuple())) for t in unique_times}
+    return data.assign(timestamp=data["last_reported"].map(timestamps)).reset_index(drop=True)
+
+
+def candidate_paths(bundle_paths):
+    """Returns {version: (model_dir, artifacts_dir)} for the registry's versions and extra bundle folders."""
+    registry = ModelRegistry(MODEL_DIR, ARTIFACTS_DIR)
+    candidates = {version: (MODEL_DIR, ARTIFACTS_DIR) for version in registry.available_versions()}
+    for path in bundle_paths:
+        path = os.path.abspath(path)
+        if not all(os.path.exists(os.path.join(path, f)) for f in BUNDLE_FILES.values()):
+            raise ValueError(f"{path} does not contain the bundle files {', '.join(BUNDLE_FILES.values())}")
+        candidates[os.path.basename(path)] = (MODEL_DIR, os.path.dirname(path))
+    return candidates
+
+
+def percentile_us(func, repeat, q):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return [round(float(np.percentile(timings, p)) * 1e6, 1) for p in q]
+
+
+def evaluate(version, model_dir, artifacts_dir, engine, data, tolerance, repeat):
+    """
+    Loads one candidate and measures it; runs in its own process so that load time
+    and memory are not distorted by earlier candidates.
+
+    Returns:
+        dict: Candidate info with per-target accuracy and latency.
+    """
+    rss_before = read_memory(os.getpid())[0]
+    registry = ModelRegistry(model_dir, artifacts_dir, smoke_test=smoke_test, engine=engine)
+    bundle = registry.load(version)
+    smoke_test(bundle)
+    rss_after = read_memory(os.getpid())[0]
+
+    path = registry.version_path(version)
+    schema_path = os.path.join(path, "schema.json")
+    trained_until = None
+    if os.path.exists(schema_path):
+        with open(schema_path) as f:
+            trained_until = json.load(f).get("data", {}).get("to")
+
+    result = {
+        "version": version,
+        "engine": engine,
+        "model_type": type(bundle.bike_model).__name__,
+        "size_bytes": sum(os.path.getsize(os.path.join(path, f)) for f in BUNDLE_FILES.values()),
+        "load_seconds": round(bundle.load_seconds, 4),
+        "rss_kib": rss_after - rss_before,
+        "in_sample": trained_until is not None and trained_until >= str(data["last_reported"].iloc[0]),
+        "targets": {},
+    }
+
+    station_ids, timestamps = data["station_id"].to_numpy(), data["timestamp"].to_numpy()
+    temps = data["max_air_temperature_celsius"].to_numpy(dtype=np.float64)
+    for target, column in TARGET_COLUMNS.items():
+        actual = data[column].to_numpy(dtype=np.float64)
+        predicted = predict_availability_batch(station_ids, timestamps, temps, target=target, bundle=bundle)
+        errors = np.abs(predicted - actual)
+
+        def predict(rows):
+            return lambda: predict_availability_batch(station_ids[:rows], timestamps[:rows], temps[:rows], target=target, bundle=bundle)
+
+        single_median, single_p95 = percentile_us(predict(1), repeat, (50, 95))
+        batch_median, batch_p95 = percentile_us(predict(LATENCY_BATCH), repeat, (50, 95))
+        large = min(THROUGHPUT_BATCH, len(data))
+        large_seconds = percentile_us(predict(large), 5, (50,))[0] / 1e6
+
+        result["targets"][target] = {
+            "mae": round(float(errors.mean()), 4),
+            "rmse": round(float(np.sqrt((errors ** 2).mean())), 4),
+            "within_tolerance": round(float((errors <= tolerance).mean()), 4),
+            "single_us": single_median,
+            "single_p95_us": single_p95,
+            "batch_rows": LATENCY_BATCH,
+            "batch_us": batch_median,
+            "batch_p95_us": batch_p95,
+            "rows_per_second": round(large / large_seconds),
+        }
+    return result
+
+
+def pareto_front(results, target, budget_us=None):
+    """
+    Marks, per result, whether it is on the MAE / single-row latency Pareto front of
+    `target` and whether it is the pick for `budget_us`.
+    """
+    points = [(r["targets"][target]["mae"], r["targets"][target]["single_us"]) for r in results]
+    for r, (mae, latency) in zip(results, points):
+        dominated = any(
+            other_mae <= mae and other_latency <= latency and (other_mae, other_latency) != (mae, latency)
+            for other_mae, other_latency in points
+        )
+        r["targets"][target]["pareto"] = not dominated
+        r["targets"][target]["pick"] = False
+
+    within_budget = [r for r in results if r["targets"][target]["pareto"]
+                     and (budget_us is None or r["targets"][target]["single_us"] <= budget_us)]
+    if budget_us is not None and within_budget:
+        min(within_budget, key=lambda r: r["targets"][target]["mae"])["targets"][target]["pick"] = True
+
+
+def print_report(results, target):
+    print(f"\n{target}: {'version':<20} {'engine':<9} {'MAE':>7} {'RMSE':>7} {'within':>7} {'1 row (us)':>11} "
+          f"{f'{LATENCY_BATCH} rows (us)':>13} {'rows/s':>10} {'size (KiB)':>11} {'load (s)':>9} {'RSS (MiB)':>10}")
+    for r in sorted(results, key=lambda r: r["targets"][target]["mae"]):
+        t = r["targets"][target]
+        marks = ("P" if t["pareto"] else " ") + ("*" if t["pick"] else " ") + ("!" if r["in_sample"] else " ")
+        print(f"{marks:>{len(target) + 1}} {r['version']:<20} {r['engine']:<9} {t['mae']:>7.3f} {t['rmse']:>7.3f} "
+              f"{t['within_tolerance']:>7.1%} {t['single_us']:>11.1f} {t['batch_us']:>13.1f} {t['rows_per_second']:>10,} "
+              f"{r['size_bytes'] / 1024:>11.1f} {r['load_seconds']:>9.3f} {r['rss_kib'] / 1024:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=TRAINING_DATA_DIR, help="Parquet training set folder or CSV file")
+    parser.add_argument("--start", help="First date of the held-out slice (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date of the held-out slice (YYYY-MM-DD)")
+    parser.add_argument("--days", type=float, default=7, help="Without --start/--end: replay the last DAYS days")
+    parser.add_argument("--rows", type=int, default=50000, help="Sample the slice down to ROWS rows")
+    parser.add_argument("--bundle", action="append", default=[], help="Extra bundle folder to compare (repeatable)")
+    parser.add_argument("--versions", nargs="+", help="Only these versions (default: all)")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=[MODEL_ENGINE])
+    parser.add_argument("--tolerance", type=float, default=2, help="Error counted as accurate, in bikes/stands")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per latency measurement")
+    parser.add_argument("--budget-us", type=float, help="Single-row latency budget for picking a model")
+    parser.add_argument("--output", help="Save the report as JSON")
+    args = parser.parse_args()
+
+    data = held_out_slice(args.data, args.start, args.end, args.days, args.rows)
+    print(f"Replaying {len(data):,} rows from {data['last_reported'].iloc[0]} to {data['last_reported'].iloc[-1]}")
+
+    candidates = candidate_paths(args.bundle)
+    if args.versions:
+        candidates = {v: paths for v, paths in candidates.items() if v in args.versions}
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for version, (model_dir, artifacts_dir) in candidates.items():
+        for engine in args.engines:
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+                try:
+                    results.append(executor.submit(
+                        evaluate, version, model_dir, artifacts_dir, engine, data, args.tolerance, args.repeat
+                    ).result())
+                except Exception as e:
+                    print(f"Skipping '{version}' ({engine}): {e}")
+    if not results:
+        raise SystemExit("No candidate could be evaluated.")
+
+    for target in TARGET_COLUMNS:
+        pareto_front(results, target, args.budget_us)
+        print_report(results, target)
+    print("\nP: Pareto front (MAE vs single-row latency)   *: pick within --budget-us   !: in-sample (trained on the slice)")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"config": vars(args), "rows": len(data), "results": results}, file, indent=2)
+        print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: per-station predictions versus the shared micro-batcher under concurrent load.
+
+Each simulated request predicts bike availability for a group of nearby
+stations, as `plan_journey` does. Requests are issued from a pool of threads,
+once calling `predict_availability` per station and once through
+`predict_availability_many`, and the throughput and latency are reported.
+
+Usage (from the `backend` folder, with the models in `machine_learning`):
+    python -m benchmarks.prediction_batching
+    python -m benchmarks.prediction_batching --threads 32 --requests 2000 --stations 15
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from services import prediction
+
+
+def run(handler, args):
+    rng = np.random.default_rng(0)
+    known = prediction.registry.active.bike_encoding.index
+    groups = [list(rng.choice(known, args.stations)) for _ in range(args.requests)]
+    timestamp = int(time.time()) + 3600
+
+    def request(station_ids):
+        start = time.perf_counter()
+        handler(station_ids, timestamp, 12.0)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        latencies = sorted(pool.map(request, groups))
+    elapsed = time.perf_counter() - start
+    return args.requests / elapsed, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def per_station(station_ids, timestamp, temp):
+    return [prediction.predict_availability(s, timestamp, temp) for s in station_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--stations", type=int, default=10, help="Stations predicted per request.")
+    args = parser.parse_args()
+
+    if prediction.registry.refresh() is None:
+        raise SystemExit("No model could be loaded.")
+    print(f"Model {prediction.registry.active.version}, {args.threads} threads, "
+          f"{args.requests} requests x {args.stations} stations, "
+          f"batch wait {prediction.PREDICTION_BATCH_WAIT_MS} ms, size {prediction.PREDICTION_BATCH_SIZE}")
+
+    print(f"{'mode':>12} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for name, handler in (("per-station", per_station), ("batched", prediction.predict_availability_many)):
+        throughput, p50, p99 = run(handler, args)
+        print(f"{name:>12} {throughput:>9.1f} {p50:>9.2f} {p99:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
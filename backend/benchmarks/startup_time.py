@@ -0,0 +1,168 @@
+"""
+Benchmark: cold-start time of the Flask app and of each scraper module.
+
+Every target is imported in a fresh interpreter started with `python -X importtime`,
+`--repeat` times. Reported per target (medians):
+
+    process    wall time of the whole process, interpreter startup included
+    import     time spent in the target's import
+    ready      app only: time until a prediction model is active, which with
+               MODEL_LOAD_MODE=background comes after the import returns
+
+plus the heaviest imports (cumulative time, from `-X importtime`) of the last run,
+to show what to defer next. The app is measured once per --model-load-modes entry.
+
+With `--budget-ms`, targets whose median import time (until the app serves or the
+scraper runs) exceeds the budget are listed and the script exits with status 1, so
+it can guard startup time in CI.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --repeat 10 --top 15 --output startup.json
+    python -m benchmarks.startup_time --targets app --model-load-modes background --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPER_DIR = os.path.join(BACKEND_DIR, "local_db_setup")
+MODEL_LOAD_MODES = ("eager", "background")
+
+# Target name -> (working directory, module imported)
+TARGETS = {
+    "app": (BACKEND_DIR, "app"),
+    "main": (SCRAPER_DIR, "main"),
+    "db_setup": (SCRAPER_DIR, "db_setup"),
+    "bike_scraper": (SCRAPER_DIR, "bike_scraper"),
+    "weather_scraper": (SCRAPER_DIR, "weather_scraper"),
+}
+
+# Runs in the child: times the import and, for the app, waits for the model
+MARKER = "startup-benchmark: import starts"
+CHILD_CODE = """
+import json, sys, time
+sys.stderr.write("{marker}\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+if "{module}" == "app":
+    from services import model_registry
+    while model_registry.active is None and model_registry.loading:
+        time.sleep(0.005)
+print("{marker}" + json.dumps({{"import_s": imported - start, "ready_s": time.perf_counter() - start}}), flush=True)
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output, from the line written before the target's import on
+    (interpreter startup is left out).
+
+    Returns:
+        list: (module, self_us, cumulative_us, depth) per import, in output order.
+    """
+    imports = []
+    for line in stderr.split(MARKER, 1)[-1].splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def run_once(cwd, module, env):
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE.format(module=module, marker=MARKER)],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    process_s = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "failed")
+    # The model loader thread may print around (even on the same line as) the timings
+    timings = json.JSONDecoder().raw_decode(process.stdout.split(MARKER, 1)[1])[0]
+    return dict(timings, process_s=process_s), parse_importtime(process.stderr)
+
+
+def measure(name, cwd, module, env, repeat, top):
+    runs, imports = [], []
+    for _ in range(repeat):
+        timings, imports = run_once(cwd, module, env)
+        runs.append(timings)
+
+    # Heaviest imports of the last run made while the target was imported, including those
+    # of threads it started (the background model load) that competed with it
+    end = max(index for index, i in enumerate(imports) if i[0] == module)
+    heaviest = sorted(imports[:end], key=lambda i: i[2], reverse=True)
+    seen, top_imports = set(), []
+    for module_name, self_us, cumulative_us, depth in heaviest:
+        # Skip submodules of a package already listed, which it includes
+        if module_name.split(".")[0] in seen:
+            continue
+        seen.add(module_name.split(".")[0])
+        top_imports.append({"module": module_name, "cumulative_ms": round(cumulative_us / 1000, 1)})
+        if len(top_imports) == top:
+            break
+
+    result = {"target": name}
+    for key in ("process_s", "import_s", "ready_s"):
+        result[key.replace("_s", "_ms")] = round(statistics.median(run[key] for run in runs) * 1000, 1)
+    result["modules"] = len(imports)
+    result["top_imports"] = top_imports
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--model-load-modes", nargs="+", choices=MODEL_LOAD_MODES, default=list(MODEL_LOAD_MODES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Heaviest imports listed per target")
+    parser.add_argument("--budget-ms", type=float, help="Fail if a target's median import time exceeds this")
+    parser.add_argument("--output", help="Save the results as JSON")
+    args = parser.parse_args()
+
+    # No background refreshes or watchers, which would only add noise
+    base_env = dict(os.environ, ENCODING_REFRESH_SECONDS="0", MODEL_RELOAD_SECONDS="0", PYTHONDONTWRITEBYTECODE="1")
+    runs = []
+    for target in args.targets:
+        cwd, module = TARGETS[target]
+        if target == "app":
+            runs += [(f"app ({mode})", cwd, module, dict(base_env, MODEL_LOAD_MODE=mode)) for mode in args.model_load_modes]
+        else:
+            runs.append((target, cwd, module, base_env))
+
+    results = []
+    for name, cwd, module, env in runs:
+        try:
+            results.append(measure(name, cwd, module, env, args.repeat, args.top))
+        except Exception as e:
+            print(f"Skipping {name}: {e}")
+
+    print(f"{'target':<18} {'process (ms)':>12} {'import (ms)':>12} {'ready (ms)':>11} {'modules':>8}  heaviest imports")
+    for r in results:
+        heaviest = ", ".join(f"{i['module']} {i['cumulative_ms']:.0f}" for i in r["top_imports"][:4])
+        print(f"{r['target']:<18} {r['process_ms']:>12.1f} {r['import_ms']:>12.1f} {r['ready_ms']:>11.1f} {r['modules']:>8}  {heaviest}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"config": vars(args), "results": results}, file, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.budget_ms is not None:
+        over = [r for r in results if r["import_ms"] > args.budget_ms]
+        for r in over:
+            print(f"Over budget: {r['target']} took {r['import_ms']:.0f} ms to import (budget {args.budget_ms:.0f} ms)")
+        if over:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
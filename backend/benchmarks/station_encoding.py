@@ -0,0 +1,51 @@
+"""
+Benchmark: serialization time and payload size of station responses.
+
+Compares the default per-station JSON (`jsonify(data=stations)`) with the
+columnar JSON and MessagePack encodings built from a StationTable.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.station_encoding
+    python -m benchmarks.station_encoding --sizes 100 1000 10000 --repeat 20
+"""
+import argparse
+import gzip
+import time
+from flask import Flask, jsonify
+from services.station_codec import StationTable
+from benchmarks.fixtures import make_stations
+
+
+def time_call(func, repeat):
+    """Returns the best wall time (ms) over `repeat` runs and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def run(sizes, repeat):
+    app = Flask(__name__)
+    print(f"{'stations':>8}  {'format':<9} {'time (ms)':>10} {'bytes':>10} {'gzip bytes':>11}")
+
+    with app.app_context():
+        for size in sizes:
+            stations = make_stations(size)
+            encoders = {
+                "json": lambda: jsonify(data=stations).get_data(),
+                "columnar": lambda: jsonify(data=StationTable.from_stations(stations).to_columnar()).get_data(),
+                "msgpack": lambda: StationTable.from_stations(stations).to_msgpack(),
+            }
+            for name, encode in encoders.items():
+                elapsed, payload = time_call(encode, repeat)
+                print(f"{size:>8}  {name:<9} {elapsed:>10.2f} {len(payload):>10} {len(gzip.compress(payload)):>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
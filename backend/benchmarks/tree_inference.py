@@ -0,0 +1,68 @@
+"""
+Benchmark: sklearn `predict` versus the compiled array engine for tree ensembles.
+
+Trains (or loads) a forest, checks that the compiled engine reproduces
+`model.predict` bit for bit, and reports the median latency per call for
+each batch size.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.tree_inference
+    python -m benchmarks.tree_inference --trees 100 --batch-sizes 1 10 100 10000
+    python -m benchmarks.tree_inference --model path/to/model.pkl
+"""
+import argparse
+import pickle
+import statistics
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from services.tree_engine import CompiledForest
+from benchmarks.fixtures import make_training_frame
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Pickled sklearn tree model (default: train a synthetic forest).")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    encoding = pd.Series(np.random.default_rng(0).uniform(2, 20, 120), index=np.arange(120))
+    if args.model:
+        with open(args.model, "rb") as f:
+            model = pickle.load(f)
+    else:
+        X, y = make_training_frame("bike", encoding)
+        model = RandomForestRegressor(n_estimators=args.trees, min_samples_leaf=5, random_state=0, n_jobs=-1).fit(X, y)
+
+    start = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(model)
+    print(f"Model: {type(model).__name__}, {len(compiled.roots)} trees, {len(compiled.feature)} nodes, "
+          f"max depth {compiled.max_depth}, compiled in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"{'batch':>6} {'sklearn (ms)':>13} {'compiled (ms)':>14} {'speedup':>8} {'identical':>10}")
+    for size in args.batch_sizes:
+        X, _ = make_training_frame("bike", encoding, rows=size, seed=size)
+        if compiled.feature_names is not None:
+            X = X[compiled.feature_names]
+        identical = np.array_equal(model.predict(X), compiled.predict(X))
+
+        repeat = max(3, args.repeat // max(1, size // 1000))
+        sklearn_ms = median_ms(lambda: model.predict(X), repeat)
+        compiled_ms = median_ms(lambda: compiled.predict(X), repeat)
+        print(f"{size:>6} {sklearn_ms:>13.3f} {compiled_ms:>14.3f} {sklearn_ms / compiled_ms:>7.1f}x {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
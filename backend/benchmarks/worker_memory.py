@@ -0,0 +1,130 @@
+"""
+Benchmark: per-worker memory and startup time for 1 to 16 worker processes.
+
+Modes:
+    pickle   Every worker unpickles its own copy of the bundle (the default deployment).
+    preload  The bundle is loaded once and workers are forked from that process
+             (what gunicorn.conf.py does with preload_app and gc.freeze()).
+    mmap     Every worker maps the memory-mappable copy of the bundle (MODEL_SHARE_MODE=mmap).
+
+With `--engine compiled`, tree models are converted to CompiledForest arrays
+first, which (unlike sklearn trees) stay memory-mapped in mmap mode.
+
+For each worker count, RSS and PSS (resident memory with shared pages split
+between the processes mapping them) are read from /proc, so this runs on Linux only.
+
+Usage (from the `backend` folder):
+    python -m benchmarks.worker_memory
+    python -m benchmarks.worker_memory --forest-trees 200 --workers 1 2 4 8 16
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import tempfile
+import time
+from services.model_registry import BUNDLE_FILES, load_bundle, load_shared_bundle, export_shared_bundle, compile_bundle
+from services.prediction import predict_availability_batch, MODEL_DIR
+from benchmarks.fixtures import make_forest_bundle
+
+
+def read_memory(pid):
+    """Returns (rss, pss) of a process in KiB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values["Rss:"], values["Pss:"]
+
+
+def use_bundle(bundle):
+    """Runs a prediction so that the worker touches every part of the model."""
+    station_ids = bundle.bike_encoding.index[:100]
+    timestamps = [int(time.time())] * len(station_ids)
+    predict_availability_batch(station_ids, timestamps, 10.0, target="bike", bundle=bundle)
+    predict_availability_batch(station_ids, timestamps, 10.0, target="stand", bundle=bundle)
+
+
+def load(path, engine):
+    bundle = load_bundle(path, "benchmark")
+    return compile_bundle(bundle) if engine == "compiled" else bundle
+
+
+def worker(mode, engine, path, started_at, ready, release, bundle=None):
+    if mode == "preload":
+        gc.freeze()
+    elif mode == "pickle":
+        bundle = load(path, engine)
+    else:
+        bundle = load_shared_bundle(path, "benchmark")
+
+    use_bundle(bundle)
+    ready.put((os.getpid(), time.time() - started_at))
+    release.wait()
+
+
+def run_mode(mode, engine, workers, path, shared_path):
+    bundle = load(path, engine) if mode == "preload" else None
+    context = multiprocessing.get_context("fork" if mode == "preload" else "spawn")
+    ready, release = context.Queue(), context.Event()
+
+    started_at = time.time()
+    processes = [
+        context.Process(target=worker, args=(mode, engine, shared_path if mode == "mmap" else path, started_at, ready, release, bundle))
+        for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+
+    startup = [ready.get()[1] for _ in processes]
+    memory = [read_memory(p.pid) for p in processes]
+    release.set()
+    for p in processes:
+        p.join()
+
+    rss = [m[0] for m in memory]
+    pss = [m[1] for m in memory]
+    return {
+        "mode": mode,
+        "workers": workers,
+        "startup_s": max(startup),
+        "rss_kib": sum(rss) / workers,
+        "pss_kib": sum(pss) / workers,
+        "total_pss_mib": sum(pss) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bundle", default=MODEL_DIR, help="Folder with the bundle pickles (default: legacy models).")
+    parser.add_argument("--forest-trees", type=int, default=0,
+                        help="Benchmark a synthetic random forest with this many trees instead of --bundle.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--modes", nargs="+", default=["pickle", "preload", "mmap"])
+    parser.add_argument("--engine", choices=["sklearn", "compiled"], default="sklearn")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.bundle
+        if args.forest_trees:
+            path = os.path.join(tmp, "forest")
+            os.makedirs(path)
+            make_forest_bundle(args.forest_trees, path)
+
+        shared_path = os.path.join(tmp, "shared")
+        export_shared_bundle(load(path, args.engine), shared_path)
+        model_kib = sum(os.path.getsize(os.path.join(path, f)) for f in BUNDLE_FILES.values()) / 1024
+        print(f"Bundle: {path} ({model_kib:.0f} KiB of pickles)")
+
+        print(f"{'mode':<8} {'workers':>7} {'startup (s)':>11} {'RSS/worker (MiB)':>17} {'PSS/worker (MiB)':>17} {'total PSS (MiB)':>16}")
+        for mode in args.modes:
+            for workers in args.workers:
+                r = run_mode(mode, args.engine, workers, path, shared_path)
+                print(f"{r['mode']:<8} {r['workers']:>7} {r['startup_s']:>11.2f} {r['rss_kib'] / 1024:>17.1f} "
+                      f"{r['pss_kib'] / 1024:>17.1f} {r['total_pss_mib']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Gunicorn settings for serving the app with several worker processes.
+
+Run from the `backend` folder:
+    gunicorn -c gunicorn.conf.py app:app
+
+The app (and with it every prediction model) is imported once in the master
+process and shared with the workers through fork(). Objects alive at fork time
+are frozen out of the garbage collector, so collections in a worker do not
+touch, and therefore copy, the shared pages.
+
+Model versions hot-reloaded after the fork are loaded per worker. Setting
+MODEL_SHARE_MODE=mmap makes workers map one shared copy of their arrays instead
+(effective for linear models, station encodings and compiled tree ensembles;
+plain sklearn trees copy their node arrays when unpickled).
+
+With MODEL_LOAD_MODE=background the app is not preloaded: every worker imports
+it (without the heavy model dependencies) and loads the model in a thread of its
+own, answering /api/ready with 503 until it is active. Forking from a master that
+is still loading would hand workers half-imported modules. MODEL_SHARE_MODE=mmap
+still shares the model arrays between the workers.
+"""
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Load app and models before forking workers (unless the model loads in the background)
+preload_app = os.getenv("MODEL_LOAD_MODE", "eager") != "background"
+
+
+def pre_fork(server, worker):
+    # Move every object allocated so far to the permanent generation
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Background threads of the master do not exist in the forked worker
+    from services.prediction import registry, batcher
+    from services.encoding_refresh import encoding_refresher
+    registry.after_fork()
+    batcher.after_fork()
+    encoding_refresher.after_fork()
@@ -1,6 +1,8 @@
 import requests
 import datetime
 import os
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 from db_helper import DBHelper
 import pandas as pd
@@ -11,14 +13,21 @@ class BikeScraper:
     This class fetches real-time bike station data from an external API, 
     stores it in a local file for logging, and saves relevant station 
     and availability data into a database.
+
+    Every contract (city) listed in BIKE_NAME is fetched, concurrently, and
+    stored under its own `contract` value.
     """
     
     def __init__(self):
         # Load bike API configuration details
         bike_config = Config().get_bike_config()
 
-        # Fetch bike station data from the API
-        self.r = requests.get(bike_config.stations_uri, params={"apiKey": bike_config.bike_api_key, "contract": bike_config.bike_name})
+        # Fetch bike station data of every contract from the API
+        def fetch(contract):
+            return requests.get(bike_config.stations_uri, params={"apiKey": bike_config.bike_api_key, "contract": contract})
+
+        with ThreadPoolExecutor(max_workers=len(bike_config.bike_names)) as executor:
+            self.responses = dict(zip(bike_config.bike_names, executor.map(fetch, bike_config.bike_names)))
         
         # Initialize database helper
         self.dh = DBHelper()
@@ -39,15 +48,20 @@ class BikeScraper:
         # Format the current timestamp for filename consistency
         formatted_now = self.now.strftime("%Y-%m-%d_%H-%M-%S")
 
-        # Save the API response to a new file
-        with open(f"bike_data/bikes_{formatted_now}", "w") as file:
-            file.write(self.r.text)
+        # Save each API response to a new file; the default contract keeps the original file name
+        for i, (contract, response) in enumerate(self.responses.items()):
+            suffix = "" if i == 0 else f"_{contract}"
+            with open(f"bike_data/bikes_{formatted_now}{suffix}", "w") as file:
+                file.write(response.text)
 
     def write_to_db(self):
         """Processes and writes bike station and availability data into the database."""
         
-        # Load API response JSON into a pandas DataFrame
-        df = pd.read_json(self.r.text)
+        # Load every API response JSON into one pandas DataFrame, tagged with its contract
+        df = pd.concat(
+            [pd.read_json(StringIO(response.text)).assign(contract=contract) for contract, response in self.responses.items()],
+            ignore_index=True,
+        )
 
         # Extract latitude and longitude from the 'position' column
         df[['position_lat', 'position_lng']] = pd.json_normalize(df['position'])
@@ -57,7 +71,7 @@ class BikeScraper:
         df['record_time'] = self.now
 
         # Define relevant columns for the 'station' table
-        station_cols = ['id', 'name', 'address', 'position_lat', 'position_lng']
+        station_cols = ['contract', 'id', 'name', 'address', 'position_lat', 'position_lng']
         
         # Rename 'number' column to 'id' for consistency
         station_df = df.rename(columns={'number': 'id'})
@@ -66,8 +80,9 @@ class BikeScraper:
         # Fetch existing station data from the database
         existing_station_df = self.dh.query_data(sql="SELECT * FROM bike.station")
         
-        # Identify new stations not already in the database
-        new_station_df = station_df[~station_df['id'].isin(existing_station_df['id'])]
+        # Identify new stations not already in the database (station IDs are only unique within a contract)
+        existing_keys = pd.MultiIndex.from_frame(existing_station_df[['contract', 'id']])
+        new_station_df = station_df[~pd.MultiIndex.from_frame(station_df[['contract', 'id']]).isin(existing_keys)]
 
         # Insert new stations into the database if there are any
         if len(new_station_df) > 0:
@@ -76,7 +91,7 @@ class BikeScraper:
             print("No new data need to be saved for bike.station")
         
         # Define relevant columns for the 'availability' table
-        availability_cols = ['station_id', 'status', 'available_bikes', 'available_bike_stands', 'last_update', 'record_time']
+        availability_cols = ['contract', 'station_id', 'status', 'available_bikes', 'available_bike_stands', 'last_update', 'record_time']
         
         # Rename 'number' column to 'station_id' for consistency
         availability_df = df.rename(columns={'number': 'station_id'})
@@ -0,0 +1,204 @@
+import argparse
+import csv
+import os
+import tempfile
+import time
+import pandas as pd
+from sqlalchemy import create_engine
+from pymysql.err import OperationalError, InternalError, ProgrammingError, IntegrityError
+from db_helper import DBHelper
+
+LOAD_METHODS = ("auto", "infile", "executemany")
+DUPLICATE_MODES = ("error", "ignore", "replace")
+NULL = r"\N"  # NULL marker of LOAD DATA
+# Server and client errors meaning LOAD DATA LOCAL INFILE is disabled, not that the data is wrong
+LOCAL_INFILE_DISABLED = (1148, 2068, 3948)
+DUPLICATE_KEY = 1062
+
+
+def infile_row(row):
+    """
+    Returns a row as written for LOAD DATA: None as the NULL marker, and backslashes in
+    text doubled, since LOAD DATA reads them as escape characters (FIELDS ESCAPED BY '\\').
+    """
+    return [NULL if value is None else value.replace("\\", "\\\\") if isinstance(value, str) else value for value in row]
+
+
+class BulkLoader:
+    """
+    Streams large CSV files (or DataFrame chunks) into any table created by DBSetUp.
+
+    Rows are loaded `chunk_rows` at a time, each chunk in its own transaction, with
+    `LOAD DATA LOCAL INFILE` when the server allows it (method "infile") or with
+    multi-row INSERTs built by the driver's executemany (method "executemany").
+    "auto" tries LOAD DATA first and falls back to executemany if local infile is
+    disabled on the server or client; any other error is raised. Unique and foreign key checks are switched off for the
+    session while loading; primary keys are still enforced, and duplicate keys are
+    either an error, skipped ("ignore") or overwrite the stored row ("replace").
+    """
+
+    def __init__(self, dh=None, chunk_rows=50000, method="auto", on_duplicate="error"):
+        if method not in LOAD_METHODS:
+            raise ValueError(f"method must be one of {LOAD_METHODS}")
+        if on_duplicate not in DUPLICATE_MODES:
+            raise ValueError(f"on_duplicate must be one of {DUPLICATE_MODES}")
+        dh = dh or DBHelper()
+        # A separate quiet engine: statement logging would dominate the load time
+        self.engine = create_engine(dh.connection_string, connect_args={"local_infile": True})
+        self.chunk_rows = chunk_rows
+        self.method = method
+        self.on_duplicate = on_duplicate
+
+    def table_columns(self, table_name):
+        """Returns the column names of `table_name` (db_name.table_name) in table order."""
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SHOW COLUMNS FROM {table_name}")
+                return [row[0] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+
+    def load_csv(self, file_path, table_name, sep=None):
+        """
+        Loads a CSV file with a header row naming the table's columns (in any order, or a subset
+        relying on column defaults). Empty fields are loaded as NULL.
+
+        Args:
+            file_path (str): CSV file, e.g. availability_demo.csv
+            table_name (str): db_name.table_name
+            sep (str): Field separator; detected from the header when None
+
+        Returns:
+            dict: rows, seconds and rows_per_second of the load
+        """
+        with open(file_path, newline="") as file:
+            header_line = file.readline()
+            sep = sep or csv.Sniffer().sniff(header_line, delimiters=",;\t|").delimiter
+            columns = next(csv.reader([header_line], delimiter=sep))
+            reader = csv.reader(file, delimiter=sep)
+            chunks = self._chunks(([value if value != "" else None for value in row] for row in reader))
+            return self._load(chunks, table_name, columns)
+
+    def load_frames(self, frames, table_name):
+        """
+        Loads an iterable of DataFrames (e.g. the chunks of SyntheticDataGenerator) whose
+        columns are named after the table's columns.
+
+        Returns:
+            dict: rows, seconds and rows_per_second of the load
+        """
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
+            return {"rows": 0, "seconds": 0.0, "rows_per_second": 0.0}
+
+        def rows():
+            for frame in (first, *frames):
+                frame = frame.copy()
+                for column in frame.columns:
+                    if pd.api.types.is_datetime64_any_dtype(frame[column]):
+                        frame[column] = frame[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+                frame = frame.astype(object).where(frame.notna(), None)
+                yield from frame.itertuples(index=False, name=None)
+
+        return self._load(self._chunks(rows()), table_name, list(first.columns))
+
+    def _chunks(self, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _load(self, chunks, table_name, columns):
+        unknown = set(columns) - set(self.table_columns(table_name))
+        if unknown:
+            raise ValueError(f"Columns not in {table_name}: {', '.join(sorted(unknown))}")
+
+        method = self.method
+        total, start = 0, time.perf_counter()
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                # Relax per-row checks for this session only; restored below
+                cursor.execute("SET SESSION unique_checks = 0")
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+                try:
+                    for chunk in chunks:
+                        if method in ("auto", "infile"):
+                            try:
+                                self._load_infile(cursor, table_name, columns, chunk)
+                                method = "infile"
+                            except (OperationalError, InternalError, ProgrammingError) as e:
+                                if method == "infile" or e.args[0] not in LOCAL_INFILE_DISABLED:
+                                    raise
+                                print(f"LOAD DATA LOCAL INFILE unavailable ({e}), using executemany instead.")
+                                connection.rollback()
+                                method = "executemany"
+                        if method == "executemany":
+                            self._load_executemany(cursor, table_name, columns, chunk)
+                        connection.commit()
+
+                        total += len(chunk)
+                        elapsed = time.perf_counter() - start
+                        print(f"{table_name}: {total:,} rows loaded ({total / elapsed:,.0f} rows/s, {method})")
+                finally:
+                    cursor.execute("SET SESSION unique_checks = 1")
+                    cursor.execute("SET SESSION foreign_key_checks = 1")
+        finally:
+            connection.close()
+
+        seconds = time.perf_counter() - start
+        return {"rows": total, "seconds": round(seconds, 3), "rows_per_second": round(total / seconds, 1) if seconds else 0.0}
+
+    def _load_infile(self, cursor, table_name, columns, chunk):
+        """
+        Writes the chunk to a temporary file and loads it with LOAD DATA LOCAL INFILE.
+
+        LOCAL loads skip duplicate keys unless REPLACE is given, so with on_duplicate="error"
+        a chunk that inserted fewer rows than it holds raises IntegrityError, like the
+        plain INSERT of executemany; the caller's transaction is then rolled back.
+        """
+        keyword = {"error": "", "ignore": "IGNORE", "replace": "REPLACE"}[self.on_duplicate]
+        file = tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False)
+        try:
+            with file:
+                writer = csv.writer(file, lineterminator="\n")
+                writer.writerows(infile_row(row) for row in chunk)
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s {keyword} INTO TABLE {table_name} "
+                "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+                (file.name,),
+            )
+        finally:
+            os.remove(file.name)
+        if self.on_duplicate == "error" and cursor.rowcount < len(chunk):
+            raise IntegrityError(DUPLICATE_KEY, f"{len(chunk) - cursor.rowcount} of {len(chunk)} rows "
+                                                f"not loaded into {table_name} (duplicate keys)")
+
+    def _load_executemany(self, cursor, table_name, columns, chunk):
+        """Inserts the chunk with executemany, which the driver sends as multi-row INSERTs."""
+        verb = {"error": "INSERT", "ignore": "INSERT IGNORE", "replace": "REPLACE"}[self.on_duplicate]
+        placeholders = ", ".join(["%s"] * len(columns))
+        cursor.executemany(f"{verb} INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", chunk)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load CSV files into a table created by DBSetUp.")
+    parser.add_argument("table_name", help="db_name.table_name, e.g. bike.availability")
+    parser.add_argument("files", nargs="+", help="CSV files with a header row of column names")
+    parser.add_argument("--sep", help="Field separator (detected by default)")
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--method", choices=LOAD_METHODS, default="auto")
+    parser.add_argument("--on-duplicate", choices=DUPLICATE_MODES, default="error")
+    args = parser.parse_args()
+
+    loader = BulkLoader(chunk_rows=args.chunk_rows, method=args.method, on_duplicate=args.on_duplicate)
+    for file_path in args.files:
+        stats = loader.load_csv(file_path, args.table_name, sep=args.sep)
+        print(f"{file_path}: {stats['rows']:,} rows in {stats['seconds']:.1f} s ({stats['rows_per_second']:,.0f} rows/s)")
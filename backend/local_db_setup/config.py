@@ -65,6 +65,8 @@ class BikeConfig:
         """Initialize bike configuration by loading API details from environment variables."""
         self.bike_api_key = os.getenv("BIKE_API_KEY")
         self.bike_name = os.getenv("BIKE_NAME")
+        # BIKE_NAME may list several contracts (cities), e.g. "dublin,lyon"; the first one is the default
+        self.bike_names = [name.strip() for name in (self.bike_name or "").split(",") if name.strip()]
         self.stations_uri = os.getenv("BIKE_STATIONS_URL")
 
     def validate(self):
@@ -78,7 +80,7 @@ class BikeConfig:
 
         if not self.bike_api_key:
             missing_keys.append("BIKE_API_KEY")
-        if not self.bike_name:
+        if not self.bike_names:
             missing_keys.append("BIKE_NAME")
         if not self.stations_uri:
             missing_keys.append("BIKE_STATIONS_URL")
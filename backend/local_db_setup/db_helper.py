@@ -58,11 +58,62 @@ class DBHelper:
             except SQLAlchemyError as e:
                 print(f"Error occurred while creating table {table_name}: {e}")
 
-    def query_data(self, sql):
-        """Query data"""
+    def column_exists(self, table_name, column):
+        """Checks whether a table has a column
+
+        Args:
+            table_name (str): db_name.table_name
+            column (str): Column name
+        """
+        db_name, table = table_name.split(".")
+        sql = """
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = :db_name AND table_name = :table AND column_name = :column
+        """
+        with self.engine.connect() as conn:
+            return conn.execute(text(sql), {"db_name": db_name, "table": table, "column": column}).scalar() > 0
+
+    def primary_key_columns(self, table_name):
+        """Returns the primary key columns of a table, in key order
+
+        Args:
+            table_name (str): db_name.table_name
+        """
+        db_name, table = table_name.split(".")
+        sql = """
+            SELECT column_name FROM information_schema.key_column_usage
+            WHERE table_schema = :db_name AND table_name = :table AND constraint_name = 'PRIMARY'
+            ORDER BY ordinal_position
+        """
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(text(sql), {"db_name": db_name, "table": table})]
+
+    def partition_expression(self, table_name):
+        """Returns how a table is partitioned, e.g. ("KEY", "`contract`"), or None if it is not
+
+        Args:
+            table_name (str): db_name.table_name
+        """
+        db_name, table = table_name.split(".")
+        sql = """
+            SELECT partition_method, partition_expression FROM information_schema.partitions
+            WHERE table_schema = :db_name AND table_name = :table AND partition_name IS NOT NULL
+            LIMIT 1
+        """
+        with self.engine.connect() as conn:
+            row = conn.execute(text(sql), {"db_name": db_name, "table": table}).first()
+        return tuple(row) if row else None
+
+    def execute(self, sql):
+        """Runs a statement that returns no rows (e.g. ALTER TABLE) and commits it"""
+        with self.engine.begin() as conn:
+            conn.execute(text(sql))
+
+    def query_data(self, sql, params=None):
+        """Query data, with optional `:name` bind parameters"""
         try:
             with self.engine.connect() as conn:
-                existing_data = pd.read_sql(sql, conn)
+                existing_data = pd.read_sql(text(sql), conn, params=params)
             return existing_data
         except Exception as e:
             print(f"Error occurred while selecting date: {e}")
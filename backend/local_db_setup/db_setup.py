@@ -1,6 +1,6 @@
 from db_helper import DBHelper
+from bulk_loader import BulkLoader
 import os
-import pandas as pd
 
 
 class DBSetUp:
@@ -9,6 +9,7 @@ class DBSetUp:
         Initializes the DBSetUp class with a database helper instance.
         """
         self.dh = DBHelper()
+        self.loader = BulkLoader(self.dh)
 
     def create_bike_database(self):
         """
@@ -20,36 +21,67 @@ class DBSetUp:
     def create_bike_station(self):
         """
         Creates the bike.station table to store static bike station information like name and location.
+        Rows are keyed and partitioned by contract, so each city's stations are stored and scanned together.
         """
         sql = """
             CREATE TABLE bike.station (
-                id INTEGER NOT NULL COMMENT 'Station ID (Dublin)',
+                contract VARCHAR(32) NOT NULL DEFAULT 'dublin' COMMENT 'JCDecaux contract (city)',
+                id INTEGER NOT NULL COMMENT 'Station ID (unique within the contract)',
                 name VARCHAR(128) NOT NULL COMMENT 'Station name',
                 address VARCHAR(128) NOT NULL COMMENT 'Station address',
                 position_lat FLOAT NOT NULL COMMENT 'Latitude',
                 position_lng FLOAT NOT NULL COMMENT 'Longitude',
-                PRIMARY KEY (id)
-            );
+                PRIMARY KEY (contract, id)
+            )
+            PARTITION BY KEY (contract) PARTITIONS 8;
             """
         self.dh.create_table(sql=sql, table_name="bike.station")
 
     def create_bike_availability(self):
         """
-        Creates the bike.availability table to store real-time availability of bikes and stands.
+        Creates the bike.availability table to store real-time availability of bikes and stands,
+        partitioned by contract like bike.station.
         """
         sql = """
         CREATE TABLE bike.availability (
-            station_id INTEGER NOT NULL COMMENT 'Station ID (Dublin)',
+            contract VARCHAR(32) NOT NULL DEFAULT 'dublin' COMMENT 'JCDecaux contract (city)',
+            station_id INTEGER NOT NULL COMMENT 'Station ID (unique within the contract)',
             status VARCHAR(128) NOT NULL COMMENT 'Status (CLOSED/OPEN)',
             available_bikes INTEGER NOT NULL COMMENT 'Available bikes',
             available_bike_stands INTEGER NOT NULL COMMENT 'Available bike stands',
             last_update DATETIME NOT NULL COMMENT 'Last update time',
             record_time DATETIME NOT NULL COMMENT 'Data record time',
-            PRIMARY KEY (station_id, record_time)
-            );
+            PRIMARY KEY (contract, station_id, record_time)
+            )
+            PARTITION BY KEY (contract) PARTITIONS 8;
         """
         self.dh.create_table(sql=sql, table_name="bike.availability")
 
+    def migrate_contract_columns(self):
+        """
+        Upgrades bike.station and bike.availability tables created before contracts were
+        introduced: adds the contract column (existing rows become 'dublin'), makes it part
+        of the primary key and partitions by it. Each step is checked on its own, so a run
+        that stopped halfway is completed by the next one; steps already done are skipped,
+        and no data is dropped, so it is safe to run on every deployment.
+        """
+        keys = {"bike.station": ["contract", "id"], "bike.availability": ["contract", "station_id", "record_time"]}
+        for table_name, primary_key in keys.items():
+            if not self.dh.column_exists(table_name, "contract"):
+                print(f"Adding the contract column to {table_name}...")
+                self.dh.execute(f"""
+                    ALTER TABLE {table_name}
+                    ADD COLUMN contract VARCHAR(32) NOT NULL DEFAULT 'dublin' COMMENT 'JCDecaux contract (city)' FIRST
+                """)
+            if self.dh.primary_key_columns(table_name) != primary_key:
+                print(f"Keying {table_name} by ({', '.join(primary_key)})...")
+                self.dh.execute(f"ALTER TABLE {table_name} DROP PRIMARY KEY, ADD PRIMARY KEY ({', '.join(primary_key)})")
+            partitioning = self.dh.partition_expression(table_name)
+            if partitioning is None or partitioning[0] != "KEY" or partitioning[1].strip("`") != "contract":
+                print(f"Partitioning {table_name} by contract...")
+                self.dh.execute(f"ALTER TABLE {table_name} PARTITION BY KEY (contract) PARTITIONS 8")
+            print(f"{table_name} is up to date.")
+
     def create_weather_schema(self):
         """
         Creates the weather database to store weather-related data.
@@ -170,8 +202,26 @@ class DBSetUp:
         """
         base_dir = os.path.dirname(__file__)
         file_path = os.path.join(base_dir, "availability_demo.csv")
-        df = pd.read_csv(file_path, sep=';')
-        self.dh.save_df_data(df=df, db_name="bike", table_name="availability")
+        self.bulk_load_csv(file_path, "bike.availability", sep=';')
+
+    def bulk_load_csv(self, file_path, table_name, sep=None):
+        """
+        Streams a CSV file into one of the tables above (e.g. a backfill of bike.availability)
+        with the bulk loader and prints the achieved rows per second.
+        """
+        stats = self.loader.load_csv(file_path, table_name, sep=sep)
+        print(f"Loaded {stats['rows']:,} rows into {table_name} in {stats['seconds']:.1f} s ({stats['rows_per_second']:,.0f} rows/s)")
+        return stats
+
+    def load_synthetic_data(self, generator, start, end, include_stations=True):
+        """
+        Loads synthetic stations, availability and weather for [start, end) from a
+        SyntheticDataGenerator, one chunk at a time so any period fits in memory.
+        """
+        if include_stations:
+            self.loader.load_frames([generator.stations()], "bike.station")
+        self.loader.load_frames(generator.availability_chunks(start, end), "bike.availability")
+        self.loader.load_frames(generator.weather_chunks(start, end), "weather.current_data")
 
     def run(self):
         """
@@ -1,16 +1,39 @@
-from bike_scraper import BikeScraper
-from weather_scraper import WeatherScraper
-from db_setup import DBSetUp
+import argparse
+from profiler import profile, PROFILE_MODES
+
+SCRAPERS = ("bike", "weather")
 
 if __name__ == "__main__":
-    # Initialize the database setup (commenting out the execution to avoid re-running setup every time)
-    db_set_up = DBSetUp()
-    db_set_up.run() # This will create necessary tables and perform initial setup if needed.
+    parser = argparse.ArgumentParser(description="Set up the databases and run the bike and weather scrapers once.")
+    parser.add_argument("--profile", choices=PROFILE_MODES, help="Profile each step and save the artifacts in PROFILE_DIR (default: profiles/).")
+    parser.add_argument("--skip-setup", action="store_true", help="Skip DBSetUp (tables and demo data already exist), e.g. for cron-driven scrapes.")
+    parser.add_argument("--only", choices=SCRAPERS, help="Run only this scraper.")
+    parser.add_argument("--migrate", action="store_true", help="Upgrade existing tables to the current schema (keeps their data) instead of recreating them.")
+    args = parser.parse_args()
+
+    # Each step imports its module when it runs, so skipped steps cost no import time
+    # (DBSetUp pulls in the bulk loader, the scrapers pandas and requests)
+    if args.migrate:
+        with profile(args.profile, "db_migrate"):
+            from db_setup import DBSetUp
+            DBSetUp().migrate_contract_columns()
+    elif not args.skip_setup:
+        # Initialize the database setup
+        with profile(args.profile, "db_setup"):
+            from db_setup import DBSetUp
+            db_set_up = DBSetUp()
+            db_set_up.run() # This will create necessary tables and perform initial setup if needed.
 
     # Initialize and run the bike scraper to fetch and store bike station availability data
-    bs = BikeScraper()
-    bs.run()
+    if args.only in (None, "bike"):
+        with profile(args.profile, "bike_scraper"):
+            from bike_scraper import BikeScraper
+            bs = BikeScraper()
+            bs.run()
 
     # Initialize and run the weather scraper to fetch and store weather data for bike stations
-    ws = WeatherScraper()
-    ws.run()
+    if args.only in (None, "weather"):
+        with profile(args.profile, "weather_scraper"):
+            from weather_scraper import WeatherScraper
+            ws = WeatherScraper()
+            ws.run()
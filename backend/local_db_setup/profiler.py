@@ -0,0 +1,75 @@
+import cProfile
+import importlib.util
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# The stack sampler is shared with the server's request profiles. It lives in backend/, which is
+# not importable when the scraper runs from its own folder, so it is loaded from its file
+SAMPLING_PROFILER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sampling_profiler.py")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MODES = ("cprofile", "sample", "tracemalloc")
+
+
+def sampling_profiler():
+    """Returns the shared sampling_profiler module, loaded from SAMPLING_PROFILER_PATH on first use."""
+    module = sys.modules.get("sampling_profiler")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("sampling_profiler", SAMPLING_PROFILER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules["sampling_profiler"] = module
+    return module
+
+
+@contextmanager
+def profile(mode, name):
+    """
+    Profiles the enclosed block and stores the artifact in PROFILE_DIR.
+
+    Args:
+        mode (str): None (no profiling), "cprofile" (.prof for pstats/snakeviz), "sample"
+            (.folded stack samples) or "tracemalloc" (.txt of the allocation sites that grew the most).
+        name (str): Label used in the artifact file name, e.g. "bike_scraper".
+    """
+    if mode is None:
+        yield
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}")
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f"{path}.prof")
+            print(f"Profile saved to {path}.prof")
+    elif mode == "sample":
+        profiler = sampling_profiler().SamplingProfiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            profiler.write(f"{path}.folded")
+            print(f"Stack samples saved to {path}.folded")
+    elif mode == "tracemalloc":
+        tracemalloc.start(16)
+        before = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            stats = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            tracemalloc.stop()
+            with open(f"{path}.txt", "w") as file:
+                for stat in stats:
+                    file.write(f"{stat}\n")
+            print(f"Allocation report saved to {path}.txt")
+    else:
+        raise ValueError(f"Unknown profile mode '{mode}'. Use one of: {', '.join(PROFILE_MODES)}.")
@@ -0,0 +1,223 @@
+import argparse
+import datetime
+import math
+import os
+import numpy as np
+import pandas as pd
+
+# Centre and extent of the generated stations (Dublin)
+CENTRE_LAT, CENTRE_LNG = 53.3498, -6.2603
+SPREAD_LAT, SPREAD_LNG = 0.04, 0.07
+
+AVAILABILITY_INTERVAL = datetime.timedelta(minutes=5)  # Scraper interval
+WEATHER_INTERVAL = datetime.timedelta(hours=1)
+DEFAULT_END = datetime.datetime(2025, 2, 24)  # Includes the day queried by /stations/history/demo/<id>
+MAX_DAYS = 3 * 365  # Longest history generated for a row count; larger counts add stations instead
+
+
+class SyntheticDataGenerator:
+    """
+    Generates realistic bike.availability and weather.current_data rows for any number
+    of stations and any period, in chunks small enough to stream into the database.
+
+    Availability follows a daily and weekly pattern per station: "residential" stations
+    empty during the weekday morning commute and refill in the evening, "commercial" ones
+    do the opposite, and weekends have a flatter midday leisure peak. Temperature follows
+    a yearly and daily cycle with day-to-day weather noise, and cold or wet hours damp
+    the commuting swings. The same seed always produces the same data.
+    """
+
+    def __init__(self, station_count=115, contract="dublin", seed=0):
+        self.station_count = station_count
+        self.contract = contract
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+
+        self.ids = np.arange(1, station_count + 1)
+        self.lat = np.round(CENTRE_LAT + rng.uniform(-SPREAD_LAT, SPREAD_LAT, station_count), 6)
+        self.lng = np.round(CENTRE_LNG + rng.uniform(-SPREAD_LNG, SPREAD_LNG, station_count), 6)
+        self.capacity = rng.integers(15, 41, station_count)
+        self.base_fill = rng.uniform(0.3, 0.7, station_count)
+        self.amplitude = rng.uniform(0.15, 0.4, station_count)
+        # +1 for residential stations (empty in the morning), -1 for commercial ones (fill up)
+        self.kind = np.where(rng.random(station_count) < 0.6, 1.0, -1.0)
+
+    def stations(self):
+        """Returns the bike.station rows."""
+        return pd.DataFrame({
+            "contract": self.contract,
+            "id": self.ids,
+            "name": [f"SYNTHETIC STATION {i}" for i in self.ids],
+            "address": [f"Synthetic Street {i}" for i in self.ids],
+            "position_lat": self.lat,
+            "position_lng": self.lng,
+        })
+
+    @staticmethod
+    def rows_per_day(station_count, interval):
+        return station_count * int(datetime.timedelta(days=1) / interval)
+
+    @classmethod
+    def days_for_rows(cls, rows, station_count):
+        """Returns the number of days of availability that make up about `rows` rows."""
+        return max(1, math.ceil(rows / cls.rows_per_day(station_count, AVAILABILITY_INTERVAL)))
+
+    @classmethod
+    def stations_for_rows(cls, rows, station_count, max_days=MAX_DAYS):
+        """
+        Returns the number of stations needed for `rows` availability rows to span at most
+        `max_days` days: `station_count`, or more for large counts, so that e.g. 1e9 rows
+        cover a few years of a large network rather than decades of a small one.
+        """
+        per_station = cls.rows_per_day(1, AVAILABILITY_INTERVAL) * max_days
+        return max(station_count, math.ceil(rows / per_station))
+
+    def temperature(self, times):
+        """Hourly temperature in Celsius (yearly and daily cycle plus slow weather noise)."""
+        day_of_year = times.dayofyear.values
+        hour = times.hour.values + times.minute.values / 60
+        yearly = 10 - 5 * np.cos((day_of_year - 20) / 365.25 * 2 * np.pi)
+        daily = 3 * np.cos((hour - 15) / 24 * 2 * np.pi)
+        # Day-to-day noise keyed by the date, so chunk boundaries do not change the data
+        days = times.normalize().asi8 // 86_400_000_000_000
+        noise = np.sin(days * 0.7 + self.seed) * 2 + np.cos(days * 0.23 + self.seed) * 1.5
+        return np.round(yearly + daily + noise, 2)
+
+    def rain(self, times):
+        """Rain volume in mm/h, dry most hours."""
+        hours = times.asi8 // 3_600_000_000_000
+        wet = (np.sin(hours * 0.37) + np.sin(hours * 0.051)) > 1.2
+        return np.where(wet, np.round(np.abs(np.sin(hours * 1.3)) * 2, 2), 0.0)
+
+    def availability_chunks(self, start, end, chunk_days=7):
+        """
+        Yields bike.availability DataFrames covering [start, end) in 5-minute steps,
+        `chunk_days` days at a time, time-major like the scraper inserts them.
+        """
+        for chunk_start, chunk_end in self._chunks(start, end, chunk_days):
+            times = pd.date_range(chunk_start, chunk_end, freq=AVAILABILITY_INTERVAL, inclusive="left")
+            if len(times) == 0:
+                continue
+            # Seconds since 0001-01-01: a non-negative seed for any date, unlike a Unix timestamp
+            rng = np.random.default_rng([self.seed, int((chunk_start - datetime.datetime.min).total_seconds())])
+            hour = (times.hour.values + times.minute.values / 60)[:, np.newaxis]
+            weekend = (times.dayofweek.values >= 5)[:, np.newaxis]
+
+            # Commute: leave residential stations around 8h, return around 18h
+            commute = np.exp(-((hour - 8.5) / 1.5) ** 2) * -1 + np.exp(-((hour - 18) / 2) ** 2) * 0.6 + 0.2
+            leisure = -0.5 * np.exp(-((hour - 14) / 3) ** 2)
+            pattern = np.where(weekend, leisure, commute * self.kind)
+            # Cold and rainy hours see fewer trips
+            temperature = self.temperature(times)[:, np.newaxis]
+            activity = np.clip(0.6 + temperature / 25, 0.4, 1.2) * np.where(self.rain(times)[:, np.newaxis] > 0, 0.6, 1.0)
+
+            fill = self.base_fill + self.amplitude * pattern * activity + rng.normal(0, 0.04, (len(times), self.station_count))
+            bikes = np.clip(np.round(fill * self.capacity), 0, self.capacity).astype(np.int32)
+            stands = self.capacity - bikes
+
+            record_time = np.repeat(times.values, self.station_count)
+            lag = rng.integers(0, 300, len(record_time)).astype("timedelta64[s]")
+            yield pd.DataFrame({
+                "contract": self.contract,
+                "station_id": np.tile(self.ids, len(times)),
+                "status": "OPEN",
+                "available_bikes": bikes.ravel(),
+                "available_bike_stands": stands.ravel(),
+                "last_update": (record_time - lag).astype("datetime64[s]"),
+                "record_time": record_time.astype("datetime64[s]"),
+            })
+
+    def weather_chunks(self, start, end, chunk_days=30):
+        """Yields hourly weather.current_data DataFrames per station covering [start, end)."""
+        for chunk_start, chunk_end in self._chunks(start, end, chunk_days):
+            times = pd.date_range(chunk_start, chunk_end, freq=WEATHER_INTERVAL, inclusive="left")
+            if len(times) == 0:
+                continue
+            temp = self.temperature(times)
+            rain = self.rain(times)
+            hours = times.asi8 // 3_600_000_000_000
+            wind = np.round(4 + 3 * np.abs(np.sin(hours * 0.11)), 2)
+            day_of_year = times.dayofyear.values
+            # Sunrise from about 8:40 in December to 5:00 in June, sunset mirrored around 13:30
+            daylight = 12 + 4.5 * -np.cos((day_of_year + 10) / 365.25 * 2 * np.pi)
+            sunrise = times.normalize() + pd.to_timedelta((13.5 - daylight / 2) * 3600, unit="s").round("s")
+            sunset = times.normalize() + pd.to_timedelta((13.5 + daylight / 2) * 3600, unit="s").round("s")
+
+            frame = pd.DataFrame({
+                "record_time": times,
+                "record_date": times.date,
+                "record_hour": times.hour,
+                "sunrise": sunrise,
+                "sunset": sunset,
+                "temp": temp,
+                "feels_like": np.round(temp - wind / 3, 2),
+                "pressure": (1013 + 10 * np.sin(hours * 0.02)).astype(int),
+                "humidity": np.where(rain > 0, 95, 75),
+                "uvi": np.round(np.clip(np.sin((times.hour.values - 6) / 12 * np.pi), 0, None) * daylight / 6, 2),
+                "weather_id": np.where(rain > 0, 500, 803),
+                "wind_speed": wind,
+                "wind_gust": np.round(wind * 1.6, 2),
+                "rain_1h": rain,
+                "snow_1h": 0.0,
+            })
+            stations = pd.DataFrame({"station_id": self.ids, "position_lat": self.lat, "position_lng": self.lng})
+            yield stations.merge(frame, how="cross")
+
+    @staticmethod
+    def _chunks(start, end, chunk_days):
+        step = datetime.timedelta(days=chunk_days)
+        chunk_start = start
+        while chunk_start < end:
+            yield chunk_start, min(chunk_start + step, end)
+            chunk_start += step
+
+    def write_csv(self, directory, start, end):
+        """
+        Writes station.csv, availability.csv and current_data.csv to `directory`,
+        appending chunk by chunk so memory stays bounded for any period.
+
+        Returns:
+            dict: Rows written per file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        counts = {"station.csv": len(self.ids)}
+        self.stations().to_csv(os.path.join(directory, "station.csv"), index=False)
+        for name, chunks in (("availability.csv", self.availability_chunks(start, end)),
+                             ("current_data.csv", self.weather_chunks(start, end))):
+            path = os.path.join(directory, name)
+            counts[name] = 0
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+                counts[name] += len(chunk)
+        return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic bike availability and weather history.")
+    parser.add_argument("--stations", type=int, default=115)
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--days", type=int, help="Days of history ending on --end.")
+    size.add_argument("--rows", type=float, help="Approximate availability rows (e.g. 1e6); sets the number of days, "
+                                                  "and adds stations beyond --max-days days.")
+    parser.add_argument("--max-days", type=int, default=MAX_DAYS, help="Longest history generated for --rows.")
+    parser.add_argument("--end", default=DEFAULT_END.date().isoformat(), help="Exclusive end date (YYYY-MM-DD).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", metavar="DIR", help="Write CSV files to DIR instead of loading the database.")
+    args = parser.parse_args()
+
+    stations = args.stations
+    if args.days:
+        days = args.days
+    else:
+        stations = SyntheticDataGenerator.stations_for_rows(args.rows or 1e6, args.stations, args.max_days)
+        days = SyntheticDataGenerator.days_for_rows(args.rows or 1e6, stations)
+    end = datetime.datetime.fromisoformat(args.end)
+    start = end - datetime.timedelta(days=days)
+    generator = SyntheticDataGenerator(stations, seed=args.seed)
+    print(f"Generating {days} days for {stations} stations ({start:%Y-%m-%d} to {end:%Y-%m-%d})...")
+
+    if args.csv:
+        print(generator.write_csv(args.csv, start, end))
+    else:
+        from db_setup import DBSetUp
+        DBSetUp().load_synthetic_data(generator, start, end)
@@ -16,8 +16,11 @@ class WeatherScraper:
     def __init__(self):
         """Initializes the WeatherScraper with API configuration and database helper."""
         # Load weather API configuration
-        weather_config = Config().get_weather_config()
+        config = Config()
+        weather_config = config.get_weather_config()
         self.weather_api_key = weather_config.weather_api_key
+        # Weather is only scraped for the stations of the default (first) contract
+        self.contract = config.get_bike_config().bike_names[0]
         self.dh = DBHelper()
         self.now = datetime.datetime.now()
 
@@ -110,7 +113,8 @@ class WeatherScraper:
 
     def get_station_location(self):
         """
-        Retrieves the list of station IDs along with their latitude and longitude from the bike.station table.
+        Retrieves the list of station IDs along with their latitude and longitude from the bike.station table,
+        for the default contract only.
         """
         sql = """
             SELECT
@@ -118,8 +122,9 @@ class WeatherScraper:
                 , s.position_lat
                 , s.position_lng
             FROM bike.station AS s
+            WHERE s.contract = :contract
         """
-        self.station_df = self.dh.query_data(sql)
+        self.station_df = self.dh.query_data(sql, params={"contract": self.contract})
 
     def fetch_station_weather(self):
         """
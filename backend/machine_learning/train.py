@@ -0,0 +1,325 @@
+"""
+Training pipeline: fits the bike and stand models and writes a versioned serving bundle.
+
+Steps:
+    1. Load the training set (the Parquet export of `machine_learning.training_data`,
+       or a CSV with the same columns such as the notebooks' final_merged_data.csv).
+    2. Split it chronologically into train, validation and test rows, and build the
+       feature matrices with `services.features`, the module the server predicts with.
+       Station encodings are fitted on the rows a model is trained on only. Matrices
+       are cached on disk by data fingerprint, so reruns skip this step.
+    3. Search the candidate grid in parallel across cores (one single-threaded fit per
+       core), scoring every candidate on the validation rows, with its fit wall time
+       and inference latency under the server's MODEL_ENGINE.
+    4. Refit the best candidate per target on train + validation rows, evaluate it on
+       the test rows, and write `artifacts/<version>/` with the models, encodings,
+       schema.json and metrics.json. The server picks the new version up on its next
+       registry refresh.
+
+Every model is seeded, so the same data and arguments produce the same bundle.
+
+Usage (from the `backend` folder):
+    python -m machine_learning.train
+    python -m machine_learning.train --data final_merged_data.csv --models linear ridge hist_gradient_boosting
+    python -m machine_learning.train --jobs 4 --dry-run
+"""
+import argparse
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import platform
+import shutil
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from services.features import FEATURE_COLUMNS, FEATURE_VERSION, TARGET_COLUMNS, fit_encoding, training_features
+from services.model_registry import BUNDLE_FILES
+from services.prediction import MODEL_ENGINE
+from services.station_encoding import StationEncoding
+from services.tree_engine import compile_model
+from machine_learning.training_data import TRAINING_DATA_DIR, load_training_data
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACTS_DIR = os.path.join(ML_DIR, "artifacts")
+CACHE_DIR = os.path.join(ML_DIR, ".feature_cache")
+REQUIRED_COLUMNS = ["station_id", "last_reported", "max_air_temperature_celsius", *TARGET_COLUMNS.values()]
+SEED = 42
+LATENCY_BATCH = 10  # Rows per prediction call in a journey request (nearby stations)
+THROUGHPUT_BATCH = 10000
+
+
+def grid(**values):
+    """Expands lists of values into a list of parameter dicts."""
+    return [dict(zip(values, combination)) for combination in itertools.product(*values.values())]
+
+
+# === Candidate Models (family -> estimator class, parameter grid) ===
+CANDIDATES = {
+    "linear": (LinearRegression, [{}]),
+    "ridge": (Ridge, grid(alpha=[0.1, 1.0, 10.0])),
+    "random_forest": (RandomForestRegressor, grid(n_estimators=[50, 100], max_depth=[12, 20], min_samples_leaf=[5],
+                                                  random_state=[SEED], n_jobs=[1])),
+    "hist_gradient_boosting": (HistGradientBoostingRegressor, grid(max_iter=[200], learning_rate=[0.05, 0.1],
+                                                                   max_leaf_nodes=[31, 63], random_state=[SEED])),
+}
+
+
+def fingerprint(path):
+    """Identifies the training data by the names, sizes and modification times of its files."""
+    paths = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names if name.endswith(".parquet")
+    )
+    digest = hashlib.sha256()
+    for p in paths:
+        stat = os.stat(p)
+        digest.update(f"{os.path.relpath(p, path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def load_data(path):
+    """Returns the training rows with the required columns, oldest first."""
+    if os.path.isdir(path):
+        data = load_training_data(path, columns=REQUIRED_COLUMNS)
+    else:
+        data = pd.read_csv(path, usecols=REQUIRED_COLUMNS)
+    data = data.dropna(subset=REQUIRED_COLUMNS)
+    data["last_reported"] = pd.to_datetime(data["last_reported"])
+    return data.sort_values("last_reported", kind="stable").reset_index(drop=True)
+
+
+def prepare_features(path, data_fingerprint, val_fraction, test_fraction, feature_version):
+    """
+    Splits the data chronologically and builds the feature matrices of both targets.
+
+    Cached by its arguments (the fingerprint stands for the data, the feature version for
+    services/features.py), so unchanged data is never re-featurized.
+
+    Returns:
+        dict: Per target, "search" (train/validation matrices, encoding fitted on train rows)
+              and "final" (train+validation/test matrices, encoding fitted on train+validation rows),
+              plus a "summary" of the data.
+    """
+    data = load_data(path)
+    n = len(data)
+    train_end = int(n * (1 - val_fraction - test_fraction))
+    test_start = int(n * (1 - test_fraction))
+    train, val, fit, test = data[:train_end], data[train_end:test_start], data[:test_start], data[test_start:]
+    if min(len(train), len(val), len(test)) == 0:
+        raise ValueError(f"Not enough rows ({n}) for the requested split.")
+
+    prepared = {"summary": {
+        "rows": n,
+        "stations": int(data["station_id"].nunique()),
+        "from": data["last_reported"].iloc[0].strftime("%Y-%m-%d %H:%M:%S"),
+        "to": data["last_reported"].iloc[-1].strftime("%Y-%m-%d %H:%M:%S"),
+        "split": {"train": len(train), "validation": len(val), "test": len(test)},
+    }}
+    for target in FEATURE_COLUMNS:
+        search_encoding = fit_encoding(train, target)
+        final_encoding = fit_encoding(fit, target)
+        prepared[target] = {}
+        for stage, (first, second, encoding) in {
+            "search": (train, val, search_encoding),
+            "final": (fit, test, final_encoding),
+        }.items():
+            station_encoding = StationEncoding.from_series(encoding)
+            X_first, y_first = training_features(first, target, station_encoding)
+            X_second, y_second = training_features(second, target, station_encoding)
+            prepared[target][stage] = {
+                "X": X_first.to_numpy(), "y": y_first, "X_eval": X_second.to_numpy(), "y_eval": y_second,
+                "encoding": encoding,
+            }
+    return prepared
+
+
+def score(y_true, y_pred):
+    return {
+        "mae": round(float(mean_absolute_error(y_true, y_pred)), 4),
+        "rmse": round(float(np.sqrt(mean_squared_error(y_true, y_pred))), 4),
+        "r2": round(float(r2_score(y_true, y_pred)), 4),
+    }
+
+
+def measure_latency(model, X, repeat=200, engine=MODEL_ENGINE):
+    """
+    Times predictions with the engine the server is configured to use (MODEL_ENGINE):
+    "compiled" times compiled trees where they are exact, "sklearn" times `model.predict`.
+
+    Returns:
+        dict: The engine that made the predictions, the median microseconds per
+        LATENCY_BATCH-row call and rows per second for large batches.
+    """
+    served = compile_model(model) if engine == "compiled" else model
+    engine = "sklearn" if served is model else "compiled"
+    model = served
+    small, large = X.iloc[:LATENCY_BATCH], X.iloc[:THROUGHPUT_BATCH]
+    model.predict(small)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(small)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.predict(large)
+    large_seconds = time.perf_counter() - start
+    return {
+        "engine": engine,
+        "batch_rows": LATENCY_BATCH,
+        "batch_latency_us": round(float(np.median(timings)) * 1e6, 1),
+        "rows_per_second": round(len(large) / large_seconds),
+    }
+
+
+def evaluate_candidate(family, params, target, X, y, X_eval, y_eval):
+    """Fits one candidate on the search rows (in a worker process) and scores it on the validation rows."""
+    columns = FEATURE_COLUMNS[target]
+    X, X_eval = pd.DataFrame(X, columns=columns), pd.DataFrame(X_eval, columns=columns)
+    estimator_class, _ = CANDIDATES[family]
+    start = time.perf_counter()
+    model = estimator_class(**params).fit(X, y)
+    fit_seconds = time.perf_counter() - start
+    return {
+        "family": family,
+        "params": params,
+        "fit_seconds": round(fit_seconds, 3),
+        "validation": score(y_eval, model.predict(X_eval)),
+        "latency": measure_latency(model, X_eval),
+    }
+
+
+def search(prepared, target, families, jobs):
+    """Evaluates every candidate of `families` in parallel. Returns the results, best first."""
+    stage = prepared[target]["search"]
+    tasks = [(family, params) for family in families for params in CANDIDATES[family][1]]
+    # Arrays are memory-mapped into the workers instead of copied per task
+    results = joblib.Parallel(n_jobs=jobs)(
+        joblib.delayed(evaluate_candidate)(family, params, target, stage["X"], stage["y"], stage["X_eval"], stage["y_eval"])
+        for family, params in tasks
+    )
+    return sorted(results, key=lambda result: result["validation"]["mae"])
+
+
+def fit_final(prepared, target, best):
+    """Refits the best candidate on train + validation rows and evaluates it on the test rows."""
+    stage = prepared[target]["final"]
+    columns = FEATURE_COLUMNS[target]
+    X, X_test = pd.DataFrame(stage["X"], columns=columns), pd.DataFrame(stage["X_eval"], columns=columns)
+    estimator_class, _ = CANDIDATES[best["family"]]
+    start = time.perf_counter()
+    model = estimator_class(**best["params"]).fit(X, stage["y"])
+    fit_seconds = time.perf_counter() - start
+    return model, {
+        "family": best["family"],
+        "params": best["params"],
+        "fit_seconds": round(fit_seconds, 3),
+        "test": score(stage["y_eval"], model.predict(X_test)),
+        "latency": measure_latency(model, X_test),
+    }
+
+
+def write_bundle(artifacts_dir, version, models, encodings, schema, metrics):
+    """
+    Writes the bundle under a temporary name next to `artifacts_dir` and renames it into
+    place, so the model registry never sees a partially written version.
+    """
+    os.makedirs(artifacts_dir, exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(artifacts_dir), f".bundle-{version}-{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for target in FEATURE_COLUMNS:
+        with open(os.path.join(tmp_path, BUNDLE_FILES[f"{target}_model"]), "wb") as f:
+            pickle.dump(models[target], f)
+        with open(os.path.join(tmp_path, BUNDLE_FILES[f"{target}_encoding"]), "wb") as f:
+            pickle.dump(encodings[target], f)
+    for name, content in (("schema.json", schema), ("metrics.json", metrics)):
+        with open(os.path.join(tmp_path, name), "w") as f:
+            json.dump(content, f, indent=2)
+    path = os.path.join(artifacts_dir, version)
+    os.rename(tmp_path, path)
+    return path
+
+
+def unique_version(artifacts_dir, version):
+    """Returns `version`, or `version` with the first free "-2", "-3", ... suffix if a bundle already has that name."""
+    name, suffix = version, 1
+    while os.path.exists(os.path.join(artifacts_dir, name)):
+        suffix += 1
+        name = f"{version}-{suffix}"
+    return name
+
+
+def print_results(target, results):
+    print(f"\n{target}: {len(results)} candidates (best first)")
+    print(f"  {'family':<24}{'fit s':>8}{'val MAE':>9}{'val R2':>8}{'us/' + str(LATENCY_BATCH) + ' rows':>13}{'rows/s':>12}  params")
+    for r in results:
+        params = {k: v for k, v in r["params"].items() if k not in ("random_state", "n_jobs")}
+        print(f"  {r['family']:<24}{r['fit_seconds']:>8.2f}{r['validation']['mae']:>9.3f}{r['validation']['r2']:>8.3f}"
+              f"{r['latency']['batch_latency_us']:>13.1f}{r['latency']['rows_per_second']:>12,}  {params}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=TRAINING_DATA_DIR, help="Parquet export folder or CSV file")
+    parser.add_argument("--models", nargs="+", choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel candidate fits (-1: one per core)")
+    parser.add_argument("--val-fraction", type=float, default=0.15)
+    parser.add_argument("--test-fraction", type=float, default=0.15)
+    parser.add_argument("--artifacts", default=ARTIFACTS_DIR, help="Folder of the versioned bundles")
+    parser.add_argument("--version", help="Bundle version name (default: current time, YYYY-MM-DD_HHMMSS)")
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild the feature matrices")
+    parser.add_argument("--dry-run", action="store_true", help="Train and report without writing a bundle")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    memory = joblib.Memory(None if args.no_cache else CACHE_DIR, verbose=0)
+    data_fingerprint = fingerprint(args.data)
+    prepare_start = time.perf_counter()
+    prepared = memory.cache(prepare_features)(args.data, data_fingerprint, args.val_fraction, args.test_fraction, FEATURE_VERSION)
+    summary = prepared["summary"]
+    print(f"Data: {summary['rows']:,} rows, {summary['stations']} stations, {summary['from']} to {summary['to']} "
+          f"(features ready in {time.perf_counter() - prepare_start:.1f} s)")
+
+    models, encodings, metrics = {}, {}, {"candidates": {}, "selected": {}}
+    for target in FEATURE_COLUMNS:
+        search_start = time.perf_counter()
+        results = search(prepared, target, args.models, args.jobs)
+        print_results(target, results)
+        print(f"  search wall time {time.perf_counter() - search_start:.1f} s")
+
+        models[target], selected = fit_final(prepared, target, results[0])
+        encodings[target] = prepared[target]["final"]["encoding"]
+        metrics["candidates"][target] = results
+        metrics["selected"][target] = selected
+        print(f"  selected {selected['family']}: test MAE {selected['test']['mae']:.3f}, R2 {selected['test']['r2']:.3f}, "
+              f"{selected['latency']['batch_latency_us']:.1f} us per {LATENCY_BATCH} rows ({selected['latency']['engine']})")
+
+    metrics["wall_seconds"] = round(time.perf_counter() - started, 1)
+    version = unique_version(args.artifacts, args.version or datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S"))
+    schema = {
+        "version": version,
+        "feature_version": FEATURE_VERSION,
+        "features": FEATURE_COLUMNS,
+        "targets": TARGET_COLUMNS,
+        "data": {"path": os.path.abspath(args.data), "fingerprint": data_fingerprint, **summary},
+        "seed": SEED,
+        "libraries": {"python": platform.python_version(), "scikit-learn": sklearn.__version__,
+                      "pandas": pd.__version__, "numpy": np.__version__},
+        "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    print(f"\nTraining wall time {metrics['wall_seconds']:.1f} s")
+    if args.dry_run:
+        return
+    path = write_bundle(args.artifacts, version, models, encodings, schema, metrics)
+    print(f"Bundle written to {path}")
+
+
+if __name__ == "__main__":
+    main()
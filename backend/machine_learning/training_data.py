@@ -0,0 +1,237 @@
+"""
+Incremental export of the scraped tables into a Parquet training set.
+
+Every run reads the `bike.availability` rows recorded since the last run (the
+watermark), joins each one with the `weather.current_data` row of its station and
+hour, and appends the result to date-partitioned Parquet files:
+
+    <output>/date=2025-02-23/part-<watermark>.parquet
+
+Columns are named like the training data of the notebooks (`last_reported`,
+`num_bikes_available`, `num_docks_available`, `max_air_temperature_celsius`, `hour`,
+...), typed compactly and zstd-compressed, so assembling a training set is a
+Parquet read instead of a full-table dump.
+
+Rows are exported up to a closed boundary: the end of the last hour that has
+weather, and at most --settle-minutes before the newest availability row, so rows
+still being committed by a running scrape wait for the following export. The
+watermark is that boundary, and the next run continues from it. Stations without
+their own weather row in an hour get the mean temperature of all stations in that
+hour.
+
+Availability is streamed from the server (an unbuffered cursor on MySQL) and
+joined `--chunk-rows` rows at a time with the weather of the chunk's hours only, so
+memory stays bounded however much is exported.
+
+Usage (from the `backend` folder, with the database settings of .env):
+    python -m machine_learning.training_data
+    python -m machine_learning.training_data --output machine_learning/training_data --chunk-rows 500000 --settle-minutes 10
+"""
+import argparse
+import datetime
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+TRAINING_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "training_data")
+WATERMARK_FILE = "_watermark.json"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+EPOCH = datetime.datetime(1970, 1, 1)
+SETTLE_MINUTES = 5  # Newest availability left for the next export (one scraper interval)
+
+# Column types of the exported files
+SCHEMA = pa.schema([
+    ("contract", pa.dictionary(pa.int8(), pa.string())),
+    ("station_id", pa.int32()),
+    ("status", pa.dictionary(pa.int8(), pa.string())),
+    ("last_reported", pa.timestamp("s")),
+    ("record_time", pa.timestamp("s")),
+    ("num_bikes_available", pa.int16()),
+    ("num_docks_available", pa.int16()),
+    ("max_air_temperature_celsius", pa.float32()),
+    ("hour", pa.int8()),
+    ("day_of_week", pa.int8()),
+])
+
+
+def read_watermark(directory):
+    """
+    Returns the record_time the next export starts at (inclusive), or EPOCH before the
+    first export.
+    """
+    path = os.path.join(directory, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return EPOCH
+    with open(path) as file:
+        watermark = json.load(file)
+    if "until" in watermark:
+        return datetime.datetime.strptime(watermark["until"], TIME_FORMAT)
+    # Older files hold the last exported record_time; record times have whole seconds
+    return datetime.datetime.strptime(watermark["record_time"], TIME_FORMAT) + datetime.timedelta(seconds=1)
+
+
+def write_watermark(directory, watermark, rows):
+    # Written to a temporary file and renamed, so a crash never leaves a half-written watermark
+    path = os.path.join(directory, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as file:
+        json.dump({"until": watermark.strftime(TIME_FORMAT), "rows": rows, "exported_at": datetime.datetime.now().strftime(TIME_FORMAT)}, file)
+    os.replace(path + ".tmp", path)
+
+
+def read_weather(conn, start, end):
+    """
+    Returns the weather.current_data rows needed to join availability recorded in [start, end]:
+    those of the hours from start's to end's, with an hour of slack for late weather scrapes.
+    """
+    return pd.read_sql(text("""
+        SELECT station_id, record_date, record_hour, temp
+        FROM weather.current_data
+        WHERE record_time >= :since AND record_time < :until
+    """), conn, params={"since": pd.Timestamp(start).floor("h").strftime(TIME_FORMAT),
+                        "until": (pd.Timestamp(end).floor("h") + pd.Timedelta(hours=2)).strftime(TIME_FORMAT)})
+
+
+def join_weather(availability, weather):
+    """
+    Adds the training columns to a chunk of availability rows.
+
+    Parameters:
+        availability (DataFrame): bike.availability rows.
+        weather (DataFrame): weather.current_data rows (station_id, record_date, record_hour, temp)
+                             covering the chunk's hours.
+
+    Returns:
+        DataFrame: Rows with the SCHEMA columns.
+    """
+    record_time = pd.to_datetime(availability["record_time"])
+    frame = pd.DataFrame({
+        "contract": availability["contract"].astype(str),
+        "station_id": availability["station_id"].astype("int32"),
+        "status": availability["status"].astype(str),
+        "last_reported": pd.to_datetime(availability["last_update"]),
+        "record_time": record_time,
+        "num_bikes_available": availability["available_bikes"].astype("int16"),
+        "num_docks_available": availability["available_bike_stands"].astype("int16"),
+        "record_hour_start": record_time.dt.floor("h"),
+    })
+
+    weather = weather.assign(
+        record_hour_start=pd.to_datetime(weather["record_date"].astype(str)) + pd.to_timedelta(weather["record_hour"].astype(int), unit="h")
+    )
+    per_station = weather.groupby(["station_id", "record_hour_start"], as_index=False)["temp"].mean()
+    citywide = weather.groupby("record_hour_start")["temp"].mean().rename("citywide_temp")
+
+    frame = frame.merge(per_station, on=["station_id", "record_hour_start"], how="left")
+    frame = frame.merge(citywide, left_on="record_hour_start", right_index=True, how="left")
+    frame["max_air_temperature_celsius"] = frame["temp"].fillna(frame["citywide_temp"]).astype("float32")
+    frame["hour"] = frame["record_time"].dt.hour.astype("int8")
+    frame["day_of_week"] = frame["record_time"].dt.dayofweek.astype("int8")
+    return frame[SCHEMA.names]
+
+
+def export(engine, directory=TRAINING_DATA_DIR, chunk_rows=200000, settle_minutes=SETTLE_MINUTES):
+    """
+    Appends the availability rows recorded since the watermark to the Parquet files.
+
+    Parameters:
+        engine (Engine): Connection to the database holding the bike and weather schemas.
+        directory (str): Output folder (partitions and watermark file).
+        chunk_rows (int): Availability rows read and joined at a time.
+        settle_minutes (float): Availability this close to the newest row waits for the next export.
+
+    Returns:
+        dict: Exported rows, new watermark and the files written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    watermark = read_watermark(directory)
+    params = {"watermark": watermark.strftime(TIME_FORMAT)}
+    with engine.connect() as conn:
+        latest_weather = conn.execute(text(
+            "SELECT MAX(record_time) FROM weather.current_data WHERE record_time >= :watermark"
+        ), params).scalar()
+        latest_availability = conn.execute(text(
+            "SELECT MAX(record_time) FROM bike.availability WHERE record_time >= :watermark"
+        ), params).scalar()
+    if latest_weather is None or latest_availability is None:
+        print("No weather or availability recorded since the watermark; nothing to export.")
+        return {"rows": 0, "watermark": watermark.strftime(TIME_FORMAT), "files": []}
+    # Closed boundary: the end of the last hour with weather, and only rows that have settled
+    upper = min(pd.Timestamp(latest_weather).floor("h") + pd.Timedelta(hours=1),
+                pd.Timestamp(latest_availability) - pd.Timedelta(minutes=settle_minutes)).to_pydatetime()
+    if upper <= watermark:
+        print("No settled availability since the watermark; nothing to export.")
+        return {"rows": 0, "watermark": watermark.strftime(TIME_FORMAT), "files": []}
+
+    # The availability rows are streamed, so weather is read on a second connection
+    with engine.connect() as conn, engine.connect() as weather_conn:
+        chunks = pd.read_sql(text("""
+            SELECT contract, station_id, status, available_bikes, available_bike_stands, last_update, record_time
+            FROM bike.availability
+            WHERE record_time >= :watermark AND record_time < :upper
+            ORDER BY record_time
+        """), conn.execution_options(stream_results=True), params=dict(params, upper=upper.strftime(TIME_FORMAT)),
+            chunksize=chunk_rows)
+
+        # One file per date partition and run, named after the starting watermark so that
+        # a rerun after a crash (before the watermark moved) overwrites its own files
+        part_name = f"part-{watermark.strftime('%Y%m%d%H%M%S')}.parquet"
+        writers, files, rows = {}, [], 0
+        try:
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+                record_times = pd.to_datetime(chunk["record_time"])
+                weather = read_weather(weather_conn, record_times.min(), record_times.max())
+                frame = join_weather(chunk, weather)
+                for date, group in frame.groupby(frame["record_time"].dt.date, sort=True):
+                    if date not in writers:
+                        partition = os.path.join(directory, f"date={date.isoformat()}")
+                        os.makedirs(partition, exist_ok=True)
+                        writers[date] = pq.ParquetWriter(os.path.join(partition, part_name), SCHEMA, compression="zstd")
+                        files.append(os.path.join(f"date={date.isoformat()}", part_name))
+                    writers[date].write_table(pa.Table.from_pandas(group, schema=SCHEMA, preserve_index=False))
+                rows += len(frame)
+                print(f"Exported {rows:,} rows up to {frame['record_time'].max():%Y-%m-%d %H:%M:%S}")
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    write_watermark(directory, upper, rows)
+    return {"rows": rows, "watermark": upper.strftime(TIME_FORMAT), "files": files}
+
+
+def load_training_data(directory=TRAINING_DATA_DIR, start=None, end=None, columns=None):
+    """
+    Reads the exported training set, optionally limited to dates in [start, end].
+
+    Parameters:
+        start, end (str): Dates as YYYY-MM-DD; only the matching partitions are read.
+        columns (list): Columns to read (all by default).
+
+    Returns:
+        DataFrame: Training rows, with `last_reported` and `record_time` as datetimes.
+    """
+    filters = []
+    if start:
+        filters.append(("date", ">=", start))
+    if end:
+        filters.append(("date", "<=", end))
+    dataset = pq.ParquetDataset(directory, filters=filters or None, partitioning="hive")
+    table = dataset.read(columns=columns)
+    return table.drop_columns([c for c in ("date",) if c in table.column_names]).to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=TRAINING_DATA_DIR, help="Folder of the Parquet partitions")
+    parser.add_argument("--chunk-rows", type=int, default=200000)
+    parser.add_argument("--settle-minutes", type=float, default=SETTLE_MINUTES,
+                        help="Leave availability this close to the newest row for the next export")
+    args = parser.parse_args()
+
+    from services.db_config import connect_to_db
+    result = export(connect_to_db("bike"), args.output, args.chunk_rows, args.settle_minutes)
+    print(f"{result['rows']:,} rows exported, watermark {result['watermark']}")
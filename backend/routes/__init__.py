@@ -3,6 +3,10 @@ from .weather import weather_bp
 from .stations import stations_bp
 from .config import config_bp
 from .journey import journey_bp
+from .models import models_bp
+from .forecast import forecast_bp
+from .metrics import metrics_bp
+from .profiles import profiles_bp
 
 
 # Define a function to register Blueprints
@@ -11,3 +15,8 @@ def register_blueprints(app):
     app.register_blueprint(stations_bp, url_prefix="/api")
     app.register_blueprint(config_bp, url_prefix="/api")
     app.register_blueprint(journey_bp, url_prefix="/api")
+    app.register_blueprint(models_bp, url_prefix="/api")
+    app.register_blueprint(forecast_bp, url_prefix="/api")
+    app.register_blueprint(profiles_bp, url_prefix="/api")
+    # Served at /metrics, where Prometheus scrapes by default
+    app.register_blueprint(metrics_bp)
@@ -0,0 +1,68 @@
+from flask import Blueprint, jsonify, request, Response
+from services import get_db, get_station_snapshot, forecast_cache, ForecastUnavailable, FORECAST_MAX_HOURS, negotiate_format, resolve_contract
+import msgpack
+
+# Create a Blueprint for city-wide forecast routes
+forecast_bp = Blueprint("forecast", __name__)
+
+
+@forecast_bp.route("/forecast", methods=["GET"])
+def get_forecast():
+    """
+    API Endpoint: /api/forecast
+    Method: GET
+
+    Description:
+    - Predicts available bikes and stands for every station over the next hours,
+      e.g. for a city-wide availability heat map.
+    - Temperatures come from the newest hourly forecast stored in weather.hourly_forecast.
+    - All stations and hours are predicted in one batch per model, and the result is
+      cached per contract, model version and forecast hour.
+
+    Query Parameters:
+    - `hours` (int, optional): Number of hourly steps, 1 to 48 (default 24). Fewer steps are
+      returned if the stored forecast ends earlier.
+    - `contract` (str, optional): JCDecaux contract (city) to forecast; defaults to the first one in BIKE_NAME.
+    - `format` (str, optional): `msgpack` (or `Accept: application/msgpack`) for a MessagePack body;
+      any other value returns JSON.
+
+    Example API Request:
+    GET /api/forecast?hours=2
+
+    Example Response (columnar: `bikes[h][i]` is the prediction for `station.id[i]` at `hour[h]`):
+    {
+        "contract": "dublin",
+        "version": "legacy",
+        "hour": [1745157600, 1745161200],
+        "temp": [11.8, 12.4],
+        "station": {"id": [1, 2, 3], "lat": [53.3409, 53.3568, 53.3512], "lon": [-6.2625, -6.2647, -6.2694]},
+        "bikes": [[10, 4, 17], [9, 5, 16]],
+        "stands": [[21, 16, 3], [22, 15, 4]]
+    }
+
+    Returns:
+    - 200 OK: Columnar forecast.
+    - 400 Bad Request: If `hours` is not an integer between 1 and 48, or the contract is unknown.
+    - 503 Service Unavailable: If no model is loaded or no hourly forecast is stored.
+    """
+    try:
+        hours = int(request.args.get("hours", 24))
+    except ValueError:
+        hours = 0
+    if not 1 <= hours <= FORECAST_MAX_HOURS:
+        return jsonify({"error": f"'hours' must be an integer between 1 and {FORECAST_MAX_HOURS}."}), 400
+
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stations = get_station_snapshot(contract)["data"]
+    try:
+        forecast = forecast_cache.get(get_db("weather"), stations, hours, contract=contract)
+    except ForecastUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+
+    if negotiate_format(request.args, request.headers.get("Accept")) == "msgpack":
+        return Response(msgpack.packb(forecast), mimetype="application/msgpack")
+    return jsonify(forecast)
@@ -1,7 +1,8 @@
 from flask import Blueprint, jsonify, request
-from services import get_all_stations, predict_availability
-from utils import haversine, filter_nearby_stations
-from services import get_weather_by_coordinate_time, get_weather_by_coordinate
+import numpy as np
+from services import get_station_snapshot, predict_availability_many, rank_journeys, MAX_TOP_K, station_matrices, resolve_contract, ContractUnavailable, nowcasts, contract_centre
+from utils import haversine, haversine_array, filter_nearby_stations
+from services import get_weather_by_coordinate_time, get_weather_by_coordinate, span
 
 journey_bp = Blueprint("journey", __name__)
 
@@ -22,12 +23,22 @@ def plan_journey():
     - dest_lat (float): Latitude of the destination location.
     - dest_lon (float): Longitude of the destination location.
     - timestamp (optional): The timestamp for future journey planning (for bike availability prediction).
+      Up to NOWCAST_MAX_MINUTES (default 60) ahead, availability comes from the nowcast, which starts from
+      the live counts and recent trend and converges on the model; later timestamps use the model alone.
+    - top_k (int, optional): Ranking mode. Scores every (start, destination) pair within walking distance
+      by walking time, riding time and how close the start is to running out of bikes and the destination
+      out of stands, and returns up to `top_k` (at most 20) alternatives, best first, in `journeys`.
+      `start_station` and `destination_station` then hold the best pair, without weather details.
+    - contract (str, optional): JCDecaux contract (city) to plan in. Defaults to the contract around
+      the starting location.
 
     Returns:
     - JSON response with:
         - `start_station`: Nearest station to the starting location with at least 2 bikes available.
         - `destination_station`: Nearest station to the destination with at least 2 empty slots available.
-    - Error message if no suitable stations are found.
+    - Error message if no suitable stations are found, or 503 if the contract around
+      the start cannot be told yet or the batched predictions time out
+      (PREDICTION_TIMEOUT_SECONDS).
 
     Example API Request:
         GET /api/plan-journey?start_lat=53.3559067&start_lon=-6.2581812&dest_lat=53.3489189&dest_lon=-6.2612181&timestamp=1744108800
@@ -74,26 +85,44 @@ def plan_journey():
 
     WALKING_DISTANCE = 0.5  # Maximum walking distance to a bike station
 
-    # Fetch all stations
-    stations = get_all_stations()['data']
+    try:
+        contract = resolve_contract(params, start_lat, start_lon)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ContractUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+
+    # Fetch all stations of the contract (copied, since the snapshot is shared between requests)
+    snapshot = get_station_snapshot(contract)['data']
+    stations = [dict(s) for s in snapshot]
 
     # Filter nearby stations based on walking distance
-    start_nearby = filter_nearby_stations(stations, start_lat, start_lon, WALKING_DISTANCE)
-    dest_nearby = filter_nearby_stations(stations, dest_lat, dest_lon, WALKING_DISTANCE)
+    with span("journey.nearby"):
+        start_nearby = filter_nearby_stations(stations, start_lat, start_lon, WALKING_DISTANCE)
+        dest_nearby = filter_nearby_stations(stations, dest_lat, dest_lon, WALKING_DISTANCE)
+
+    # Ranking mode: return the best alternatives instead of a single pair
+    if "top_k" in params:
+        try:
+            top_k = int(params["top_k"])
+        except ValueError:
+            top_k = 0
+        if not 1 <= top_k <= MAX_TOP_K:
+            return jsonify({"error": f"'top_k' must be an integer between 1 and {MAX_TOP_K}."}), 400
+        matrix = station_matrices.get(snapshot, contract)
+        return rank_alternatives(params, contract, start_lat, start_lon, dest_lat, dest_lon, start_nearby, dest_nearby, top_k, matrix)
 
     # If `timestamp` is provided, use prediction model for future bike availability
     if "timestamp" in params:
         try:
             timestamp = int(params["timestamp"])
 
-            # Use a central location to get temperature forecast (fallback if specific weather lookup fails)
-            central_lat, central_lon = 53.3476, -6.2637
-            weather_data = get_weather_by_coordinate_time(central_lat, central_lon, timestamp)["data"]
-            temp = weather_data["temp"]
-
-            # Predict availability for start stations
-            for station in start_nearby[:]:  # Copy to avoid in-place modification while iterating
-                predicted_bikes = int(predict_availability(station["id"], timestamp, temp))
+            # Predict availability for start and destination stations (all at once)
+            start_predictions, dest_predictions = predict_nearby(
+                contract, [s["id"] for s in start_nearby], [s["id"] for s in dest_nearby], timestamp
+            )
+            for station, predicted in zip(start_nearby[:], start_predictions):  # Copy to avoid in-place modification while iterating
+                predicted_bikes = int(predicted)
                 if predicted_bikes <= 0:
                     start_nearby.remove(station)
                     continue
@@ -114,9 +143,8 @@ def plan_journey():
                     "description": start_weather["description"]
                 })
 
-            # Predict availability for destination stations
-            for station in dest_nearby[:]:
-                predicted_stands = int(predict_availability(station["id"], timestamp, temp, target="stand"))
+            for station, predicted in zip(dest_nearby[:], dest_predictions):
+                predicted_stands = int(predicted)
                 if predicted_stands <= 0:
                     dest_nearby.remove(station)
                     continue
@@ -137,6 +165,8 @@ def plan_journey():
                     "description": dest_weather["description"]
                 })
 
+        except TimeoutError:
+            return jsonify({"error": "Predictions are taking too long; please try again shortly."}), 503
         except Exception as e:
             return jsonify({"error": f"Error while predicting availability: {str(e)}"}), 500
     
@@ -184,4 +214,84 @@ def plan_journey():
     return jsonify({
         "start_station": start_station,
         "destination_station": dest_station
-    })
\ No newline at end of file
+    })
+
+
+def predict_nearby(contract, start_ids, dest_ids, timestamp):
+    """
+    Predicts bikes at the start candidates and stands at the destination candidates at `timestamp`.
+
+    Short horizons are read from the precomputed nowcast. Otherwise the temperature forecast
+    is looked up and the model is queried through the shared batcher.
+
+    Returns:
+        tuple: (predicted bikes per start station, predicted stands per destination station).
+    """
+    bikes = nowcasts.predict(contract, start_ids, timestamp)
+    stands = nowcasts.predict(contract, dest_ids, timestamp, target="stand")
+    if bikes is not None and stands is not None:
+        return bikes, stands
+
+    # Use the centre of the contract's stations to get the temperature forecast
+    central_lat, central_lon = contract_centre(contract)
+    temp = get_weather_by_coordinate_time(central_lat, central_lon, timestamp)["data"]["temp"]
+    return (predict_availability_many(start_ids, timestamp, temp, contract=contract),
+            predict_availability_many(dest_ids, timestamp, temp, target="stand", contract=contract))
+
+
+def rank_alternatives(params, contract, start_lat, start_lon, dest_lat, dest_lon, start_nearby, dest_nearby, top_k, matrix):
+    """
+    Ranks all (start, destination) pairs of nearby stations for the `top_k` mode of `plan_journey`.
+
+    Uses predicted availability (see `predict_nearby`) when `timestamp` is given, live availability otherwise.
+    Ride distances are read from the precomputed station matrix.
+    """
+    if not start_nearby:
+        return jsonify({"error": "No bike stations with enough bikes near the start location."}), 400
+    if not dest_nearby:
+        return jsonify({"error": "No bike stations with enough stands near the destination."}), 400
+
+    if "timestamp" in params:
+        try:
+            timestamp = int(params["timestamp"])
+            bikes, stands = predict_nearby(contract, [s["id"] for s in start_nearby], [s["id"] for s in dest_nearby], timestamp)
+            bikes, stands = np.asarray(bikes).astype(int), np.asarray(stands).astype(int)
+        except TimeoutError:
+            return jsonify({"error": "Predictions are taking too long; please try again shortly."}), 503
+        except Exception as e:
+            return jsonify({"error": f"Error while predicting availability: {str(e)}"}), 500
+        for station, predicted in zip(start_nearby, bikes):
+            station["prediction"] = {"predicted_bike_availability": int(predicted)}
+        for station, predicted in zip(dest_nearby, stands):
+            station["prediction"] = {"predicted_stand_availability": int(predicted)}
+    else:
+        bikes = np.array([s["details"]["available_bikes"] for s in start_nearby])
+        stands = np.array([s["details"]["available_bike_stands"] for s in dest_nearby])
+
+    # Coordinates of the candidates as arrays, for walking distances in one pass
+    start_coords = np.array([(s["lat"], s["lon"]) for s in start_nearby])
+    dest_coords = np.array([(s["lat"], s["lon"]) for s in dest_nearby])
+    start_ids = np.array([s["id"] for s in start_nearby])
+    dest_ids = np.array([s["id"] for s in dest_nearby])
+
+    ranked = rank_journeys(
+        walk_to_start_km=haversine_array(start_lat, start_lon, start_coords[:, 0], start_coords[:, 1]),
+        ride_km=matrix.distances(start_ids, dest_ids),
+        walk_from_dest_km=haversine_array(dest_lat, dest_lon, dest_coords[:, 0], dest_coords[:, 1]),
+        bikes=bikes,
+        stands=stands,
+        top_k=top_k,
+        same_station=start_ids[:, np.newaxis] == dest_ids[np.newaxis, :],
+    )
+    if not ranked:
+        return jsonify({"error": "No pair of stations with bikes at the start and stands at the destination."}), 400
+
+    journeys = [
+        {"start_station": start_nearby[i], "destination_station": dest_nearby[j], "cost": cost}
+        for i, j, cost in ranked
+    ]
+    return jsonify({
+        "start_station": journeys[0]["start_station"],
+        "destination_station": journeys[0]["destination_station"],
+        "journeys": journeys,
+    })
@@ -0,0 +1,27 @@
+from flask import Blueprint, Response
+from services import metrics_registry
+
+# Create a Blueprint for the monitoring endpoint
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Endpoint: /metrics
+    Method: GET
+
+    Description:
+    - Exposes request latencies, upstream call, database query and prediction timings,
+      and counters in the Prometheus text format.
+    - Each worker process keeps its own metrics, so with several Gunicorn workers a scrape
+      reports the worker that answered it.
+
+    Example Response:
+        # HELP http_request_duration_seconds Time spent handling HTTP requests.
+        # TYPE http_request_duration_seconds histogram
+        http_request_duration_seconds_bucket{method="GET",route="/api/plan-journey",status="200",le="0.1"} 41
+        ...
+        span_duration_seconds_sum{span="upstream.openweather"} 3.912
+    """
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,66 @@
+from flask import Blueprint, jsonify
+from services import model_registry
+
+# Create a Blueprint for prediction model routes
+models_bp = Blueprint("models", __name__)
+
+
+@models_bp.route("/models", methods=["GET"])
+def get_models():
+    """
+    API Endpoint: /api/models
+    Method: GET
+
+    Description:
+    - Reports the prediction model version currently serving requests.
+    - Lists recently loaded versions with their load time and memory size,
+      and versions that failed to load or warm up.
+
+    Example Response:
+    {
+        "active": "2025-04-20_1200",
+        "loading": false,
+        "loaded": [
+            {
+                "version": "2025-04-20_1200",
+                "path": "/srv/backend/machine_learning/artifacts/2025-04-20_1200",
+                "model_type": "LinearRegression",
+                "load_seconds": 0.0031,
+                "memory_bytes": 48213,
+                "loaded_at": 1745150400.12
+            }
+        ],
+        "failed": {}
+    }
+
+    Returns:
+    - 200 OK: JSON object describing the loaded model versions.
+    """
+    return jsonify(model_registry.info())
+
+
+@models_bp.route("/ready", methods=["GET"])
+def get_ready():
+    """
+    API Endpoint: /api/ready
+    Method: GET
+
+    Description:
+    - Readiness probe: reports whether a prediction model is active.
+    - With MODEL_LOAD_MODE=background the server answers requests while the model
+      is still loading; load balancers should route traffic only once this is 200.
+
+    Example Response:
+    {
+        "ready": true,
+        "model": "2025-04-20_1200",
+        "loading": false
+    }
+
+    Returns:
+    - 200 OK: A model is active.
+    - 503 Service Unavailable: No model is active yet (or none could be loaded).
+    """
+    active = model_registry.active
+    body = {"ready": active is not None, "model": active.version if active else None, "loading": model_registry.loading}
+    return jsonify(body), 200 if active is not None else 503
@@ -0,0 +1,101 @@
+from flask import Blueprint, jsonify, request, send_from_directory, abort
+import os
+from services import profiling
+
+# Create a Blueprint for on-demand profiling artifacts
+profiles_bp = Blueprint("profiles", __name__)
+
+
+@profiles_bp.before_request
+def require_token():
+    # Invisible unless profiling is enabled; every call needs the profiling token
+    if not profiling.PROFILING_ENABLED:
+        abort(404)
+    if not profiling.authorized(request.headers):
+        return jsonify({"error": "Missing or invalid X-Profile-Token header."}), 403
+
+
+@profiles_bp.route("/profiles", methods=["GET"])
+def list_profiles():
+    """
+    API Endpoint: /api/profiles
+    Method: GET
+
+    Description:
+    - Lists the stored profiling artifacts in PROFILE_DIR, newest first.
+    - A single request is profiled by sending it with `X-Profile: cprofile` (deterministic,
+      .prof for pstats/snakeviz) or `X-Profile: sample` (stack samples every 5 ms, .folded
+      for flamegraph.pl/speedscope) plus the `X-Profile-Token` header; the response's
+      `X-Profile-Artifact` header names the stored file.
+    - Only available with PROFILING_ENABLED=1 and a PROFILING_TOKEN configured.
+
+    Example Response:
+    {
+        "data": [
+            {"name": "20250420-120301-4242-api_plan-journey.folded", "bytes": 18211, "modified": 1745150581.2}
+        ]
+    }
+    """
+    if not os.path.isdir(profiling.PROFILE_DIR):
+        return jsonify(data=[])
+    entries = [entry for entry in os.scandir(profiling.PROFILE_DIR) if entry.is_file()]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return jsonify(data=[
+        {"name": entry.name, "bytes": entry.stat().st_size, "modified": entry.stat().st_mtime}
+        for entry in entries
+    ])
+
+
+@profiles_bp.route("/profiles/<path:name>", methods=["GET"])
+def get_profile(name):
+    """
+    API Endpoint: /api/profiles/<name>
+    Method: GET
+
+    Description:
+    - Downloads one stored profiling artifact.
+    """
+    return send_from_directory(profiling.PROFILE_DIR, name, as_attachment=True)
+
+
+@profiles_bp.route("/profiles/tracemalloc", methods=["POST"])
+def trace_allocations():
+    """
+    API Endpoint: /api/profiles/tracemalloc
+    Method: POST
+
+    Description:
+    - Traces memory allocations of the worker process answering the request for a time
+      window and returns the allocation sites that grew the most; the full comparison is
+      stored as an artifact.
+    - The request blocks for the whole window. Tracing slows the process down while it runs,
+      so it shares the profiling rate limit.
+
+    Query Parameters:
+    - `seconds` (float, optional): Window length, up to 30 (default 10).
+
+    Example Response:
+    {
+        "artifact": "20250420-120455-4242-tracemalloc.txt",
+        "top": [{"site": "services/live_stations.py:97", "size_kib": 412.5, "count": 3410}, ...]
+    }
+
+    Returns:
+    - 200 OK: Top allocation sites.
+    - 400 Bad Request: If `seconds` is out of range.
+    - 429 Too Many Requests: If another profile is running or one ran too recently.
+    """
+    try:
+        seconds = float(request.args.get("seconds", 10))
+    except ValueError:
+        seconds = 0
+    if not 0 < seconds <= profiling.MAX_TRACEMALLOC_SECONDS:
+        return jsonify({"error": f"'seconds' must be between 0 and {profiling.MAX_TRACEMALLOC_SECONDS}."}), 400
+
+    if not profiling.limiter.acquire():
+        return jsonify({"error": "Another profile is running or one ran too recently."}), 429
+    try:
+        name, sites = profiling.trace_allocations(seconds)
+    finally:
+        profiling.limiter.release()
+    return jsonify({"artifact": name, "top": sites})
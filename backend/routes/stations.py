@@ -1,8 +1,11 @@
-from flask import Blueprint, jsonify, request
-from sqlalchemy import text
-from services import get_all_stations, get_db
+from flask import Blueprint, jsonify, request, Response
+from services import get_station_snapshot, get_db, sql, station_feeds, StationTable, negotiate_format, station_matrices, STATION_MATRIX_NEIGHBOURS, station_indexes, MAX_POINTS, MAX_K
+from services import station_search, MAX_SEARCH_RESULTS, resolve_contract, contracts_for_points, ContractUnavailable, availability_history, HISTORY_HOURS
 from utils import haversine
 from datetime import datetime
+import json
+import msgpack
+import numpy as np
 
 stations_bp = Blueprint("stations", __name__)
 
@@ -26,6 +29,13 @@ def get_stations():
     - `position_lat` (float, optional): Latitude of the reference location for proximity filtering.
     - `position_lng` (float, optional): Longitude of the reference location for proximity filtering.
     - `maxdist` (float, optional): Maximum distance (in km) within which stations should be returned.
+    - `contract` (str, optional): JCDecaux contract (city) to query. Without it, the contract around
+      `position_lat`/`position_lng` is used, or the first one in BIKE_NAME.
+    - `format` (str, optional): Response encoding, one of `json` (default), `columnar` or `msgpack`.
+      The same choice can be made with the `Accept` header
+      (`application/vnd.dublinbikes.columnar+json` or `application/msgpack`).
+      Compact formats return one list per field, e.g. `{"data": {"id": [52, 1], "name": [...], ...}}`,
+      with `last_update` as Unix seconds.
     
       - If `position_lat` and `position_lng` are provided along with `maxdist`, only stations within 
         `maxdist` km of the given coordinates are returned.
@@ -102,10 +112,24 @@ def get_stations():
     - 200 OK: JSON list of bike stations matching the filters.
     - 400 Bad Request: If latitude, longitude, or maxdist values are invalid.
     - 404 Not Found: If no stations match the criteria.
+    - 503 Service Unavailable: If the contract around the position cannot be told yet.
     """
-    stations = get_all_stations()['data']
     params = request.args
 
+    # Serve the contract named in the request or surrounding the given position
+    try:
+        lat = float(params["position_lat"]) if "position_lat" in params else None
+        lng = float(params["position_lng"]) if "position_lng" in params else None
+    except ValueError:
+        return jsonify({"error": "Invalid latitude or longitude format"}), 400
+    try:
+        contract = resolve_contract(params, lat, lng)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ContractUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    stations = get_station_snapshot(contract)['data']
+
     # Apply proximity filtering if maxdist, lat and lng are provided
     if "maxdist" in params and "position_lat" in params and "position_lng" in params:
         try:
@@ -118,11 +142,18 @@ def get_stations():
         except ValueError:
             return jsonify({"error": "Invalid latitude or longitude format"}), 400
     else:
-    # Apply basic filtering
+        # Apply id, name and address filters through the snapshot's search index
+        index = station_search.get(stations, contract)
+        positions = None
+        for key in ("id", "name", "address"):
+            if key in params:
+                matched = index.find_id(params[key]) if key == "id" else index.find_substring(key, params[key])
+                positions = matched if positions is None else positions & matched
+        if positions is not None:
+            stations = [stations[p] for p in sorted(positions)]
+
+        # Apply coordinate filtering
         filters = {
-            "id": lambda s, v: str(s["id"]) == v,
-            "name": lambda s, v: v.lower() in s["name"].lower(),
-            "address": lambda s, v: v.lower() in s["address"].lower(),
             "position_lat": lambda s, v: float(v) - 0.0001 <= s["lat"] <= float(v) + 0.0001,
             "position_lng": lambda s, v: float(v) - 0.0001 <= s["lon"] <= float(v) + 0.0001
         }
@@ -130,8 +161,441 @@ def get_stations():
             if key in params:
                 stations = [s for s in stations if filter_func(s, params[key])]
 
+    # Encode the result in the format requested by the client
+    response_format = negotiate_format(params, request.headers.get("Accept"))
+    if response_format == "columnar":
+        return jsonify(data=StationTable.from_stations(stations).to_columnar())
+    if response_format == "msgpack":
+        return Response(StationTable.from_stations(stations).to_msgpack(), mimetype="application/msgpack")
+
     return jsonify(data=stations)
 
+@stations_bp.route("/stations/stream", methods=["GET"])
+def stream_stations():
+    """
+    API Endpoint: /api/stations/stream
+    Method: GET
+
+    Description:
+    - Pushes live station availability to the client as Server-Sent Events.
+    - The first event is a full `snapshot` of all stations; later `delta` events only
+      contain stations whose details changed since the previous event.
+    - All clients share one server-side refresh loop, so connected clients never
+      trigger JCDecaux calls themselves.
+    - A client that cannot keep up skips the stale deltas and receives a fresh `snapshot`.
+    - Event ids are "<epoch>.<version>"; a reconnect whose Last-Event-ID comes from another
+      worker process or an earlier server run also receives a fresh `snapshot`.
+    - A comment line is sent every 15 seconds to keep idle connections open.
+
+    Query Parameters:
+    - `contract` (str, optional): JCDecaux contract (city) to query; defaults to the first one in BIKE_NAME.
+
+    Example API Request:
+    GET /api/stations/stream
+
+    Example Events:
+        event: snapshot
+        id: 1a2b-18f3c2d4e5f.12
+        data: [{"id": 52, "name": "YORK STREET EAST", ...}, ...]
+
+        event: delta
+        id: 1a2b-18f3c2d4e5f.13
+        data: [{"id": 1, "details": {"available_bikes": 9, ...}, ...}]
+
+    Returns:
+    - 200 OK: A `text/event-stream` response that stays open until the client disconnects.
+    """
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    station_feed = station_feeds[contract]
+    station_feed.start()
+
+    # Clients reconnecting after a drop resume from the last event they received
+    cursor = station_feed.parse_event_id(request.headers.get("Last-Event-ID"))
+
+    def generate(cursor):
+        while True:
+            event, payload, cursor = station_feed.wait_for_update(cursor)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event}\nid: {station_feed.event_id(cursor)}\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(
+        generate(cursor),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@stations_bp.route("/stations/search", methods=["GET"])
+def search_stations():
+    """
+    API Endpoint: /api/stations/search
+    Method: GET
+
+    Description:
+    - Autocomplete search over station names and addresses, ranked best first.
+    - Every word of the query must match the start of a word in the name or address
+      (case and accents are ignored); whole-word and name matches rank higher.
+    - When there are fewer such matches than `limit`, stations with a similarly spelled
+      name are added after them, so small typos still find the station.
+
+    Query Parameters:
+    - `q` (str, required): Search text, e.g. "pearse st".
+    - `limit` (int, optional): Maximum number of results, 1 to 50 (default 10).
+    - `contract` (str, optional): JCDecaux contract (city) to query; defaults to the first one in BIKE_NAME.
+
+    Example API Request:
+    GET /api/stations/search?q=clare
+
+    Example Response:
+    {
+        "data": [
+            {"id": 1, "name": "CLARENDON ROW", "address": "Clarendon Row", ..., "score": 0.8}
+        ]
+    }
+
+    Returns:
+    - 200 OK: Matching stations with their live details and match score.
+    - 400 Bad Request: If `limit` is invalid.
+    """
+    query = request.args.get("q", "")
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+        return jsonify({"error": f"limit must be an integer between 1 and {MAX_SEARCH_RESULTS}."}), 400
+
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    stations = get_station_snapshot(contract)['data']
+    ranked = station_search.get(stations, contract).search(query, limit)
+    return jsonify(data=[{**stations[p], "score": score} for p, score in ranked])
+
+@stations_bp.route("/stations/nearest", methods=["POST"])
+def get_nearest_stations_batch():
+    """
+    API Endpoint: /api/stations/nearest
+    Method: POST
+
+    Description:
+    - Finds the nearest stations, with their current availability, for many points in one request.
+    - All points are answered from the same station snapshot with one vectorized distance
+      computation, instead of one `/api/stations?maxdist=...` call per point.
+    - Each point is matched against the stations of the contract (city) surrounding it.
+      While a contract's stations cannot be fetched, points that may lie in it get
+      `"contract": null`, no stations and an `error` instead of another city's stations.
+
+    Request Body (JSON):
+    - `points` (list, required): Up to 10000 points, each `[lat, lon]` or `{"lat": ..., "lon": ...}`.
+    - `k` (int, optional): Stations per point, 1 to 20 (default 3).
+    - `min_bikes` (int, optional): Only return stations with at least this many available bikes.
+    - `min_stands` (int, optional): Only return stations with at least this many free stands.
+    - `maxdist` (float, optional): Only return stations within this distance (km).
+    - `contract` (str, optional): Match every point against this contract instead.
+    - `format=msgpack` query parameter (or `Accept: application/msgpack`) returns MessagePack.
+
+    Example API Request:
+    POST /api/stations/nearest
+    {"points": [[53.3498, -6.2603], {"lat": 53.3382, "lon": -6.2591}], "k": 2, "min_bikes": 1}
+
+    Example Response:
+    - `data` has one entry per point, in request order, with its contract and station IDs
+      nearest first (fewer than `k` if the filters exclude stations).
+    - `stations` holds, per contract, the current details of every station referenced in `data`, once.
+    {
+        "data": [
+            {"contract": "dublin", "id": [33, 30], "distance_km": [0.0853, 0.2114]},
+            {"contract": "dublin", "id": [52, 1], "distance_km": [0.0412, 0.2435]}
+        ],
+        "stations": {
+            "dublin": {
+                "33": {"name": "PRINCES STREET / O'CONNELL STREET", "lat": 53.349013, "lon": -6.260311,
+                       "status": "OPEN", "available_bikes": 11, "available_bike_stands": 12},
+                ...
+            }
+        }
+    }
+
+    Returns:
+    - 200 OK: Nearest stations per point.
+    - 400 Bad Request: If the body, a point or a parameter is invalid.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get("points"), list):
+        return jsonify({"error": "Expected a JSON object with a 'points' list."}), 400
+
+    try:
+        points = [(p["lat"], p["lon"]) if isinstance(p, dict) else tuple(p) for p in body["points"]]
+        coords = np.array(points, dtype=np.float64).reshape(-1, 2)
+        k = int(body.get("k", 3))
+        min_bikes = int(body.get("min_bikes", 0))
+        min_stands = int(body.get("min_stands", 0))
+        max_km = float(body["maxdist"]) if body.get("maxdist") is not None else None
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Points must be [lat, lon] pairs or {lat, lon} objects, and parameters numbers."}), 400
+
+    if len(coords) != len(points) or len(coords) > MAX_POINTS:
+        return jsonify({"error": f"Expected between 0 and {MAX_POINTS} points with two coordinates each."}), 400
+    if not (np.isfinite(coords).all() and (np.abs(coords[:, 0]) <= 90).all() and (np.abs(coords[:, 1]) <= 180).all()):
+        return jsonify({"error": "Coordinates must be valid latitudes and longitudes."}), 400
+    if not 1 <= k <= MAX_K:
+        return jsonify({"error": f"k must be between 1 and {MAX_K}."}), 400
+
+    # Route every point to the contract named in the body, or to the one surrounding it
+    if body.get("contract") is not None:
+        try:
+            point_contracts = np.full(len(coords), resolve_contract({"contract": body["contract"]}), dtype=object)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        point_contracts = contracts_for_points(coords[:, 0], coords[:, 1])
+
+    # Points whose contract cannot be told yet are flagged instead of answered from another city
+    results = [
+        {"contract": None, "id": [], "distance_km": [], "error": "Stations of this area are temporarily unavailable."}
+        if contract is None else None
+        for contract in point_contracts.tolist()
+    ]
+    referenced = {}
+    for contract in sorted(set(point_contracts.tolist()) - {None}):
+        # One snapshot and one index per contract, for all of its points
+        rows = np.flatnonzero(point_contracts == contract)
+        stations = get_station_snapshot(contract)['data']
+        index = station_indexes.get(stations, contract)
+        positions, distances = index.query(coords[rows, 0], coords[rows, 1], k, min_bikes, min_stands, max_km)
+
+        # Station IDs per point; unmatched slots (-1) are always at the end of a row
+        ids = np.where(positions >= 0, index.ids[positions], -1)
+        for row, row_ids, row_distances in zip(rows.tolist(), ids.tolist(), np.round(distances, 4).tolist()):
+            matched = row_ids.index(-1) if -1 in row_ids else len(row_ids)
+            results[row] = {"contract": contract, "id": row_ids[:matched], "distance_km": row_distances[:matched]}
+
+        # Each referenced station is serialized once, not once per point
+        contract_stations = referenced.setdefault(contract, {})
+        for position in np.unique(positions[positions >= 0]).tolist():
+            s = stations[position]
+            contract_stations[s["id"]] = {
+                "name": s["name"], "lat": s["lat"], "lon": s["lon"],
+                "status": s["details"]["status"],
+                "available_bikes": s["details"]["available_bikes"],
+                "available_bike_stands": s["details"]["available_bike_stands"],
+            }
+
+    payload = {"data": results, "stations": referenced}
+
+    if negotiate_format(request.args, request.headers.get("Accept")) == "msgpack":
+        return Response(msgpack.packb(payload), mimetype="application/msgpack")
+    return jsonify(payload)
+
+@stations_bp.route("/stations/<int:station_id>/nearest", methods=["GET"])
+def get_nearest_stations(station_id):
+    """
+    API Endpoint: /api/stations/<int:station_id>/nearest
+    Method: GET
+
+    Description:
+    - Lists the stations closest to a station, nearest first, from the precomputed station matrix.
+    - Optionally keeps only stations with enough live bikes or free stands, e.g. to find
+      the next nearest station with a free stand when the chosen one is full.
+
+    Query Parameters:
+    - `k` (int, optional): Number of stations to return, 1 to 16 (default 5).
+    - `min_bikes` (int, optional): Minimum available bikes (default 0).
+    - `min_stands` (int, optional): Minimum available bike stands (default 0).
+    - `contract` (str, optional): JCDecaux contract (city) to query; defaults to the first one in BIKE_NAME.
+
+    Example API Request:
+    GET /api/stations/52/nearest?k=2&min_stands=1
+
+    Example Response:
+    {
+        "data": [
+            {"id": 1, "name": "CLARENDON ROW", ..., "distance_km": 0.2435, "ride_minutes": 0.974},
+            {"id": 37, "name": "ST. STEPHEN'S GREEN SOUTH", ..., "distance_km": 0.3121, "ride_minutes": 1.248}
+        ]
+    }
+
+    Returns:
+    - 200 OK: JSON list of stations with their distance and estimated ride time.
+    - 400 Bad Request: If a parameter is not a valid integer.
+    - 404 Not Found: If the station does not exist.
+    """
+    try:
+        k = int(request.args.get("k", 5))
+        min_bikes = int(request.args.get("min_bikes", 0))
+        min_stands = int(request.args.get("min_stands", 0))
+    except ValueError:
+        return jsonify({"error": "k, min_bikes and min_stands must be integers."}), 400
+    if not 1 <= k <= STATION_MATRIX_NEIGHBOURS:
+        return jsonify({"error": f"k must be between 1 and {STATION_MATRIX_NEIGHBOURS}."}), 400
+
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    stations = get_station_snapshot(contract)['data']
+    matrix = station_matrices.get(stations, contract)
+    by_id = {s["id"]: s for s in stations}
+
+    try:
+        neighbours = matrix.nearest(station_id)
+    except KeyError:
+        return jsonify({"error": f"Station {station_id} not found."}), 404
+
+    nearest = []
+    for neighbour_id, distance_km in neighbours:
+        details = by_id[neighbour_id]["details"]
+        if details["available_bikes"] < min_bikes or details["available_bike_stands"] < min_stands:
+            continue
+        nearest.append({
+            **by_id[neighbour_id],
+            "distance_km": round(distance_km, 4),
+            "ride_minutes": round(matrix.pair(station_id, neighbour_id)[1], 3),
+        })
+        if len(nearest) == k:
+            break
+
+    return jsonify(data=nearest)
+
+@stations_bp.route("/stations/distance", methods=["GET"])
+def get_station_distance():
+    """
+    API Endpoint: /api/stations/distance
+    Method: GET
+
+    Description:
+    - Returns the great-circle distance and estimated ride time between two stations,
+      read from the precomputed station matrix.
+
+    Query Parameters:
+    - `from` (int, required): ID of the first station.
+    - `to` (int, required): ID of the second station.
+    - `contract` (str, optional): JCDecaux contract (city) to query; defaults to the first one in BIKE_NAME.
+
+    Example API Request:
+    GET /api/stations/distance?from=52&to=1
+
+    Example Response:
+    {"from": 52, "to": 1, "distance_km": 0.2435, "ride_minutes": 0.974}
+
+    Returns:
+    - 200 OK: Distance and ride time.
+    - 400 Bad Request: If `from` or `to` is missing or not an integer.
+    - 404 Not Found: If either station does not exist.
+    """
+    try:
+        from_id = int(request.args["from"])
+        to_id = int(request.args["to"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "'from' and 'to' must be station IDs."}), 400
+
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    matrix = station_matrices.get(get_station_snapshot(contract)['data'], contract)
+    try:
+        distance_km, ride_minutes = matrix.pair(from_id, to_id)
+    except KeyError as e:
+        return jsonify({"error": str(e.args[0])}), 404
+
+    return jsonify({
+        "from": from_id,
+        "to": to_id,
+        "distance_km": round(distance_km, 4),
+        "ride_minutes": round(ride_minutes, 3),
+    })
+
+@stations_bp.route("/stations/<int:station_id>/recent", methods=["GET"])
+def get_recent_availability(station_id):
+    """
+    API Endpoint: /api/stations/<int:station_id>/recent
+    Method: GET
+
+    Description:
+    - Returns the recent availability of a station from the in-memory history buffer,
+      which keeps every live refresh of the last STATION_HISTORY_HOURS hours (default 6).
+    - Also returns the rolling mean and the trend (least-squares slope per hour) of bikes
+      and stands over the same window. No database query is made.
+
+    Query Parameters:
+    - `minutes` (int, optional): Window length, from 1 up to the buffer span (default 60).
+    - `contract` (str, optional): JCDecaux contract (city) to query; defaults to the first one in BIKE_NAME.
+
+    Example API Request:
+    GET /api/stations/42/recent?minutes=30
+
+    Example Response (`history` is columnar, one entry per distinct station report, oldest first):
+    {
+        "id": 42,
+        "contract": "dublin",
+        "minutes": 30,
+        "history": {
+            "last_update": ["2025-04-08T17:31:02", "2025-04-08T17:41:10"],
+            "available_bikes": [14, 11],
+            "available_bike_stands": [16, 19]
+        },
+        "mean": {"available_bikes": 12.4, "available_bike_stands": 17.6},
+        "trend_per_hour": {"available_bikes": -6.1, "available_bike_stands": 6.1}
+    }
+
+    Returns:
+    - 200 OK: Recent history and statistics.
+    - 400 Bad Request: If `minutes` is out of range or the contract is unknown.
+    - 404 Not Found: If the buffer holds no samples for the station.
+    """
+    max_minutes = int(HISTORY_HOURS * 60)
+    try:
+        minutes = int(request.args.get("minutes", 60))
+    except ValueError:
+        minutes = 0
+    if not 1 <= minutes <= max_minutes:
+        return jsonify({"error": f"'minutes' must be an integer between 1 and {max_minutes}."}), 400
+
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Make sure the feed (and so the buffer) is running
+    get_station_snapshot(contract)
+    buffer = availability_history[contract]
+    samples = buffer.samples(station_id)
+    if samples is None or not len(samples[0]):
+        return jsonify({"error": f"No recent samples for station {station_id}."}), 404
+
+    # Station reports are in the API's naive local time
+    updated, bikes, stands = samples
+    cutoff = np.datetime64(datetime.now(), "s").astype(np.int64) - minutes * 60
+    recent = updated >= cutoff
+
+    row = buffer.rows[station_id]
+    _, mean_bikes, mean_stands = buffer.rolling_mean(minutes * 60)
+    _, trend_bikes, trend_stands = buffer.trend(minutes * 60)
+
+    def rounded(values):
+        value = float(values[row])
+        return None if np.isnan(value) else round(value, 2)
+
+    return jsonify({
+        "id": station_id,
+        "contract": contract,
+        "minutes": minutes,
+        "history": {
+            "last_update": np.datetime_as_string(updated[recent].astype("datetime64[s]")).tolist(),
+            "available_bikes": bikes[recent].tolist(),
+            "available_bike_stands": stands[recent].tolist(),
+        },
+        "mean": {"available_bikes": rounded(mean_bikes), "available_bike_stands": rounded(mean_stands)},
+        "trend_per_hour": {"available_bikes": rounded(trend_bikes), "available_bike_stands": rounded(trend_stands)},
+    })
+
 @stations_bp.route("/stations/history/<int:station_id>", methods=["GET"])
 def get_station_history_by_id(station_id):
     """
@@ -145,11 +609,14 @@ def get_station_history_by_id(station_id):
     - Retrieve the historical bike availability and bike stands availability for a given station (identified by station_id) within a specified time range. 
     - Filters the results by providing a start_time and end_time in the YYYY-MM-DD HH:MM:SS format. 
     - If no time range is provided, all historical records for the station will be returned.
+    - Ranges starting within the in-memory history buffer (the last few hours of live refreshes)
+      are served from memory; older ranges are read from the database.
     
     Parameters:
         - `station_id` (int, required): The unique ID of the bike station.
         - `start_time` (optional): The start time for filtering the availability history. Should be in the YYYY-MM-DD HH:MM:SS format (e.g., 2025-02-17 13:00:00). If not provided, no lower bound for the time will be applied.
         - `end_time` (optional): The end time for filtering the availability history. Should be in the YYYY-MM-DD HH:MM:SS format (e.g., 2025-02-17 14:00:00). If not provided, no upper bound for the time will be applied.
+        - `contract` (str, optional): JCDecaux contract (city) of the station; defaults to the first one in BIKE_NAME.
     
     Example API Request:
     GET /api/stations/history/1?start_time=2025-02-17 16:00:00&end_time=2025-02-17 16:50:00
@@ -165,9 +632,6 @@ def get_station_history_by_id(station_id):
         ]
     }
     """
-    engine = get_db("bike")
-    history = []
-
     # Get query parameters for time range
     start_time_str = request.args.get('start_time')
     end_time_str = request.args.get('end_time')
@@ -177,14 +641,34 @@ def get_station_history_by_id(station_id):
         end_time = datetime.strptime(end_time_str, "%Y-%m-%d %H:%M:%S") if end_time_str else None
     except ValueError:
         return jsonify({"error": "Invalid time format. Expected format: YYYY-MM-DD HH:MM:SS."}), 400
-    
+
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Recent ranges come from the live buffer without touching the database
+    buffer = availability_history[contract]
+    if start_time and buffer.covers(station_id, np.datetime64(start_time, "s").astype(np.int64)):
+        updated, bikes, stands = buffer.samples(station_id)
+        updated = updated.astype("datetime64[s]")
+        in_range = updated >= np.datetime64(start_time, "s")
+        if end_time:
+            in_range &= updated <= np.datetime64(end_time, "s")
+        history = [
+            {"available_bikes": b, "available_bike_stands": s, "last_update": t}
+            for b, s, t in zip(bikes[in_range].tolist(), stands[in_range].tolist(), updated[in_range].tolist())
+        ]
+        return jsonify(data=history)
+
+    engine = get_db("bike")
     with engine.connect() as conn:
-        result = conn.execute(text("""
+        result = conn.execute(sql("""
             SELECT available_bikes, available_bike_stands, last_update 
             FROM availability 
-            WHERE station_id = :station_id
+            WHERE contract = :contract AND station_id = :station_id
             ORDER BY last_update ASC
-        """), {"station_id": station_id}).fetchall()
+        """), {"contract": contract, "station_id": station_id}).fetchall()
 
         history = []
         for row in result:
@@ -215,6 +699,7 @@ def get_station_history_demo_by_id(station_id):
 
     Parameters:
         - `station_id` (int, required): The ID of the bike station.
+        - `contract` (str, optional): JCDecaux contract (city) of the station; defaults to the first one in BIKE_NAME.
 
     Example Request:
         GET /stations/history/hourly/1
@@ -238,23 +723,28 @@ def get_station_history_demo_by_id(station_id):
         ]
     }
     """
+    try:
+        contract = resolve_contract(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     engine = get_db("bike")
     history = []
 
     # Note: This query is based on demo data, limited to a fixed 24-hour period (Feb 23, 2025).
 
     with engine.connect() as conn:
-        result = conn.execute(text("""
+        result = conn.execute(sql("""
             SELECT 
                 DATE_FORMAT(record_time, '%Y-%m-%d %H') AS record_hour,
                 station_id,
                 ROUND(AVG(available_bikes)) AS avg_available_bikes,
                 ROUND(AVG(available_bike_stands)) AS avg_available_bike_stands
             FROM bike.availability 
-            WHERE station_id = :station_id
+            WHERE contract = :contract AND station_id = :station_id
               AND record_time BETWEEN '2025-02-23 00:00:00' AND '2025-02-23 23:59:59'
             GROUP BY 1, 2;
-        """), {"station_id": station_id}).fetchall()
+        """), {"contract": contract, "station_id": station_id}).fetchall()
 
         # Assemble result as JSON-serializable dictionary
         for row in result:
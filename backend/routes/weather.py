@@ -1,6 +1,5 @@
 from flask import Blueprint, jsonify, request
-from services import get_db
-from sqlalchemy import text
+from services import get_db, sql
 from services import get_weather_by_coordinate
 import time
 
@@ -81,7 +80,7 @@ def get_historical_weather():
     data = []
 
     with engine.connect() as conn:
-        result = conn.execute(text("SELECT record_date, temp, wind_speed FROM current_data"))
+        result = conn.execute(sql("SELECT record_date, temp, wind_speed FROM current_data"))
         for row in result:
             row_dict = {
                 'date': row[0],
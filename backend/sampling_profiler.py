@@ -0,0 +1,56 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of some threads every `interval` seconds from a background
+    thread, and writes them as folded stacks ("outer;inner;leaf count" per line), the input
+    format of flamegraph.pl and speedscope.
+
+    Unlike cProfile, the profiled code runs at full speed: the cost is one stack walk
+    per sample in the sampling thread. Shared by the server's per-request profiles
+    (services/profiling.py) and the scraper's `--profile sample` (local_db_setup/profiler.py).
+    """
+
+    def __init__(self, thread_ids=None, interval=SAMPLE_INTERVAL):
+        self.thread_ids = thread_ids  # None samples every thread except the sampler
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        """Writes the samples as "outer;inner;leaf count" lines, most frequent first."""
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
@@ -1,6 +1,18 @@
 from .weather_api import get_weather_by_coordinate, get_weather_by_coordinate_time
-from .bike_api import get_all_stations
-from .db_config import get_db, close_db
-from .prediction import predict_availability, load_model
+from .bike_api import get_all_stations, CONTRACTS, DEFAULT_CONTRACT
+from .db_config import get_db, close_db, sql
+from .prediction import predict_availability, predict_availability_batch, predict_availability_many, load_model, registry as model_registry
+from .live_stations import get_station_snapshot, station_feed, station_feeds, resolve_contract, contracts_for_points, contract_centre, ContractUnavailable
+from .station_codec import StationTable, negotiate_format
+from .forecast import forecast_cache, ForecastUnavailable, FORECAST_MAX_HOURS
+from .journey_ranking import rank_journeys, MAX_TOP_K
+from .station_matrix import station_matrices, StationMatrix, NEIGHBOURS as STATION_MATRIX_NEIGHBOURS
+from .spatial import station_indexes, StationIndex, MAX_POINTS, MAX_K
+from .station_search import station_search, StationSearchIndex, MAX_SEARCH_RESULTS
+from .availability_history import availability_history, AvailabilityHistory, HISTORY_HOURS
+from .nowcast import nowcasts, Nowcast, NOWCAST_MAX_MINUTES
+from .metrics import init_app as init_metrics, registry as metrics_registry, span, timed
+from .profiling import init_app as init_profiling
+from .encoding_refresh import encoding_refresher, ENCODING_REFRESH_SECONDS
 
-__all__ = ['get_weather_by_coordinate', 'get_all_stations', 'get_db', 'close_db', 'predict_availability', 'load_model', 'get_weather_by_coordinate_time']
\ No newline at end of file
+__all__ = ['get_weather_by_coordinate', 'get_all_stations', 'CONTRACTS', 'DEFAULT_CONTRACT', 'get_db', 'close_db', 'sql', 'predict_availability', 'predict_availability_batch', 'predict_availability_many', 'load_model', 'model_registry', 'get_weather_by_coordinate_time', 'get_station_snapshot', 'station_feed', 'station_feeds', 'resolve_contract', 'contracts_for_points', 'contract_centre', 'ContractUnavailable', 'StationTable', 'negotiate_format', 'forecast_cache', 'ForecastUnavailable', 'FORECAST_MAX_HOURS', 'rank_journeys', 'MAX_TOP_K', 'station_matrices', 'StationMatrix', 'STATION_MATRIX_NEIGHBOURS', 'station_indexes', 'StationIndex', 'MAX_POINTS', 'MAX_K', 'station_search', 'StationSearchIndex', 'MAX_SEARCH_RESULTS', 'availability_history', 'AvailabilityHistory', 'HISTORY_HOURS', 'nowcasts', 'Nowcast', 'NOWCAST_MAX_MINUTES', 'init_metrics', 'metrics_registry', 'span', 'timed', 'init_profiling', 'encoding_refresher', 'ENCODING_REFRESH_SECONDS']
\ No newline at end of file
@@ -0,0 +1,189 @@
+import math
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from .live_stations import station_feeds, REFRESH_SECONDS
+
+# Load environment variables from .env file
+load_dotenv()
+
+# === History Buffer Settings ===
+HISTORY_HOURS = float(os.getenv("STATION_HISTORY_HOURS", 6))  # Span of live samples kept in memory
+HISTORY_SAMPLES = max(2, math.ceil(HISTORY_HOURS * 3600 / REFRESH_SECONDS))  # Samples per station (one per refresh)
+MISSING = -1  # Marks a station that was absent from a snapshot
+
+
+class AvailabilityHistory:
+    """
+    Recent bike and stand counts of every station of one contract, in fixed-size ring buffers.
+
+    Each feed refresh writes one column: the snapshot time, and per station the
+    available bikes, available stands and the station's `last_update` (as seconds,
+    in the same naive local time as the API's formatted timestamp). Rows follow
+    the order in which stations were first seen; stations missing from a snapshot
+    get MISSING for that column.
+
+    Memory is fixed at `capacity` samples per station; once full, every refresh
+    overwrites the oldest column, so recording allocates no Python objects per sample.
+    """
+
+    def __init__(self, capacity=HISTORY_SAMPLES):
+        self.capacity = capacity
+        self.rows = {}  # station id -> row
+        self.times = np.full(capacity, np.nan)  # Snapshot fetch time (Unix seconds) per column
+        self.bikes = np.full((0, capacity), MISSING, dtype=np.int16)
+        self.stands = np.full((0, capacity), MISSING, dtype=np.int16)
+        self.updated = np.full((0, capacity), MISSING, dtype=np.int64)
+        self.cursor = 0  # Next column to write
+        self.count = 0  # Columns written, up to capacity
+        self._lock = threading.Lock()
+
+    def record(self, snapshot):
+        """Appends one sample per station from a StationSnapshot."""
+        stations = snapshot.stations
+        bikes = np.fromiter((s["details"]["available_bikes"] for s in stations), dtype=np.int16, count=len(stations))
+        stands = np.fromiter((s["details"]["available_bike_stands"] for s in stations), dtype=np.int16, count=len(stations))
+        updated = np.array([s["details"]["last_update"] for s in stations], dtype="datetime64[s]").astype(np.int64)
+
+        with self._lock:
+            new_ids = [s["id"] for s in stations if s["id"] not in self.rows]
+            if new_ids:
+                self._add_rows(new_ids)
+            rows = np.fromiter((self.rows[s["id"]] for s in stations), dtype=np.int64, count=len(stations))
+
+            column = self.cursor
+            self.times[column] = snapshot.fetched_at
+            for array, values in ((self.bikes, bikes), (self.stands, stands), (self.updated, updated)):
+                array[:, column] = MISSING
+                array[rows, column] = values
+            self.cursor = (column + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def _add_rows(self, station_ids):
+        # New stations are rare (a station opening), so the arrays are regrown rather than preallocated
+        extra = len(station_ids)
+        for name in ("bikes", "stands", "updated"):
+            array = getattr(self, name)
+            grown = np.full((array.shape[0] + extra, self.capacity), MISSING, dtype=array.dtype)
+            grown[:array.shape[0]] = array
+            setattr(self, name, grown)
+        for station_id in station_ids:
+            self.rows[station_id] = len(self.rows)
+
+    def _columns(self):
+        """Returns the indices of the written columns, oldest first."""
+        if self.count < self.capacity:
+            return np.arange(self.count)
+        return (np.arange(self.capacity) + self.cursor) % self.capacity
+
+    def samples(self, station_id):
+        """
+        Returns the distinct reported states of one station, oldest first.
+
+        Consecutive samples with the same `last_update` repeat one upstream report and
+        are returned once, like the rows the scraper stores.
+
+        Returns:
+            tuple: (last_update as seconds, bikes, stands) arrays, or None if the station is unknown.
+        """
+        with self._lock:
+            row = self.rows.get(station_id)
+            if row is None:
+                return None
+            columns = self._columns()
+            updated = self.updated[row, columns]
+            bikes = self.bikes[row, columns]
+            stands = self.stands[row, columns]
+
+        present = updated != MISSING
+        updated, bikes, stands = updated[present], bikes[present], stands[present]
+        changed = np.ones(len(updated), dtype=bool)
+        changed[1:] = updated[1:] != updated[:-1]
+        return updated[changed], bikes[changed], stands[changed]
+
+    def covers(self, station_id, since):
+        """
+        Returns True if every report of the station from `since` (seconds, naive local time) on is buffered.
+
+        The buffer is complete from the station's oldest buffered report onwards, so any
+        range starting at or after it can be served without the database.
+        """
+        samples = self.samples(station_id)
+        return samples is not None and len(samples[0]) > 0 and since >= samples[0][0]
+
+    def window(self, seconds, now=None):
+        """
+        Returns the samples of all stations taken in the last `seconds`.
+
+        Returns:
+            tuple: (station ids, times of shape (T,), bikes and stands as float arrays of
+            shape (stations, T) with NaN where a station was missing).
+        """
+        with self._lock:
+            columns = self._columns()
+            times = self.times[columns]
+            if now is None:
+                now = times[-1] if len(times) else 0.0
+            columns = columns[times >= now - seconds]
+            ids = np.fromiter(self.rows, dtype=np.int64, count=len(self.rows))
+            bikes = self.bikes[:, columns].astype(np.float64)
+            stands = self.stands[:, columns].astype(np.float64)
+            times = self.times[columns]
+
+        bikes[bikes == MISSING] = np.nan
+        stands[stands == MISSING] = np.nan
+        return ids, times, bikes, stands
+
+    def rolling_mean(self, seconds, now=None):
+        """
+        Returns the mean bikes and stands of every station over the last `seconds`.
+
+        Returns:
+            tuple: (station ids, mean bikes, mean stands); NaN for stations without samples.
+        """
+        ids, _, bikes, stands = self.window(seconds, now)
+        return ids, nan_mean(bikes), nan_mean(stands)
+
+    def trend(self, seconds, now=None):
+        """
+        Returns the least-squares slope of bikes and stands per hour for every station over the last `seconds`.
+
+        Returns:
+            tuple: (station ids, bikes per hour, stands per hour); NaN for stations with fewer than two samples.
+        """
+        ids, times, bikes, stands = self.window(seconds, now)
+        hours = (times - times.mean()) / 3600 if len(times) else times
+        return ids, slope(hours, bikes), slope(hours, stands)
+
+
+def nan_mean(values):
+    """Row means ignoring NaN, without warnings for empty rows."""
+    present = ~np.isnan(values)
+    counts = present.sum(axis=1)
+    totals = np.where(present, values, 0).sum(axis=1)
+    return np.divide(totals, counts, out=np.full(len(values), np.nan), where=counts > 0)
+
+
+def slope(x, values):
+    """
+    Least-squares slope of each row of `values` (stations, T) against `x` (T,), ignoring NaN.
+    """
+    present = ~np.isnan(values)
+    counts = present.sum(axis=1)
+    xs = np.where(present, x, 0)
+    ys = np.where(present, values, 0)
+    x_mean = np.divide(xs.sum(axis=1), counts, out=np.zeros(len(values)), where=counts > 0)
+    y_mean = np.divide(ys.sum(axis=1), counts, out=np.zeros(len(values)), where=counts > 0)
+    dx = np.where(present, x - x_mean[:, np.newaxis], 0)
+    dy = np.where(present, values - y_mean[:, np.newaxis], 0)
+    spread = (dx * dx).sum(axis=1)
+    return np.divide((dx * dy).sum(axis=1), spread, out=np.full(len(values), np.nan), where=(counts > 1) & (spread > 0))
+
+
+# === Shared Buffers, One per Contract ===
+availability_history = {contract: AvailabilityHistory() for contract in station_feeds}
+
+# Every refresh of a contract's feed appends one sample per station
+for contract, feed in station_feeds.items():
+    feed.add_listener(availability_history[contract].record)
@@ -1,8 +1,8 @@
-import requests
 import os
 from dotenv import load_dotenv
 from flask import jsonify
 import datetime
+from .metrics import span
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,9 +10,20 @@ load_dotenv()
 # Retrieve the Dublin Bike API key from environment variables
 API_KEY = os.getenv("BIKE_API_KEY")
 
-def get_all_stations():
+# JCDecaux station endpoint (overridable, e.g. with a local stub for load tests)
+STATIONS_URL = os.getenv("BIKE_STATIONS_URL", "https://api.jcdecaux.com/vls/v1/stations")
+
+# JCDecaux contracts (cities) served by this deployment, e.g. "dublin,lyon"; the first one is the default.
+# The scraper (local_db_setup/config.py) reads the same variable, so both serve the same cities
+CONTRACTS = [c.strip() for c in os.getenv("BIKE_NAME", "dublin").split(",") if c.strip()]
+DEFAULT_CONTRACT = CONTRACTS[0]
+
+def get_all_stations(contract=DEFAULT_CONTRACT):
     """
-    Fetches real-time Dublin bike station data from the JCDecaux API.
+    Fetches real-time bike station data of one JCDecaux contract (Dublin by default).
+
+    Parameters:
+    - contract (str): JCDecaux contract name, e.g. "dublin" or "lyon".
 
     Returns:
     - dict: A dictionary containing a list of bike stations with their details
@@ -23,7 +34,9 @@ def get_all_stations():
     if not API_KEY:
         raise ValueError("Missing Dublin Bike API key.")
     
-    res = requests.get('https://api.jcdecaux.com/vls/v1/stations', params={"apiKey": API_KEY, "contract": 'dublin'})
+    import requests  # Deferred to the first call: it takes ~130 ms to import
+    with span("upstream.jcdecaux"):
+        res = requests.get(STATIONS_URL, params={"apiKey": API_KEY, "contract": contract})
 
     # If the request is successful (status code 200), process the data
     if res.status_code == 200:
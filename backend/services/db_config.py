@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine
+import datetime
 from flask import g
 import os
 from dotenv import load_dotenv
+from .metrics import instrument_engine
 
 # Load environment variables
 load_dotenv()
@@ -11,11 +12,56 @@ PASSWORD = os.getenv("DB_PASSWORD")
 PORT = os.getenv("DB_PORT")
 URI = os.getenv("DB_URI")
 
+# Full SQLAlchemy URL overriding the MySQL settings, with "{db_name}" standing for the schema,
+# e.g. "sqlite:////tmp/loadtest/{db_name}.db" for the load-test database stand-in
+DATABASE_URL = os.getenv("DATABASE_URL")
+SCHEMAS = ("bike", "weather")
+
+# Log every SQL statement (verbose; query timings are available from /metrics instead)
+ECHO = os.getenv("DB_ECHO", "0") in ("1", "true", "True")
+
 # Connect to the database and create the engine
 def connect_to_db(db_name):
+    # Imported on the first connection, keeping SQLAlchemy (~350 ms) off the startup path
+    from sqlalchemy import create_engine
+    if DATABASE_URL:
+        engine = create_engine(DATABASE_URL.format(db_name=db_name), echo=ECHO)
+        if engine.dialect.name == "sqlite":
+            emulate_mysql_schemas(engine)
+        return instrument_engine(engine)
+
     connection_string = f"mysql+pymysql://{USER}:{PASSWORD}@{URI}:{PORT}/{db_name}"
-    engine = create_engine(connection_string, echo=True)
-    return engine
+    engine = create_engine(connection_string, echo=ECHO)
+    return instrument_engine(engine)
+
+def sql(statement):
+    """
+    Returns `statement` as an executable SQLAlchemy text clause; SQLAlchemy is imported on
+    first use like in `connect_to_db`, so callers need no import of their own.
+    """
+    from sqlalchemy import text
+    return text(statement)
+
+def emulate_mysql_schemas(engine):
+    """
+    Lets the MySQL queries run on SQLite files: every schema's file is attached under the
+    schema name (so "bike.availability" resolves), and DATE_FORMAT is provided.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def attach_schemas(dbapi_connection, connection_record):
+        for schema in SCHEMAS:
+            path = DATABASE_URL.format(db_name=schema).split(":///", 1)[1]
+            dbapi_connection.execute(f"ATTACH DATABASE '{path}' AS {schema}")
+        dbapi_connection.create_function("DATE_FORMAT", 2, mysql_date_format)
+
+def mysql_date_format(value, mysql_format):
+    """DATE_FORMAT for SQLite, covering the specifiers used by the routes."""
+    if value is None:
+        return None
+    python_format = mysql_format.replace("%i", "%M").replace("%s", "%S")
+    return datetime.datetime.fromisoformat(str(value)).strftime(python_format)
 
 # Store and reuse the database connection in Flask's 'g'
 def get_db(db_name):
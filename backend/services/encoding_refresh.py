@@ -0,0 +1,286 @@
+import datetime
+import json
+import os
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from .prediction import registry, MODEL_DIR, MODEL_CONTRACT
+from .model_registry import BUNDLE_FILES
+from .station_encoding import StationEncoding
+from . import db_config
+from .db_config import sql
+
+try:
+    import fcntl  # Unix only; elsewhere every process refreshes on its own
+except ImportError:
+    fcntl = None
+
+# Load environment variables from .env file
+load_dotenv()
+
+# === Encoding Refresh Settings ===
+ENCODING_REFRESH_SECONDS = float(os.getenv("ENCODING_REFRESH_SECONDS", 300))  # 0 disables the refresh
+# Weight of the trained encoding, in rows: one week of 5-minute samples per station
+ENCODING_PRIOR_ROWS = float(os.getenv("ENCODING_PRIOR_ROWS", 2016))
+# Smallest change of a station's encoding (bikes or stands) worth swapping in; every swap
+# starts a new encoding revision, which empties the forecast cache
+ENCODING_MIN_CHANGE = float(os.getenv("ENCODING_MIN_CHANGE", 0.1))
+ENCODING_STATE_DIR = os.path.join(MODEL_DIR, "encoding_state")
+TARGETS = ("bike", "stand")
+
+
+class EncodingState:
+    """
+    Running sums and counts of available bikes and stands per station since a bundle was
+    trained, plus the watermark (last `record_time` folded in). Stored per bundle version
+    in ENCODING_STATE_DIR, so a restart continues where the last refresh stopped.
+    """
+
+    def __init__(self, version, watermark, sums=None, counts=None):
+        self.version = version
+        self.watermark = watermark
+        self.sums = np.zeros((2, 0)) if sums is None else sums  # Rows: bike, stand; columns: station id
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+
+    @classmethod
+    def load(cls, bundle):
+        path = cls.path(bundle.version)
+        if os.path.exists(path):
+            with np.load(path) as state:
+                return cls(bundle.version, str(state["watermark"]), state["sums"], state["counts"])
+        return cls(bundle.version, trained_until(bundle))
+
+    @staticmethod
+    def path(version):
+        return os.path.join(ENCODING_STATE_DIR, f"{version}.npz")
+
+    def save(self):
+        # Written under a temporary name and renamed, so a crash never leaves a truncated state
+        os.makedirs(ENCODING_STATE_DIR, exist_ok=True)
+        tmp_path = f"{self.path(self.version)}.tmp-{os.getpid()}.npz"
+        np.savez(tmp_path, watermark=np.array(self.watermark), sums=self.sums, counts=self.counts)
+        os.replace(tmp_path, self.path(self.version))
+
+    def add(self, station_ids, bike_sums, stand_sums, counts):
+        """Folds per-station aggregates of new rows into the running sums."""
+        size = int(station_ids.max()) + 1 if len(station_ids) else 0
+        if size > len(self.counts):
+            self.sums = np.pad(self.sums, ((0, 0), (0, size - len(self.counts))))
+            self.counts = np.pad(self.counts, (0, size - len(self.counts)))
+        np.add.at(self.sums[0], station_ids, bike_sums)
+        np.add.at(self.sums[1], station_ids, stand_sums)
+        np.add.at(self.counts, station_ids, counts)
+
+
+def trained_until(bundle):
+    """
+    Returns the end of the bundle's training data (from its schema.json), whose rows the
+    trained encoding already covers. Legacy bundles without one start at the time their
+    encodings were pickled, so the history they were trained on is not counted twice.
+    """
+    # The version folder, not `bundle.path`, which is the shared copy in MODEL_SHARE_MODE=mmap
+    path = registry.version_path(bundle.version)
+    schema_path = os.path.join(path, "schema.json")
+    if os.path.exists(schema_path):
+        with open(schema_path) as f:
+            until = json.load(f).get("data", {}).get("to")
+        if until:
+            return until
+    pickled_at = min(os.path.getmtime(os.path.join(path, BUNDLE_FILES[f"{target}_encoding"])) for target in TARGETS)
+    return datetime.datetime.fromtimestamp(pickled_at).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def blend(prior, sums, counts, prior_rows=ENCODING_PRIOR_ROWS):
+    """
+    Combines a trained encoding with the running sums as a weighted mean, the trained
+    value counting as `prior_rows` rows. Stations unknown to the trained encoding get
+    the plain mean of their rows; stations without either stay unknown (NaN).
+
+    Returns:
+        StationEncoding: Encoding with its fallback (mean over known stations) precomputed.
+    """
+    size = max(len(prior.values), len(counts))
+    prior_values = np.full(size, np.nan)
+    prior_values[:len(prior.values)] = prior.values
+    sums = np.pad(sums, (0, size - len(sums)))
+    counts = np.pad(counts, (0, size - len(counts))).astype(np.float64)
+
+    has_prior = ~np.isnan(prior_values)
+    weight = np.where(has_prior, prior_rows, 0.0)
+    total = weight + counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = (np.where(has_prior, prior_values, 0.0) * weight + sums) / total
+    values[total == 0] = np.nan
+    known = values[~np.isnan(values)]
+    return StationEncoding(values, float(known.mean()) if len(known) else prior.fallback)
+
+
+def changed(old, new, min_change=ENCODING_MIN_CHANGE):
+    """
+    Returns True if `new` differs materially from `old`: a station gained or lost its
+    encoding, or some station's value moved by more than `min_change`.
+    """
+    if len(old.values) != len(new.values):
+        return True
+    known = ~np.isnan(new.values)
+    if (known != ~np.isnan(old.values)).any():
+        return True
+    return bool(known.any() and np.abs(new.values[known] - old.values[known]).max() > min_change)
+
+
+class EncodingRefresher:
+    """
+    Keeps the active bundle's station encodings current from `bike.availability`.
+
+    Every refresh aggregates only the rows recorded after the watermark, in the database
+    (sums and counts per station), adds them to the running totals and swaps the blended
+    encodings into the active bundle. New stations thereby get their own encoding instead
+    of the fallback, and established ones follow slow changes in their usage.
+
+    Of several processes sharing ENCODING_STATE_DIR (e.g. Gunicorn workers), only the one
+    holding its lock file queries the database and saves the state; the others load the
+    saved state. Encodings are only swapped when they change by more than ENCODING_MIN_CHANGE.
+    """
+
+    def __init__(self, contract=MODEL_CONTRACT):
+        self.contract = contract
+        self.state = None
+        self.base = {}  # Trained encodings of the state's version, per target
+        self.engine = None
+        self._thread = None
+        self._interval = 0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._lock_file = None  # Open while this process is the one refreshing from the database
+
+    def refresh(self):
+        """
+        Folds the rows recorded since the last refresh into the encodings of the active bundle.
+
+        Returns:
+            int: Rows folded in (0 if there was nothing new or no model is loaded).
+        """
+        bundle = registry.active
+        if bundle is None:
+            return 0
+        with self._lock:
+            # A (re)loaded state is swapped in even without new rows, e.g. after a restart
+            reload = self.state is None or self.state.version != bundle.version
+            if reload:
+                self.state = EncodingState.load(bundle)
+                # The active bundle of a new version still holds its trained encodings
+                self.base = {"bike": bundle.bike_encoding, "stand": bundle.stand_encoding}
+            if not self.is_leader():
+                # Another process aggregates the rows; pick up the state it saved
+                state = EncodingState.load(bundle)
+                if state.watermark == self.state.watermark and not reload:
+                    return 0
+                self.state = state
+                return self.swap(bundle, 0)
+
+            if self.engine is None:
+                self.engine = db_config.connect_to_db("bike")
+
+            with self.engine.connect() as conn:
+                params = {"contract": self.contract, "watermark": self.state.watermark}
+                upper = conn.execute(sql(
+                    "SELECT MAX(record_time) FROM bike.availability WHERE contract = :contract AND record_time > :watermark"
+                ), params).scalar()
+                if upper is None and not reload:
+                    return 0
+                rows = []
+                if upper is not None:
+                    # Bounded above, so rows inserted during the query are picked up by the next refresh
+                    upper = str(upper)[:19]
+                    rows = conn.execute(sql("""
+                        SELECT station_id, SUM(available_bikes), SUM(available_bike_stands), COUNT(*)
+                        FROM bike.availability
+                        WHERE contract = :contract AND record_time > :watermark AND record_time <= :upper
+                        GROUP BY station_id
+                    """), dict(params, upper=upper)).fetchall()
+
+            if rows:
+                aggregates = np.array(rows, dtype=np.float64)
+                self.state.add(aggregates[:, 0].astype(np.int64), aggregates[:, 1], aggregates[:, 2], aggregates[:, 3].astype(np.int64))
+            if upper is not None:
+                self.state.watermark = upper
+                self.state.save()
+            return self.swap(bundle, int(sum(row[3] for row in rows)))
+
+    def swap(self, bundle, folded):
+        """
+        Swaps the encodings blended from the current state into the active bundle, unless
+        they are within ENCODING_MIN_CHANGE of the ones it holds.
+
+        Returns:
+            int: `folded`, the rows folded in by this refresh.
+        """
+        encodings = [blend(self.base[target], self.state.sums[i], self.state.counts) for i, target in enumerate(TARGETS)]
+        if not any(changed(old, new) for old, new in zip((bundle.bike_encoding, bundle.stand_encoding), encodings)):
+            return folded
+        swapped = registry.swap_encodings(bundle.version, *encodings)
+        if swapped is not None:
+            print(f"Station encodings of '{bundle.version}' refreshed (revision {swapped.encoding_revision}, "
+                  f"{folded} new rows up to {self.state.watermark}, {len(encodings[0].index)} stations).")
+        return folded
+
+    def is_leader(self):
+        """
+        Returns True if this process refreshes from the database: it holds an exclusive lock
+        on ENCODING_STATE_DIR/refresh.lock, kept until it exits, so another process takes
+        over if it dies. Without fcntl (Windows) every process is its own leader.
+        """
+        if fcntl is None or self._lock_file is not None:
+            return True
+        os.makedirs(ENCODING_STATE_DIR, exist_ok=True)
+        lock_file = open(os.path.join(ENCODING_STATE_DIR, "refresh.lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def start(self, interval_seconds=ENCODING_REFRESH_SECONDS):
+        """
+        Starts a background thread refreshing every `interval_seconds`, if a database is configured.
+        Errors are reported and retried at the next interval. Calls after the first return at once,
+        so serving processes can call it per request (see app.py) and a preloading master never does.
+        """
+        if self._thread is not None or interval_seconds <= 0 or not (db_config.DATABASE_URL or db_config.URI):
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._interval = interval_seconds
+
+            def run():
+                while True:
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        print(f"Station encoding refresh failed: {e}")
+                    time.sleep(interval_seconds)
+
+            self._thread = threading.Thread(target=run, name="encoding-refresher", daemon=True)
+            self._thread.start()
+
+    def after_fork(self):
+        """
+        Restarts the refresh thread in a forked worker, with its own database engine. A lock
+        file inherited from the parent stays the parent's, so the worker competes for its own.
+        """
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._lock_file = None
+        self.engine = None
+        interval, running = self._interval, self._thread is not None
+        self._thread = None
+        if running:
+            self.start(interval)
+
+
+# === Shared Refresher for the Active Bundle ===
+encoding_refresher = EncodingRefresher()
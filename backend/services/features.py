@@ -0,0 +1,94 @@
+import datetime
+import numpy as np
+
+# Bumped whenever the features below change, so old bundles and cached matrices are not mixed up
+FEATURE_VERSION = 1
+
+# === Feature Columns Expected by Each Model ===
+FEATURE_COLUMNS = {
+    "bike": ['station_id_encoded1', 'max_air_temperature_celsius', 'hour', 'day_of_week'],
+    "stand": ['station_id_encoded2', 'max_air_temperature_celsius', 'hour', 'day_of_week'],
+}
+
+# Training data column each model predicts (named like the notebooks' training data)
+TARGET_COLUMNS = {
+    "bike": "num_bikes_available",
+    "stand": "num_docks_available",
+}
+
+
+def extract_features(timestamp):
+    """
+    Extracts day_of_week and hour from the input Unix timestamp.
+
+    Parameters:
+        timestamp (int): Unix timestamp.
+
+    Returns:
+        tuple: (day_of_week, hour)
+    """
+    dt = datetime.datetime.fromtimestamp(int(timestamp))
+    return dt.weekday(), dt.hour
+
+
+def time_features(timestamps):
+    """
+    Extracts day_of_week and hour for many Unix timestamps, once per distinct timestamp.
+
+    Returns:
+        tuple: (day_of_week, hour) as int64 arrays.
+    """
+    unique_timestamps, inverse = np.unique(np.asarray(timestamps, dtype=np.int64), return_inverse=True)
+    features = np.array([extract_features(t) for t in unique_timestamps], dtype=np.int64).reshape(-1, 2)
+    return features[inverse, 0], features[inverse, 1]
+
+
+def feature_frame(target, encoded, temps, hour, day_of_week):
+    """
+    Assembles the model input of `target` ("bike" or "stand") in the column order the
+    model was fitted with. Used by both serving and training.
+    """
+    import pandas as pd  # Deferred to the first prediction: it takes ~600 ms to import
+    return pd.DataFrame({
+        FEATURE_COLUMNS[target][0]: encoded,
+        'max_air_temperature_celsius': temps,
+        'hour': hour,
+        'day_of_week': day_of_week,
+    }, columns=FEATURE_COLUMNS[target])
+
+
+def fit_encoding(training_data, target):
+    """
+    Computes the station target encoding of `target`: mean availability per station.
+
+    Parameters:
+        training_data (DataFrame): Rows with `station_id` and the target column.
+
+    Returns:
+        Series: Encoding indexed by station_id (the format pickled in bundles).
+    """
+    return training_data.groupby("station_id")[TARGET_COLUMNS[target]].mean()
+
+
+def training_features(training_data, target, encoding):
+    """
+    Builds the model input and labels of `target` from training rows.
+
+    Parameters:
+        training_data (DataFrame): Rows with `station_id`, `last_reported`,
+                                   `max_air_temperature_celsius` and the target column.
+        encoding (StationEncoding): Station encoding of `target`, fitted on training rows only.
+
+    Returns:
+        tuple: (X DataFrame with FEATURE_COLUMNS[target], y ndarray)
+    """
+    import pandas as pd
+    last_reported = pd.to_datetime(training_data["last_reported"])
+    X = feature_frame(
+        target,
+        encoding.lookup(training_data["station_id"].to_numpy()),
+        training_data["max_air_temperature_celsius"].to_numpy(dtype=np.float64),
+        last_reported.dt.hour.to_numpy(dtype=np.int64),
+        last_reported.dt.dayofweek.to_numpy(dtype=np.int64),
+    )
+    return X, training_data[TARGET_COLUMNS[target]].to_numpy(dtype=np.float64)
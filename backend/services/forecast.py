@@ -0,0 +1,175 @@
+import datetime
+import threading
+import numpy as np
+from .prediction import predict_availability_batch, registry
+from .bike_api import DEFAULT_CONTRACT
+from .live_stations import CONTRACT_MARGIN_DEGREES
+from .db_config import sql
+
+# === Forecast Settings ===
+FORECAST_MAX_HOURS = 48  # OpenWeather's hourly forecast covers the next 48 hours
+FORECAST_CACHE_SIZE = 8  # Cached (contract, model version, forecast hour, horizon) responses
+
+
+class ForecastUnavailable(Exception):
+    """Raised when no model is loaded or no stored hourly forecast covers the requested hours."""
+
+
+def current_forecast_hour():
+    """Returns the start of the current hour in UTC as a naive datetime, like `forecast_hour` in the database."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def load_hourly_temperatures(engine, start_hour, hours, bounds=None):
+    """
+    Reads the hourly temperature forecast from the newest scrape in weather.hourly_forecast,
+    averaged over the weather points of the city.
+
+    Parameters:
+        engine (Engine): SQLAlchemy engine for the weather database.
+        start_hour (datetime): First forecast hour (naive UTC).
+        hours (int): Maximum number of hourly steps.
+        bounds (tuple): Optional (min_lat, min_lon, max_lat, max_lon) of the city's stations;
+            only forecasts scraped inside it are used.
+
+    Returns:
+        tuple: (Unix timestamps, temperatures in Celsius), one entry per forecast hour.
+    """
+    area = ""
+    params = {"start_hour": start_hour, "hours": hours}
+    if bounds is not None:
+        area = "AND position_lat BETWEEN :min_lat AND :max_lat AND position_lng BETWEEN :min_lon AND :max_lon"
+        params.update(zip(("min_lat", "min_lon", "max_lat", "max_lon"), bounds))
+
+    with engine.connect() as conn:
+        rows = conn.execute(sql(f"""
+            SELECT forecast_hour, AVG(temp)
+            FROM weather.hourly_forecast
+            WHERE record_hourly_time = (SELECT MAX(record_hourly_time) FROM weather.hourly_forecast WHERE 1 = 1 {area})
+              AND forecast_hour >= :start_hour
+              {area}
+            GROUP BY forecast_hour
+            ORDER BY forecast_hour
+            LIMIT :hours
+        """), params).fetchall()
+
+    timestamps = [int(row[0].replace(tzinfo=datetime.timezone.utc).timestamp()) for row in rows]
+    temps = [float(row[1]) for row in rows]
+    return timestamps, temps
+
+
+def predict_grid(station_ids, timestamps, temps, bundle, contract=DEFAULT_CONTRACT):
+    """
+    Predicts bikes and stands for every (hour, station) pair with one model call per target.
+
+    Returns:
+        tuple: (bikes, stands) as int arrays of shape (hours, stations), clipped at zero.
+    """
+    station_ids = np.asarray(station_ids)
+    n_hours, n_stations = len(timestamps), len(station_ids)
+
+    # Hour-major rows: all stations for the first hour, then all stations for the next one
+    ids = np.tile(station_ids, n_hours)
+    row_timestamps = np.repeat(timestamps, n_stations)
+    row_temps = np.repeat(temps, n_stations)
+
+    grids = []
+    for target in ("bike", "stand"):
+        predicted = predict_availability_batch(ids, row_timestamps, row_temps, target=target, bundle=bundle, contract=contract)
+        grids.append(np.clip(np.rint(predicted), 0, None).astype(int).reshape(n_hours, n_stations))
+    return tuple(grids)
+
+
+class ForecastCache:
+    """
+    City-wide availability forecasts, computed once per contract, model version, forecast hour and horizon.
+
+    A new hour or a newly activated model version produces a new key, so stale
+    entries are never served; the oldest entries are dropped beyond `max_entries`.
+
+    Forecasts are built outside the cache lock, so a slow build only holds up the
+    requests waiting for the same key; concurrent misses on one key build it once.
+    """
+
+    def __init__(self, max_entries=FORECAST_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = {}
+        self._building = {}  # key -> lock held while that forecast is built
+        self._lock = threading.Lock()
+
+    def get(self, engine, stations, hours, contract=DEFAULT_CONTRACT):
+        """
+        Returns the forecast for `stations` over the next `hours` hours, computing it on a cache miss.
+
+        Parameters:
+            engine (Engine): SQLAlchemy engine for the weather database.
+            stations (list): Station dictionaries as returned by `get_all_stations()['data']`.
+            hours (int): Number of hourly steps.
+            contract (str): Contract the stations belong to.
+
+        Returns:
+            dict: Columnar forecast, see `routes/forecast.py`.
+
+        Raises:
+            ForecastUnavailable: If no model is loaded or no forecast is stored.
+        """
+        bundle = registry.active
+        if bundle is None:
+            raise ForecastUnavailable("No prediction model is loaded.")
+
+        start_hour = current_forecast_hour()
+        key = (contract, bundle.key, start_hour, hours)
+        with self._lock:
+            forecast = self.entries.get(key)
+            if forecast is not None:
+                return forecast
+            key_lock = self._building.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Built meanwhile by the request that held the key lock
+            with self._lock:
+                forecast = self.entries.get(key)
+            if forecast is not None:
+                return forecast
+            try:
+                forecast = self.build(engine, stations, start_hour, hours, bundle, contract)
+                with self._lock:
+                    self.entries[key] = forecast
+                    while len(self.entries) > self.max_entries:
+                        self.entries.pop(next(iter(self.entries)))
+            finally:
+                with self._lock:
+                    if self._building.get(key) is key_lock:
+                        del self._building[key]
+        return forecast
+
+    def build(self, engine, stations, start_hour, hours, bundle, contract):
+        # Only use forecasts scraped around this city's stations
+        bounds = None
+        if stations:
+            margin = CONTRACT_MARGIN_DEGREES
+            bounds = (min(s["lat"] for s in stations) - margin, min(s["lon"] for s in stations) - margin,
+                      max(s["lat"] for s in stations) + margin, max(s["lon"] for s in stations) + margin)
+        timestamps, temps = load_hourly_temperatures(engine, start_hour, hours, bounds)
+        if not timestamps:
+            raise ForecastUnavailable("No hourly weather forecast is stored for the requested hours.")
+
+        station_ids = [s["id"] for s in stations]
+        bikes, stands = predict_grid(station_ids, timestamps, temps, bundle, contract)
+        return {
+            "contract": contract,
+            "version": bundle.version,
+            "hour": timestamps,
+            "temp": temps,
+            "station": {
+                "id": station_ids,
+                "lat": [s["lat"] for s in stations],
+                "lon": [s["lon"] for s in stations],
+            },
+            "bikes": bikes.tolist(),
+            "stands": stands.tolist(),
+        }
+
+
+# === Shared Forecast Cache ===
+forecast_cache = ForecastCache()
@@ -0,0 +1,66 @@
+import numpy as np
+from .metrics import timed
+
+# === Journey Cost Model (all terms in minutes) ===
+WALK_SPEED_KMH = 5.0  # Average walking speed
+RIDE_SPEED_KMH = 15.0  # Average city cycling speed
+SHORTAGE_MINUTES = 10.0  # Penalty for a station with a single bike or stand left, shrinking as the margin grows
+MAX_TOP_K = 20  # Largest number of alternatives returned
+
+
+@timed("journey.rank")
+def rank_journeys(walk_to_start_km, ride_km, walk_from_dest_km, bikes, stands, top_k, same_station=None):
+    """
+    Scores every (start, destination) station pair and returns the `top_k` cheapest feasible pairs.
+
+    The cost of a pair is the time spent walking and riding plus a penalty that grows as
+    the bikes at the start or the stands at the destination run low, so a slightly longer
+    journey with more room to spare wins over one that depends on the last bike.
+
+    Parameters:
+        walk_to_start_km (array): Walking distance to each start candidate, shape (S,).
+        ride_km (array): Riding distance between candidates, shape (S, D).
+        walk_from_dest_km (array): Walking distance from each destination candidate, shape (D,).
+        bikes (array): Available (or predicted) bikes per start candidate, shape (S,).
+        stands (array): Available (or predicted) stands per destination candidate, shape (D,).
+        top_k (int): Number of pairs to return.
+        same_station (array): Optional (S, D) mask of pairs that are the same station.
+
+    Returns:
+        list: `(start_index, dest_index, cost)` tuples for feasible pairs, cheapest first.
+        `cost` holds `walk_km`, `ride_km` and `minutes`.
+    """
+    walk_to_start_km = np.asarray(walk_to_start_km, dtype=np.float64)
+    walk_from_dest_km = np.asarray(walk_from_dest_km, dtype=np.float64)
+    ride_km = np.asarray(ride_km, dtype=np.float64)
+    bikes = np.asarray(bikes, dtype=np.float64)
+    stands = np.asarray(stands, dtype=np.float64)
+
+    # Per-candidate terms first, then one broadcast over all pairs
+    start_minutes = walk_to_start_km / WALK_SPEED_KMH * 60 + SHORTAGE_MINUTES / np.maximum(bikes, 1)
+    dest_minutes = walk_from_dest_km / WALK_SPEED_KMH * 60 + SHORTAGE_MINUTES / np.maximum(stands, 1)
+    minutes = start_minutes[:, np.newaxis] + ride_km * (60 / RIDE_SPEED_KMH) + dest_minutes[np.newaxis, :]
+
+    # Pairs without a bike to take, a stand to return to, or a ride at all are never offered
+    infeasible = (bikes <= 0)[:, np.newaxis] | (stands <= 0)[np.newaxis, :]
+    if same_station is not None:
+        infeasible = infeasible | same_station
+    minutes[infeasible] = np.inf
+
+    flat = minutes.ravel()
+    k = min(top_k, int(np.isfinite(flat).sum()))
+    if k == 0:
+        return []
+
+    # Partial selection of the k cheapest pairs, then sort only those
+    best = np.argpartition(flat, k - 1)[:k]
+    best = best[np.argsort(flat[best], kind="stable")]
+
+    ranked = []
+    for start_index, dest_index in zip(*np.unravel_index(best, minutes.shape)):
+        ranked.append((int(start_index), int(dest_index), {
+            "walk_km": round(float(walk_to_start_km[start_index] + walk_from_dest_km[dest_index]), 3),
+            "ride_km": round(float(ride_km[start_index, dest_index]), 3),
+            "minutes": round(float(minutes[start_index, dest_index]), 1),
+        }))
+    return ranked
@@ -0,0 +1,347 @@
+import threading
+import time
+import os
+from collections import deque
+import numpy as np
+from dotenv import load_dotenv
+from .bike_api import get_all_stations, CONTRACTS, DEFAULT_CONTRACT
+
+# Load environment variables from .env file
+load_dotenv()
+
+# === Feed Settings ===
+REFRESH_SECONDS = float(os.getenv("STATION_REFRESH_SECONDS", 30))  # Interval between upstream polls
+FRAME_BUFFER_SIZE = int(os.getenv("STATION_STREAM_BUFFER", 32))  # Delta frames kept for slow clients
+HEARTBEAT_SECONDS = 15  # Keep-alive interval for idle stream connections
+CONTRACT_MARGIN_DEGREES = 0.05  # Points this close outside a contract's stations (~5 km) still route to it
+DEFAULT_CENTRE = (53.3476, -6.2637)  # Dublin city centre, for contracts without stations
+
+
+class StationSnapshot:
+    """
+    An immutable view of all stations returned by one upstream poll.
+
+    Attributes:
+        version (int): Monotonic snapshot number, increased on every successful refresh.
+        stations (list): Station dictionaries in the same shape as `get_all_stations()['data']`.
+        fetched_at (float): Unix time at which the snapshot was fetched.
+        contract (str): JCDecaux contract the stations belong to.
+        bounds (tuple): (min_lat, min_lon, max_lat, max_lon) of the stations, or None if empty.
+    """
+
+    def __init__(self, version, stations, fetched_at, contract=DEFAULT_CONTRACT):
+        self.version = version
+        self.stations = stations
+        self.fetched_at = fetched_at
+        self.contract = contract
+        self.bounds = station_bounds(stations)
+
+
+def station_bounds(stations):
+    """Returns the (min_lat, min_lon, max_lat, max_lon) box of `stations`, or None if there are none."""
+    if not stations:
+        return None
+    lats = [s["lat"] for s in stations]
+    lons = [s["lon"] for s in stations]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+class ContractUnavailable(Exception):
+    """Raised when a point's contract cannot be told because a contract's stations could not be fetched."""
+
+
+class StationFeed:
+    """
+    Polls the JCDecaux API from a single background thread and fans the results
+    out to any number of readers.
+
+    Readers never trigger upstream calls themselves: request handlers read the
+    latest snapshot, and stream clients follow a shared, bounded buffer of delta
+    frames using their own cursor. A client that falls behind the buffer is
+    re-synchronised with a full snapshot instead of replaying stale frames.
+
+    Snapshot versions count from 1 in every process, so stream event ids carry the
+    feed's epoch (process id and start time) as well: a cursor from another worker or
+    an earlier server run is recognised and answered with a full snapshot.
+    """
+
+    def __init__(self, contract=DEFAULT_CONTRACT, refresh_seconds=REFRESH_SECONDS, buffer_size=FRAME_BUFFER_SIZE):
+        self.contract = contract
+        self.created = time.time()
+        self.refresh_seconds = refresh_seconds
+        self.snapshot = None
+        self.frames = deque(maxlen=buffer_size)  # (version, changed stations)
+        self.evicted_version = 0  # Newest frame version that has been dropped from the buffer
+        self.listeners = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Starts the refresh thread if it is not already running."""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"station-feed-{self.contract}", daemon=True)
+            self._thread.start()
+
+    def add_listener(self, callback):
+        """
+        Registers a callback invoked with every new StationSnapshot from the refresh thread.
+        """
+        self.listeners.append(callback)
+
+    @property
+    def epoch(self):
+        """Identifies this feed's version sequence; the process id tells forked workers apart."""
+        return f"{os.getpid():x}-{int(self.created * 1000):x}"
+
+    def event_id(self, version):
+        """Returns the stream event id of snapshot `version`, e.g. "1a2b-18f3c2d4e5f.12"."""
+        return f"{self.epoch}.{version}"
+
+    def parse_event_id(self, event_id):
+        """
+        Returns the snapshot version a stream client's Last-Event-ID points to, or 0 (a full
+        snapshot is due) if it is missing, malformed or from another process or server run.
+        """
+        epoch, _, version = (event_id or "").rpartition(".")
+        if epoch != self.epoch or not version.isdigit():
+            return 0
+        return int(version)
+
+    def is_fresh(self):
+        """Returns True if the latest snapshot is recent enough to serve requests from."""
+        return self.snapshot is not None and time.time() - self.snapshot.fetched_at < 2 * self.refresh_seconds
+
+    def refresh(self):
+        """
+        Fetches stations once and publishes the new snapshot and its delta frame.
+
+        Returns:
+        - StationSnapshot: The published snapshot, or None if the upstream call failed.
+        """
+        result = get_all_stations(self.contract)
+        if "data" not in result:
+            print(f"Station feed refresh failed for {self.contract} (Status: {result.get('status')})")
+            return None
+
+        stations = result["data"]
+        previous = self.snapshot
+
+        # Only stations whose live details changed are sent to stream clients
+        if previous is None:
+            changed = stations
+        else:
+            old_details = {s["id"]: s["details"] for s in previous.stations}
+            changed = [s for s in stations if old_details.get(s["id"]) != s["details"]]
+
+        version = previous.version + 1 if previous else 1
+        snapshot = StationSnapshot(version, stations, time.time(), self.contract)
+
+        with self._condition:
+            self.snapshot = snapshot
+            if changed:
+                if len(self.frames) == self.frames.maxlen:
+                    self.evicted_version = self.frames[0][0]
+                self.frames.append((version, changed))
+            self._condition.notify_all()
+
+        for callback in self.listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Station feed listener failed: {e}")
+
+        return snapshot
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Station feed refresh failed: {e}")
+            time.sleep(self.refresh_seconds)
+
+    def wait_for_update(self, cursor, timeout=HEARTBEAT_SECONDS):
+        """
+        Blocks until a snapshot newer than `cursor` is available or the timeout expires.
+
+        Parameters:
+            cursor (int): Last snapshot version seen by the client (0 if none).
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            tuple: (event, payload, new_cursor) where event is "snapshot", "delta" or None
+            (timeout). A "snapshot" event is returned to new clients, to clients that
+            fell behind the frame buffer and to cursors ahead of this feed.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.snapshot is not None and self.snapshot.version != cursor,
+                timeout=timeout,
+            )
+            snapshot = self.snapshot
+            if snapshot is None or snapshot.version == cursor:
+                return None, None, cursor
+
+            # Clients whose missing frames were dropped, or whose cursor this feed has not
+            # reached (it counted elsewhere), get a full snapshot instead of wrong deltas
+            if cursor == 0 or cursor < self.evicted_version or cursor > snapshot.version:
+                return "snapshot", snapshot.stations, snapshot.version
+
+            # Collapse the buffered deltas so each station is sent once
+            merged = {}
+            for version, changed in self.frames:
+                if version <= cursor:
+                    continue
+                for station in changed:
+                    merged[station["id"]] = station
+            return "delta", list(merged.values()), snapshot.version
+
+
+class SnapshotCache:
+    """
+    Keeps one object derived from a station list (e.g. a lookup index) per key,
+    usually the contract, rebuilt with `factory(stations)` only when a different
+    list is passed in for that key.
+
+    Snapshot lists are never modified once published, so checking the list's
+    identity is enough to tell whether the derived object is still valid. Each
+    contract has its own slot, so a new snapshot of one city never invalidates
+    the objects of another.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.current = {}  # key -> (station list, derived object), each entry replaced as one reference
+        self._lock = threading.Lock()
+
+    def get(self, stations, key=DEFAULT_CONTRACT):
+        """Returns the object derived from `stations`, building it on first use."""
+        source, derived = self.current.get(key, (None, None))
+        if stations is source:
+            return derived
+
+        with self._lock:
+            source, derived = self.current.get(key, (None, None))
+            if stations is not source:
+                derived = self.factory(stations)
+                self.current[key] = (stations, derived)
+            return derived
+
+
+# One shared feed per contract for the whole process; `station_feed` is the default contract's
+station_feeds = {contract: StationFeed(contract) for contract in CONTRACTS}
+station_feed = station_feeds[DEFAULT_CONTRACT]
+
+
+def get_station_snapshot(contract=DEFAULT_CONTRACT):
+    """
+    Returns the current station list of a contract, served from its shared feed when it is fresh.
+
+    The first call starts the feed. Until the feed has published a recent snapshot,
+    stations are fetched directly from the JCDecaux API.
+
+    Parameters:
+    - contract (str): One of CONTRACTS.
+
+    Returns:
+    - dict: Same shape as `get_all_stations()`.
+    """
+    feed = station_feeds[contract]
+    feed.start()
+
+    if feed.is_fresh():
+        return {"data": feed.snapshot.stations}
+    return get_all_stations(contract)
+
+
+def contracts_for_points(lats, lons):
+    """
+    Returns, for every point, the contract whose stations surround it.
+
+    A contract matches if the point lies within the bounding box of its stations,
+    widened by CONTRACT_MARGIN_DEGREES; if several match, the smallest box wins.
+    Points outside every contract fall back to DEFAULT_CONTRACT. Only one bounding
+    box per contract is checked, so routing costs the same however many stations
+    each city has. Contracts whose feed has no snapshot yet are fetched directly,
+    like `get_station_snapshot`; if that fails too, points outside every other
+    contract may belong to it and get None instead of a guess.
+
+    Parameters:
+        lats, lons (array-like): Point coordinates in decimal degrees.
+
+    Returns:
+        numpy.ndarray: Contract name per point, or None where it cannot be told yet.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if len(station_feeds) == 1:
+        return np.full(len(lats), DEFAULT_CONTRACT, dtype=object)
+
+    contracts = np.full(len(lats), DEFAULT_CONTRACT, dtype=object)
+    best_area = np.full(len(lats), np.inf)
+    unknown = False
+
+    margin = CONTRACT_MARGIN_DEGREES
+    for contract, feed in station_feeds.items():
+        feed.start()
+        if feed.snapshot is not None:
+            bounds = feed.snapshot.bounds
+        else:
+            result = get_station_snapshot(contract)
+            unknown = unknown or "data" not in result
+            bounds = station_bounds(result.get("data"))
+        if bounds is None:
+            continue
+
+        min_lat, min_lon, max_lat, max_lon = bounds
+        area = (max_lat - min_lat + 2 * margin) * (max_lon - min_lon + 2 * margin)
+        inside = ((lats >= min_lat - margin) & (lats <= max_lat + margin)
+                  & (lons >= min_lon - margin) & (lons <= max_lon + margin) & (area < best_area))
+        contracts[inside] = contract
+        best_area[inside] = area
+
+    if unknown:
+        contracts[np.isinf(best_area)] = None
+    return contracts
+
+
+def contract_for_point(lat, lon):
+    """Returns the contract whose stations surround (lat, lon); see `contracts_for_points`."""
+    return contracts_for_points([lat], [lon])[0]
+
+
+def contract_centre(contract):
+    """
+    Returns the (lat, lon) centre of the bounding box of a contract's stations, e.g. for
+    city-wide weather lookups; DEFAULT_CENTRE if the contract has no stations.
+    """
+    stations = get_station_snapshot(contract).get("data")
+    if not stations:
+        return DEFAULT_CENTRE
+    lats = [s["lat"] for s in stations]
+    lons = [s["lon"] for s in stations]
+    return (min(lats) + max(lats)) / 2, (min(lons) + max(lons)) / 2
+
+
+def resolve_contract(params, lat=None, lon=None):
+    """
+    Picks the contract for a request: the `contract` query parameter if given,
+    otherwise the contract around (lat, lon) if given, otherwise the default one.
+
+    Raises:
+        ValueError: If the `contract` parameter names a contract that is not served.
+        ContractUnavailable: If the contract around (lat, lon) cannot be told yet.
+    """
+    contract = params.get("contract")
+    if contract is not None:
+        if contract not in station_feeds:
+            raise ValueError(f"Unknown contract '{contract}'. Available: {', '.join(CONTRACTS)}.")
+        return contract
+    if lat is not None and lon is not None:
+        contract = contract_for_point(lat, lon)
+        if contract is None:
+            raise ContractUnavailable("Stations are temporarily unavailable for some cities; pass 'contract' to choose one.")
+        return contract
+    return DEFAULT_CONTRACT
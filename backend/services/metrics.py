@@ -0,0 +1,228 @@
+import bisect
+import os
+import threading
+import time
+from functools import wraps
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# === Metrics Settings ===
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values -> count
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self.values.items())
+        for labels, value in items:
+            yield self.name, self.labelnames, labels, value
+
+
+class Histogram:
+    """
+    Counts of observations per bucket, plus their sum, per label combination.
+
+    Only the bucket an observation falls into is incremented; the cumulative
+    counts Prometheus expects are computed when the metrics are rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self.values.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", self.labelnames + ("le",), labels + (le,), cumulative
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, total
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labelnames, labels, value in metric.samples():
+                label_text = ",".join(f'{k}="{escape_label(v)}"' for k, v in zip(labelnames, labels))
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value):
+    """Escapes a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# === Shared Registry and Application Metrics ===
+registry = MetricsRegistry()
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route", "status"))
+span_duration = registry.histogram(
+    "span_duration_seconds", "Time spent in instrumented operations (upstream calls, queries, predictions).", ("span",))
+span_errors = registry.counter(
+    "span_errors_total", "Instrumented operations that raised an exception.", ("span",))
+predicted_rows = registry.counter(
+    "prediction_rows_total", "Rows passed to the prediction models.", ("target",))
+
+
+class span:
+    """
+    Context manager timing the enclosed block into `span_duration_seconds{span=name}`.
+
+    Span names are dotted by kind, e.g. "upstream.jcdecaux", "db.query" or "predict.bike".
+    A plain class rather than a generator keeps the cost to about a microsecond per span.
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if METRICS_ENABLED:
+            span_duration.observe(time.perf_counter() - self.start, self.name)
+            if exc_type is not None:
+                span_errors.inc(self.name)
+        return False
+
+
+def timed(name):
+    """Decorator form of `span`."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine):
+    """
+    Records every SQL statement executed through `engine` as a "db.query" span,
+    using SQLAlchemy cursor events.
+    """
+    if not METRICS_ENABLED:
+        return engine
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span_duration.observe(time.perf_counter() - conn.info["query_start"].pop(), "db.query")
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        span_errors.inc("db.query")
+
+    return engine
+
+
+class RequestTimer:
+    """
+    WSGI middleware timing every request into `request_duration`, by HTTP method, route
+    pattern and status code.
+
+    All labels come from the WSGI call itself: the method from the environ, the status
+    from `start_response`, and the route from the request object Werkzeug stores in the
+    environ as "werkzeug.request" (read in `start_response`, as Flask clears it once the
+    request context ends). No Flask context proxy is touched, each access of which would
+    cost about a microsecond.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+        route_status = ["unmatched", "500"]
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            rule = getattr(environ.get("werkzeug.request"), "url_rule", None)
+            # Unmatched URLs share one label, so scanners cannot create unbounded series
+            route_status[:] = rule.rule if rule is not None else "unmatched", status_line[:3]
+            return start_response(status_line, headers, exc_info)
+
+        response = self.wsgi_app(environ, recording_start_response)
+        labels = (environ.get("REQUEST_METHOD", "GET"), *route_status)
+        # The histogram's _count series doubles as the request counter
+        request_duration.observe(time.perf_counter() - start, *labels)
+        return response
+
+
+def init_app(app):
+    """
+    Times every request of `app`, across all blueprints, by HTTP method, route
+    pattern (e.g. "/api/stations/<int:station_id>/nearest") and status code, with a
+    RequestTimer around `app.wsgi_app`. Streamed responses are timed until their
+    body starts, like the other requests.
+    """
+    if not METRICS_ENABLED:
+        return
+    app.wsgi_app = RequestTimer(app.wsgi_app)
@@ -0,0 +1,413 @@
+import contextlib
+import copy
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+import warnings
+import numpy as np
+from .station_encoding import StationEncoding
+from .tree_engine import compile_model, is_compilable
+
+# === Artifact File Names (shared by the legacy folder and versioned bundles) ===
+BUNDLE_FILES = {
+    "bike_model": "bike_availability_model.pkl",
+    "stand_model": "stand_availability_model.pkl",
+    "bike_encoding": "station_bike_encoding.pkl",
+    "stand_encoding": "station_stand_encoding.pkl",
+}
+LEGACY_VERSION = "legacy"  # Version name of the unversioned pickles in the model folder
+
+# === Memory-Mappable Copy of a Bundle (written to `<bundle>/shared/`) ===
+SHARED_DIR = "shared"
+SHARED_FILES = {
+    "bike_model": "bike_availability_model.joblib",
+    "stand_model": "stand_availability_model.joblib",
+    "bike_encoding": "station_bike_encoding.npy",
+    "stand_encoding": "station_stand_encoding.npy",
+}
+
+
+class ModelBundle:
+    """
+    A loaded, self-consistent set of prediction artifacts: the bike and stand
+    models together with the station encodings they were trained with.
+    """
+
+    def __init__(self, version, path, artifacts, load_seconds, memory_bytes):
+        self.version = version
+        self.path = path
+        self.bike_model = artifacts["bike_model"]
+        self.stand_model = artifacts["stand_model"]
+        self.bike_encoding = artifacts["bike_encoding"]
+        self.stand_encoding = artifacts["stand_encoding"]
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.loaded_at = time.time()
+        self.encoding_revision = 0  # Bumped each time refreshed station encodings are swapped in
+
+    @property
+    def key(self):
+        """Identifies the predictions this bundle makes: version plus encoding revision."""
+        return self.version, self.encoding_revision
+
+    def with_encodings(self, bike_encoding, stand_encoding):
+        """Returns a copy sharing this bundle's models, with other station encodings."""
+        bundle = copy.copy(self)
+        bundle.bike_encoding = bike_encoding
+        bundle.stand_encoding = stand_encoding
+        bundle.encoding_revision = self.encoding_revision + 1
+        return bundle
+
+    def info(self):
+        """Returns version, load time and memory usage as a JSON-serializable dict."""
+        return {
+            "version": self.version,
+            "path": self.path,
+            "model_type": type(self.bike_model).__name__,
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_bytes": self.memory_bytes,
+            "loaded_at": self.loaded_at,
+            "encoding_revision": self.encoding_revision,
+        }
+
+
+def estimate_memory(obj, seen=None):
+    """
+    Estimates the memory held by `obj`, following containers, instance attributes
+    and array buffers (numpy arrays and pandas objects report their own size).
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if hasattr(obj, "memory_usage") and callable(obj.memory_usage):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if hasattr(obj, "nbytes") and hasattr(obj, "dtype"):
+        return max(sys.getsizeof(obj), int(obj.nbytes))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_memory(k, seen) + estimate_memory(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_memory(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_memory(vars(obj), seen)
+    return size
+
+
+@contextlib.contextmanager
+def matching_sklearn_version(filename):
+    """
+    Raises instead of warning when an estimator unpickled in the block was saved with
+    another scikit-learn version, whose predictions may silently differ.
+    """
+    from sklearn.exceptions import InconsistentVersionWarning
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", InconsistentVersionWarning)
+        try:
+            yield
+        except InconsistentVersionWarning as w:
+            raise RuntimeError(
+                f"{filename} was saved with scikit-learn {w.original_sklearn_version}, but "
+                f"{w.current_sklearn_version} is installed; install the version pinned in requirements.txt"
+            ) from None
+
+
+def source_fingerprint(path):
+    """Returns a short hash of the size and modification time of the bundle files in `path`."""
+    digest = hashlib.sha1()
+    for filename in BUNDLE_FILES.values():
+        stat = os.stat(os.path.join(path, filename))
+        digest.update(f"{filename}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def load_bundle(path, version):
+    """
+    Unpickles the four artifacts in `path` and measures load time and memory size.
+
+    Parameters:
+        path (str): Folder containing the files listed in BUNDLE_FILES.
+        version (str): Version name recorded on the bundle.
+
+    Returns:
+        ModelBundle: The loaded bundle.
+    """
+    start = time.perf_counter()
+    artifacts = {}
+    for key, filename in BUNDLE_FILES.items():
+        with open(os.path.join(path, filename), "rb") as f, matching_sklearn_version(filename):
+            artifacts[key] = pickle.load(f)
+
+    # Keep encodings as flat arrays rather than pandas objects
+    for key in ("bike_encoding", "stand_encoding"):
+        if not isinstance(artifacts[key], StationEncoding):
+            artifacts[key] = StationEncoding.from_series(artifacts[key])
+    load_seconds = time.perf_counter() - start
+
+    memory_bytes = sum(estimate_memory(artifact) for artifact in artifacts.values())
+    return ModelBundle(version, path, artifacts, load_seconds, memory_bytes)
+
+
+def export_shared_bundle(bundle, path):
+    """
+    Writes `bundle` in the memory-mappable format read by `load_shared_bundle`.
+
+    Models are stored with joblib, which keeps their numpy arrays in the file
+    uncompressed; encodings are stored as raw .npy arrays. The folder is written
+    under a temporary name and renamed, so concurrent workers never read a partial copy.
+    """
+    import joblib
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+
+    joblib.dump(bundle.bike_model, os.path.join(tmp_path, SHARED_FILES["bike_model"]))
+    joblib.dump(bundle.stand_model, os.path.join(tmp_path, SHARED_FILES["stand_model"]))
+    np.save(os.path.join(tmp_path, SHARED_FILES["bike_encoding"]), bundle.bike_encoding.values)
+    np.save(os.path.join(tmp_path, SHARED_FILES["stand_encoding"]), bundle.stand_encoding.values)
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another worker exported the same bundle first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load_shared_bundle(path, version):
+    """
+    Loads a bundle written by `export_shared_bundle` with all arrays memory-mapped
+    read-only. Every process mapping the same files shares one copy in the page cache.
+    """
+    import joblib
+    start = time.perf_counter()
+    with matching_sklearn_version(SHARED_FILES["bike_model"]):
+        bike_model = joblib.load(os.path.join(path, SHARED_FILES["bike_model"]), mmap_mode="r")
+    with matching_sklearn_version(SHARED_FILES["stand_model"]):
+        stand_model = joblib.load(os.path.join(path, SHARED_FILES["stand_model"]), mmap_mode="r")
+    artifacts = {
+        "bike_model": bike_model,
+        "stand_model": stand_model,
+        "bike_encoding": StationEncoding(np.load(os.path.join(path, SHARED_FILES["bike_encoding"]), mmap_mode="r")),
+        "stand_encoding": StationEncoding(np.load(os.path.join(path, SHARED_FILES["stand_encoding"]), mmap_mode="r")),
+    }
+    load_seconds = time.perf_counter() - start
+
+    memory_bytes = sum(estimate_memory(artifact) for artifact in artifacts.values())
+    return ModelBundle(version, path, artifacts, load_seconds, memory_bytes)
+
+
+def compile_bundle(bundle):
+    """
+    Replaces the bundle's tree models with CompiledForest arrays where predictions match exactly.
+    Other models are left unchanged. Returns the bundle.
+    """
+    start = time.perf_counter()
+    bundle.bike_model = compile_model(bundle.bike_model)
+    bundle.stand_model = compile_model(bundle.stand_model)
+    bundle.load_seconds += time.perf_counter() - start
+    bundle.memory_bytes = sum(
+        estimate_memory(a) for a in (bundle.bike_model, bundle.stand_model, bundle.bike_encoding, bundle.stand_encoding)
+    )
+    return bundle
+
+
+class ModelRegistry:
+    """
+    Tracks versioned model bundles and serves the active one.
+
+    Versioned bundles live in `<artifacts_dir>/<version>/`; version names must sort
+    in release order (e.g. `2025-04-20_1200`). Bundles should be written under a
+    temporary name and renamed into place, so a half-copied folder is never picked
+    up. The unversioned pickles in `model_dir` are the `legacy` version.
+
+    A new version is loaded and warmed with `smoke_test` before it replaces the
+    active bundle. The swap is a single reference assignment, so requests that
+    already hold the previous bundle finish with it and are never blocked.
+
+    With `share_mode="mmap"`, each bundle is converted once to a memory-mappable
+    copy, and every worker process maps that copy instead of unpickling its own.
+
+    With `engine="compiled"`, tree models are replaced by CompiledForest arrays
+    when their predictions match sklearn exactly; bundles without tree models are
+    left as they are.
+    """
+
+    def __init__(self, model_dir, artifacts_dir, smoke_test=None, history_size=3, share_mode="none",
+                 engine="sklearn"):
+        self.model_dir = model_dir
+        self.artifacts_dir = artifacts_dir
+        self.smoke_test = smoke_test
+        self.share_mode = share_mode
+        self.engine = engine
+        self.history_size = history_size
+        self.active = None
+        self.history = []  # Info of recently activated bundles, newest first
+        self.failed = {}  # version -> error message
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._loader = None
+
+    def available_versions(self):
+        """Returns the loadable versions, oldest first."""
+        versions = []
+        if all(os.path.exists(os.path.join(self.model_dir, f)) for f in BUNDLE_FILES.values()):
+            versions.append(LEGACY_VERSION)
+
+        if os.path.isdir(self.artifacts_dir):
+            for name in sorted(os.listdir(self.artifacts_dir)):
+                path = os.path.join(self.artifacts_dir, name)
+                if all(os.path.exists(os.path.join(path, f)) for f in BUNDLE_FILES.values()):
+                    versions.append(name)
+        return versions
+
+    def version_path(self, version):
+        """Returns the folder holding the artifacts of `version`."""
+        if version == LEGACY_VERSION:
+            return self.model_dir
+        return os.path.join(self.artifacts_dir, version)
+
+    def compile(self, bundle):
+        """Compiles the bundle's tree models if the registry's engine asks for it."""
+        if self.engine != "compiled" or not any(is_compilable(m) for m in (bundle.bike_model, bundle.stand_model)):
+            return bundle
+        return compile_bundle(bundle)
+
+    def load(self, version):
+        """Loads `version` according to the registry's share mode and engine, without activating it."""
+        path = self.version_path(version)
+        if self.share_mode != "mmap":
+            return self.compile(load_bundle(path, version))
+
+        # One shared copy per engine and state of the source pickles, so retrained pickles
+        # (e.g. the legacy ones next to the notebooks) get a new copy instead of a stale one
+        shared_name = f"{SHARED_DIR}_{self.engine}"
+        if version == LEGACY_VERSION:
+            shared_name = f"{shared_name}_{LEGACY_VERSION}"
+        shared_name = f"{shared_name}_{source_fingerprint(path)}"
+        shared_path = os.path.join(path, shared_name)
+        if not os.path.isdir(shared_path):
+            export_shared_bundle(self.compile(load_bundle(path, version)), shared_path)
+        return load_shared_bundle(shared_path, version)
+
+    def activate(self, version):
+        """
+        Loads, warms and activates `version`.
+
+        Returns:
+            ModelBundle: The newly active bundle.
+
+        Raises:
+            Exception: If loading or the smoke test fails; the previous bundle stays active.
+        """
+        with self._load_lock:
+            bundle = self.load(version)
+            if self.smoke_test is not None:
+                self.smoke_test(bundle)
+
+            self.active = bundle
+            self.history = ([bundle.info()] + self.history)[:self.history_size]
+            self.failed.pop(version, None)
+
+        print(f"Model version '{version}' activated "
+              f"({bundle.load_seconds:.3f}s, {bundle.memory_bytes / 1024:.1f} KiB).")
+        return bundle
+
+    def swap_encodings(self, version, bike_encoding, stand_encoding):
+        """
+        Replaces the station encodings of the active bundle if it is still `version`,
+        keeping its models. Like activation, the swap is one reference assignment.
+
+        Returns:
+            ModelBundle: The new active bundle, or None if another version became active meanwhile.
+        """
+        with self._load_lock:
+            if self.active is None or self.active.version != version:
+                return None
+            self.active = self.active.with_encodings(bike_encoding, stand_encoding)
+            return self.active
+
+    def refresh(self):
+        """
+        Activates the newest available version if it is not active yet.
+
+        Versions that failed to load or warm up are not retried. Errors are
+        reported, never raised.
+
+        Returns:
+            ModelBundle: The active bundle, or None if nothing could be loaded.
+        """
+        candidates = [v for v in self.available_versions() if v not in self.failed]
+        if not candidates:
+            if self.active is None:
+                print(f"No loadable model version found in {self.model_dir}.")
+            return self.active
+
+        latest = candidates[-1]
+        if self.active is not None and self.active.version == latest:
+            return self.active
+
+        try:
+            return self.activate(latest)
+        except Exception as e:
+            self.failed[latest] = str(e)
+            print(f"Failed to activate model version '{latest}': {e}")
+            return self.active
+
+    def load_in_background(self):
+        """Starts a thread activating the newest version, so startup does not wait for the model."""
+        if self._loader is not None:
+            return
+        self._loader = threading.Thread(target=self.refresh, name="model-loader", daemon=True)
+        self._loader.start()
+
+    @property
+    def loading(self):
+        """True while a background load started by `load_in_background` is running."""
+        return self._loader is not None and self._loader.is_alive()
+
+    def start_watcher(self, interval_seconds):
+        """Starts a background thread that calls `refresh` every `interval_seconds`."""
+        if self._watcher is not None or interval_seconds <= 0:
+            return
+        self._watcher_interval = interval_seconds
+
+        def watch():
+            while True:
+                time.sleep(interval_seconds)
+                self.refresh()
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def after_fork(self):
+        """
+        Restarts the watcher thread in a forked worker; threads do not survive `fork()`.
+        A background load the parent started is restarted in the worker too, unless it
+        finished first, instead of leaving the worker waiting on the parent's dead thread.
+        """
+        self._load_lock = threading.Lock()
+        resume_load = self._loader is not None and self.active is None
+        self._loader = None
+        if resume_load:
+            self.load_in_background()
+        interval = self._watcher_interval if self._watcher is not None else 0
+        self._watcher = None
+        self.start_watcher(interval)
+
+    def info(self):
+        """Returns the active version, recent loads and failed versions."""
+        return {
+            "active": self.active.version if self.active else None,
+            "loading": self.loading,
+            "loaded": self.history,
+            "failed": self.failed,
+        }
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from .prediction import predict_availability_batch, registry
+from .weather_api import get_weather_by_coordinate
+from .live_stations import station_feeds, REFRESH_SECONDS
+from .availability_history import availability_history, slope
+
+# Load environment variables from .env file
+load_dotenv()
+
+# === Nowcast Settings ===
+NOWCAST_MAX_MINUTES = float(os.getenv("NOWCAST_MAX_MINUTES", 60))  # Longest horizon served from the nowcast
+NOWCAST_STEP_MINUTES = 5  # Spacing of the precomputed horizons, interpolated in between
+TREND_MINUTES = 30  # Window of live samples the trend is fitted on
+MIN_TREND_MINUTES = 5  # Shorter sample spans (e.g. right after startup) give no trend
+TREND_DAMPING_MINUTES = 20  # Time constant over which the live trend flattens out
+RESIDUAL_DECAY_MINUTES = 45  # Time constant over which the gap between live counts and the model closes
+WEATHER_REFRESH_SECONDS = 600  # Current temperature is fetched at most this often per contract
+DEFAULT_TEMPERATURE = 10.0  # Used until the first weather lookup succeeds (Celsius)
+
+
+class Nowcast:
+    """
+    Bikes and stands of every station of one contract for the next NOWCAST_MAX_MINUTES,
+    precomputed on a grid of horizons every NOWCAST_STEP_MINUTES.
+
+    For a horizon of h minutes each station's value is
+
+        model(t + h) + (live - model(t)) * exp(-h / RESIDUAL_DECAY_MINUTES)
+                     + trend * TREND_DAMPING_MINUTES * (1 - exp(-h / TREND_DAMPING_MINUTES))
+
+    so short horizons follow the live count and its recent trend, and longer ones
+    converge on the model's baseline. Values are clipped to [0, capacity].
+    """
+
+    def __init__(self, snapshot, version, station_ids, minutes, bikes, stands):
+        self.fetched_at = snapshot.fetched_at
+        self.snapshot_version = snapshot.version
+        self.version = version  # ModelBundle.key the grids were computed with
+        self.minutes = minutes
+        self.bikes = bikes  # Shape (horizons, stations)
+        self.stands = stands
+        self.positions = {station_id: i for i, station_id in enumerate(station_ids)}
+
+    @classmethod
+    def build(cls, snapshot, history, bundle, temp):
+        """
+        Computes the nowcast of all stations in a StationSnapshot with one model call per target.
+
+        Parameters:
+            snapshot (StationSnapshot): Latest live snapshot.
+            history (AvailabilityHistory): The contract's recent samples, for the trend.
+            bundle (ModelBundle): Model version providing the baseline.
+            temp (float): Current temperature in Celsius, used for every horizon.
+        """
+        stations = snapshot.stations
+        station_ids = np.array([s["id"] for s in stations], dtype=np.int64)
+        live_bikes = np.array([s["details"]["available_bikes"] for s in stations], dtype=np.float64)
+        live_stands = np.array([s["details"]["available_bike_stands"] for s in stations], dtype=np.float64)
+        capacity = np.array([s["details"].get("capacity") or 0 for s in stations], dtype=np.float64)
+        capacity = np.maximum(capacity, live_bikes + live_stands)
+
+        # Trend per minute, aligned with the snapshot order; stations without one are flat
+        _, times, bike_samples, stand_samples = history.window(TREND_MINUTES * 60, now=snapshot.fetched_at)
+        rows = np.fromiter((history.rows.get(i, -1) for i in station_ids.tolist()), dtype=np.int64, count=len(station_ids))
+        known = rows >= 0
+        trends = [np.zeros(len(station_ids)), np.zeros(len(station_ids))]
+        if len(times) and times[-1] - times[0] >= MIN_TREND_MINUTES * 60:
+            x = (times - times.mean()) / 60
+            for trend, samples in zip(trends, (bike_samples, stand_samples)):
+                trend[known] = np.nan_to_num(slope(x, samples)[rows[known]])
+
+        # Model baseline for every (horizon, station), horizon-major
+        minutes = np.arange(0, NOWCAST_MAX_MINUTES + NOWCAST_STEP_MINUTES, NOWCAST_STEP_MINUTES, dtype=np.float64)
+        timestamps = np.repeat((snapshot.fetched_at + minutes * 60).astype(np.int64), len(station_ids))
+        ids_tiled = np.tile(station_ids, len(minutes))
+
+        h = minutes[:, np.newaxis]
+        residual_weight = np.exp(-h / RESIDUAL_DECAY_MINUTES)
+        trend_reach = TREND_DAMPING_MINUTES * (1 - np.exp(-h / TREND_DAMPING_MINUTES))
+
+        grids = []
+        for target, live, trend in (("bike", live_bikes, trends[0]), ("stand", live_stands, trends[1])):
+            baseline = np.asarray(
+                predict_availability_batch(ids_tiled, timestamps, temp, target=target, bundle=bundle, contract=snapshot.contract),
+                dtype=np.float64
+            ).reshape(len(minutes), len(station_ids))
+            grid = baseline + (live - baseline[0]) * residual_weight + trend * trend_reach
+            grids.append(np.clip(grid, 0, capacity))
+
+        return cls(snapshot, bundle.key, station_ids.tolist(), minutes, *grids)
+
+    def predict(self, station_ids, timestamp, target="bike"):
+        """
+        Returns the nowcast for `station_ids` at `timestamp`, interpolated between horizons.
+
+        Returns:
+            numpy.ndarray: One value per station, or None if the timestamp is outside the
+            nowcast's horizon or a station is not covered.
+        """
+        offset = (timestamp - self.fetched_at) / 60
+        if not -NOWCAST_STEP_MINUTES <= offset <= self.minutes[-1]:
+            return None
+        try:
+            columns = [self.positions[station_id] for station_id in station_ids]
+        except KeyError:
+            return None
+
+        grid = self.bikes if target == "bike" else self.stands
+        offset = max(offset, 0.0)
+        step = min(int(offset // NOWCAST_STEP_MINUTES), len(self.minutes) - 2)
+        fraction = (offset - self.minutes[step]) / NOWCAST_STEP_MINUTES
+        return grid[step, columns] * (1 - fraction) + grid[step + 1, columns] * fraction
+
+
+class NowcastStore:
+    """
+    Latest Nowcast per contract, rebuilt from the feed thread on every refresh.
+
+    Requests only read the stored grids, so short-horizon predictions cost a lookup
+    instead of a model call. A grid is only served while its snapshot is fresh and
+    its model version and station encodings are still the active ones.
+    """
+
+    def __init__(self):
+        self.current = {}  # contract -> Nowcast
+        self.temperatures = {}  # contract -> (fetched at, Celsius)
+        self._lock = threading.Lock()
+
+    def refresh(self, snapshot):
+        """Feed listener: rebuilds the nowcast of the snapshot's contract."""
+        bundle = registry.active
+        if bundle is None or not snapshot.stations:
+            return
+        nowcast = Nowcast.build(snapshot, availability_history[snapshot.contract], bundle, self.temperature(snapshot))
+        with self._lock:
+            self.current[snapshot.contract] = nowcast
+
+    def temperature(self, snapshot):
+        """Returns the current temperature around the contract's stations, fetched at most every WEATHER_REFRESH_SECONDS."""
+        fetched_at, temp = self.temperatures.get(snapshot.contract, (0.0, DEFAULT_TEMPERATURE))
+        if time.time() - fetched_at < WEATHER_REFRESH_SECONDS:
+            return temp
+
+        min_lat, min_lon, max_lat, max_lon = snapshot.bounds
+        try:
+            weather = get_weather_by_coordinate((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+            if weather["status"] == 200:
+                temp = float(weather["data"]["temp"])
+        except Exception as e:
+            print(f"Nowcast weather lookup failed for {snapshot.contract}: {e}")
+        # Failures are retried after the same interval, keeping the previous temperature meanwhile
+        self.temperatures[snapshot.contract] = (time.time(), temp)
+        return temp
+
+    def predict(self, contract, station_ids, timestamp, target="bike"):
+        """
+        Returns nowcast availability for `station_ids` at `timestamp`, or None if the
+        nowcast cannot serve it (horizon too long, stale snapshot, new model version).
+        """
+        nowcast = self.current.get(contract)
+        active = registry.active
+        if nowcast is None or active is None or nowcast.version != active.key:
+            return None
+        if time.time() - nowcast.fetched_at > 2 * REFRESH_SECONDS:
+            return None
+        return nowcast.predict(station_ids, timestamp, target)
+
+
+# === Shared Nowcasts, Rebuilt on Every Feed Refresh ===
+nowcasts = NowcastStore()
+
+for feed in station_feeds.values():
+    feed.add_listener(nowcasts.refresh)
@@ -1,63 +1,133 @@
-import pickle
 import datetime
-import pandas as pd
+import json
+import numpy as np
 import os
+from .model_registry import ModelRegistry
+from .prediction_batcher import PredictionBatcher
+from . import metrics
+from .metrics import span, predicted_rows
+from .features import FEATURE_COLUMNS, time_features, feature_frame
 
 # === File Paths for Models and Encoded Mappings ===
 MODEL_DIR = os.path.join(os.getcwd(), "machine_learning")
-BIKE_MODEL_PATH = os.path.join(MODEL_DIR, 'bike_availability_model.pkl')
-STAND_MODEL_PATH = os.path.join(MODEL_DIR, 'stand_availability_model.pkl')
-BIKE_ENCODED_PATH = os.path.join(MODEL_DIR, 'station_bike_encoding.pkl')
-STAND_ENCODED_PATH = os.path.join(MODEL_DIR, 'station_stand_encoding.pkl')
+ARTIFACTS_DIR = os.path.join(MODEL_DIR, "artifacts")  # Versioned bundles: artifacts/<version>/*.pkl
 
-# === Global Variables for In-Memory Caching ===
-bike_model = None
-stand_model = None
-mean_bike_encoded = None
-mean_stand_encoded = None
+# Seconds between checks for a new model version (0 disables hot reloading)
+MODEL_RELOAD_SECONDS = float(os.getenv("MODEL_RELOAD_SECONDS", 60))
 
-def load_model():
-    """
-    Load prediction models and station_id encodings into memory if not already loaded.
+# "mmap" shares read-only model arrays between worker processes instead of unpickling per worker
+MODEL_SHARE_MODE = os.getenv("MODEL_SHARE_MODE", "none")
+
+# "compiled" serves tree ensembles from flat NumPy arrays instead of sklearn's predict path;
+# bundles without tree ensembles (e.g. the linear models) are always served by sklearn
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "sklearn")
+
+# Micro-batching of concurrent predictions: latency cap per request and maximum rows per model call
+PREDICTION_BATCH_WAIT_MS = float(os.getenv("PREDICTION_BATCH_WAIT_MS", 2))
+PREDICTION_BATCH_SIZE = int(os.getenv("PREDICTION_BATCH_SIZE", 512))
+PREDICTION_TIMEOUT_SECONDS = float(os.getenv("PREDICTION_TIMEOUT_SECONDS", 5))  # Longest wait for batched results
+
+# Contract (city) the models were trained on. Station ids repeat across contracts, so
+# stations of any other contract are predicted with the fallback station encoding
+MODEL_CONTRACT = os.getenv("MODEL_CONTRACT", "dublin")
+
+# "eager" loads the model before the app serves; "background" loads it in a thread so the
+# server starts at once, and /api/ready answers 503 until a model is active
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "eager")
+
+def smoke_test(bundle):
     """
-    global bike_model, stand_model, mean_bike_encoded, mean_stand_encoded
+    Warms up a freshly loaded bundle with a small prediction batch before it goes live.
 
-    if bike_model is None:
-        with open(BIKE_MODEL_PATH, "rb") as f:
-            bike_model = pickle.load(f)
-        print("Bike model loaded.")
+    Raises:
+        ValueError: If the bundle was trained on other features than FEATURE_COLUMNS (per its
+            schema.json), or returns the wrong number of predictions or non-finite values.
+    """
+    schema_path = os.path.join(bundle.path, "schema.json")
+    if os.path.exists(schema_path):
+        with open(schema_path) as f:
+            if json.load(f).get("features") != FEATURE_COLUMNS:
+                raise ValueError(f"Version '{bundle.version}' was trained on other features than the server provides.")
+
+    station_ids = list(bundle.bike_encoding.index[:8])
+    timestamp = int(datetime.datetime.now().timestamp())
+    for target in ("bike", "stand"):
+        predictions = predict_availability_batch(
+            station_ids, [timestamp] * len(station_ids), 10.0, target=target, bundle=bundle
+        )
+        if len(predictions) != len(station_ids) or not np.isfinite(predictions).all():
+            raise ValueError(f"Smoke test failed for the {target} model of version '{bundle.version}'.")
 
-    if stand_model is None:
-        with open(STAND_MODEL_PATH, "rb") as f:
-            stand_model = pickle.load(f)
-        print("Stand model loaded.")
+# === Registry Holding the Active Model Version ===
+registry = ModelRegistry(
+    MODEL_DIR, ARTIFACTS_DIR, smoke_test=smoke_test, share_mode=MODEL_SHARE_MODE, engine=MODEL_ENGINE
+)
 
-    if mean_bike_encoded is None:
-        with open(BIKE_ENCODED_PATH, "rb") as f:
-            mean_bike_encoded = pickle.load(f)
-        print("Bike station encoding loaded.")
+def load_model():
+    """
+    Load prediction models and station_id encodings into memory if not already loaded.
 
-    if mean_stand_encoded is None:
-        with open(STAND_ENCODED_PATH, "rb") as f:
-            mean_stand_encoded = pickle.load(f)
-        print("Stand station encoding loaded.")
+    The newest available version is activated, and a background thread keeps checking
+    for newer versions. Load failures are reported instead of raised, so the server can
+    start without a usable model. With MODEL_LOAD_MODE=background the first version is
+    activated in a thread too, and nothing is returned until it is.
+    """
+    if MODEL_LOAD_MODE == "background" and registry.active is None:
+        registry.load_in_background()
+        bundle = None
+    else:
+        bundle = registry.active or registry.refresh()
+    registry.start_watcher(MODEL_RELOAD_SECONDS)
 
-    return bike_model, stand_model
+    if bundle is None:
+        return None, None
+    return bundle.bike_model, bundle.stand_model
 
-def extract_features(timestamp):
+def predict_availability_batch(station_ids, timestamps, temps, target="bike", bundle=None, contract=MODEL_CONTRACT):
     """
-    Extracts day_of_week and hour from the input Unix timestamp.
-    
+    Predicts bike or stand availability for many (station, timestamp, temperature) rows at once.
+
     Parameters:
-        timestamp (int): Unix timestamp.
-    
+        station_ids (list): IDs of the bike stations.
+        timestamps (list): Unix timestamps, one per station.
+        temps (float or list): Max air temperature in Celsius, either shared or one per station.
+        target (str): "bike" or "stand".
+        bundle (ModelBundle): Bundle to predict with; defaults to the active version.
+        contract (str): Contract of the stations; outside MODEL_CONTRACT every station gets the fallback encoding.
+
     Returns:
-        tuple: (day_of_week, hour)
+        numpy.ndarray: Predicted availability, one value per row.
     """
-    dt = datetime.datetime.fromtimestamp(int(timestamp))
-    return dt.weekday(), dt.hour
+    if target not in FEATURE_COLUMNS:
+        raise ValueError("Invalid target specified. Use 'bike' or 'stand'.")
+
+    # Hold on to one bundle for the whole call, even if a new version is activated meanwhile
+    bundle = bundle or registry.active
+    if bundle is None:
+        raise RuntimeError("No prediction model is loaded.")
 
-def predict_availability(station_id, timestamp, temp, target="bike"):
+    if target == "bike":
+        model, encoding = bundle.bike_model, bundle.bike_encoding
+    else:
+        model, encoding = bundle.stand_model, bundle.stand_encoding
+
+    with span(f"predict.{target}"):
+        # Encode station_id based on historical availability; unknown stations get the mean,
+        # as do all stations of other contracts (their ids would hit unrelated Dublin stations)
+        if contract == MODEL_CONTRACT:
+            encoded = encoding.lookup(station_ids)
+        else:
+            encoded = np.full(len(station_ids), encoding.fallback)
+
+        # Same feature assembly as the training pipeline (services/features.py)
+        day_of_week, hour = time_features(timestamps)
+        input_data = feature_frame(target, encoded, temps, hour, day_of_week)
+
+        if metrics.METRICS_ENABLED:
+            predicted_rows.inc(target, amount=len(input_data))
+        return model.predict(input_data)
+
+def predict_availability(station_id, timestamp, temp, target="bike", contract=MODEL_CONTRACT):
     """
     Predicts bike or stand availability for a given station, timestamp, and temperature.
     
@@ -66,38 +136,40 @@ def predict_availability(station_id, timestamp, temp, target="bike"):
         timestamp (int): Unix timestamp.
         temp (float): Max air temperature in Celsius.
         target (str): "bike" or "stand".
+        contract (str): Contract of the station.
     
     Returns:
         float: Predicted availability.
     """
-    global bike_model, stand_model, mean_bike_encoded, mean_stand_encoded
-
-    # Extract time-based features
-    day_of_week, hour = extract_features(timestamp)
-
-    if target == "bike":
-        # Encode station_id based on historical bike availability
-        station_id_encoded = mean_bike_encoded.get(station_id, mean_bike_encoded.mean())
-
-        input_data = pd.DataFrame(
-            [[station_id_encoded, temp, hour, day_of_week]],
-            columns=['station_id_encoded1', 'max_air_temperature_celsius', 'hour', 'day_of_week']
-        )
-
-        prediction = bike_model.predict(input_data)[0]
-
-    elif target == "stand":
-        # Encode station_id based on historical stand availability
-        station_id_encoded = mean_stand_encoded.get(station_id, mean_stand_encoded.mean())
+    return predict_availability_batch([station_id], [timestamp], [temp], target=target, contract=contract)[0]
+
+# === Shared Batcher Combining Predictions From Concurrent Requests ===
+batcher = PredictionBatcher(
+    lambda station_ids, timestamps, temps, target, contract: predict_availability_batch(
+        station_ids, timestamps, temps, target, contract=contract
+    ),
+    max_batch_size=PREDICTION_BATCH_SIZE,
+    max_wait_ms=PREDICTION_BATCH_WAIT_MS,
+    timeout_seconds=PREDICTION_TIMEOUT_SECONDS,
+)
+
+def predict_availability_many(station_ids, timestamp, temp, target="bike", contract=MODEL_CONTRACT):
+    """
+    Predicts availability for several stations at one timestamp and temperature.
 
-        input_data = pd.DataFrame(
-            [[station_id_encoded, temp, hour, day_of_week]],
-            columns=['station_id_encoded2', 'max_air_temperature_celsius', 'hour', 'day_of_week']
-        )
+    The rows are queued on the shared batcher, so predictions requested by concurrent
+    requests within a few milliseconds run as one model call per target.
 
-        prediction = stand_model.predict(input_data)[0]
+    Parameters:
+        station_ids (list): IDs of the bike stations.
+        timestamp (int): Unix timestamp.
+        temp (float): Max air temperature in Celsius.
+        target (str): "bike" or "stand".
+        contract (str): Contract of the stations.
 
-    else:
+    Returns:
+        list: Predicted availability, one value per station.
+    """
+    if target not in FEATURE_COLUMNS:
         raise ValueError("Invalid target specified. Use 'bike' or 'stand'.")
-
-    return prediction
\ No newline at end of file
+    return batcher.predict_many(station_ids, timestamp, temp, target, contract)
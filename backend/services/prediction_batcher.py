@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class PredictionBatcher:
+    """
+    Collects prediction requests from concurrent callers and runs them as one
+    vectorized batch per target model and contract.
+
+    A single worker thread waits for the first pending request, then keeps
+    collecting for at most `max_wait_ms` or until `max_batch_size` requests are
+    queued. Each caller gets a Future that is resolved with its own result, so
+    the added latency per request is bounded by `max_wait_ms` plus one batch.
+    Callers stop waiting after `timeout_seconds`, so a stalled worker never
+    blocks a request thread for good.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=512, max_wait_ms=2.0, timeout_seconds=5.0):
+        """
+        Parameters:
+            predict_batch (callable): `predict_batch(station_ids, timestamps, temps, target, contract)`
+                returning one prediction per row.
+            max_batch_size (int): Maximum number of requests per batch.
+            max_wait_ms (float): Maximum time to wait for more requests after the first one.
+            timeout_seconds (float): Maximum time `predict_many` waits for its results.
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout_seconds
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Starts the worker thread if it is not running (again, should it have died)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="prediction-batcher", daemon=True)
+                self._thread.start()
+
+    def after_fork(self):
+        """Drops the worker thread and queue inherited from the parent process."""
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, station_id, timestamp, temp, target="bike", contract=None):
+        """
+        Queues one prediction.
+
+        Returns:
+            Future: Resolved with the predicted availability, or with the batch's exception.
+        """
+        self.start()
+        future = Future()
+        self._queue.put((station_id, timestamp, temp, (target, contract), future))
+        return future
+
+    def predict_many(self, station_ids, timestamp, temp, target="bike", contract=None):
+        """
+        Queues predictions for several stations at the same time and temperature and
+        waits for all of them.
+
+        Returns:
+            list: Predicted availability, one value per station.
+
+        Raises:
+            TimeoutError: If the results are not ready within `timeout_seconds`.
+        """
+        futures = [self.submit(station_id, timestamp, temp, target, contract) for station_id in station_ids]
+        deadline = time.perf_counter() + self.timeout
+        return [future.result(timeout=max(0.0, deadline - time.perf_counter())) for future in futures]
+
+    def _collect(self):
+        # Block for the first request, then gather more until the deadline or size cap
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Past the deadline, only take what is already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # One model call per target and contract
+            by_model = {}
+            for item in batch:
+                by_model.setdefault(item[3], []).append(item)
+
+            for model_key, items in by_model.items():
+                try:
+                    self._predict(items, *model_key)
+                except Exception:
+                    # Retry one by one, so a single bad input only fails its own caller
+                    for item in items:
+                        try:
+                            self._predict([item], *model_key)
+                        except Exception as e:
+                            if not item[4].done():
+                                item[4].set_exception(e)
+
+    def _predict(self, items, target, contract):
+        station_ids, timestamps, temps, _, futures = zip(*items)
+        predictions = self.predict_batch(list(station_ids), list(timestamps), list(temps), target, contract)
+        if len(predictions) != len(futures):
+            # Checked before resolving any future, so the caller's retry covers every row
+            raise ValueError(f"predict_batch returned {len(predictions)} predictions for {len(futures)} rows.")
+        for future, prediction in zip(futures, predictions):
+            future.set_result(prediction)
@@ -0,0 +1,167 @@
+import cProfile
+import hmac
+import os
+import threading
+import time
+import tracemalloc
+from dotenv import load_dotenv
+from sampling_profiler import SamplingProfiler
+
+# Load environment variables from .env file
+load_dotenv()
+
+# === Profiling Settings ===
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") in ("1", "true", "True")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # Required in the X-Profile-Token header; profiling is off without it
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.getcwd(), "profiles"))
+PROFILE_MIN_INTERVAL = float(os.getenv("PROFILE_MIN_INTERVAL", 10))  # Seconds between two profiles of this process
+MAX_TRACEMALLOC_SECONDS = 30  # Longest allocation-tracing window
+PROFILE_MODES = ("cprofile", "sample")
+
+
+class ProfileLimiter:
+    """
+    Allows one profile at a time per process, at most once every `min_interval` seconds,
+    so the hooks can stay compiled in without a flood of profiled requests slowing the server.
+    """
+
+    def __init__(self, min_interval=PROFILE_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self.last_started = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Returns True if a profile may start now; the caller must then `release()`."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        if time.monotonic() - self.last_started < self.min_interval:
+            self._lock.release()
+            return False
+        self.last_started = time.monotonic()
+        return True
+
+    def release(self):
+        self._lock.release()
+
+
+class RequestProfile:
+    """One running cProfile or sampling profile of the current thread."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.started = time.time()
+        if mode == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = SamplingProfiler({threading.get_ident()}).start()
+
+    def finish(self, label):
+        """
+        Stops profiling and stores the artifact in PROFILE_DIR.
+
+        Returns:
+            str: Artifact file name (.prof for cProfile stats, .folded for sampled stacks).
+        """
+        if self.mode == "cprofile":
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        extension = "prof" if self.mode == "cprofile" else "folded"
+        name = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}-{os.getpid()}-{safe_label(label)}.{extension}"
+        path = os.path.join(PROFILE_DIR, name)
+        if self.mode == "cprofile":
+            self.profiler.dump_stats(path)
+        else:
+            self.profiler.write(path)
+        return name
+
+
+def safe_label(label):
+    """Turns a route like "/api/plan-journey" into a file-name friendly "api_plan-journey"."""
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in label.strip("/")) or "root"
+
+
+def trace_allocations(seconds, top=30):
+    """
+    Traces memory allocations of the whole process for `seconds` and stores the
+    allocation sites that grew the most in PROFILE_DIR.
+
+    Returns:
+        tuple: (artifact file name, list of {"site", "size_kib", "count"} for the `top` sites).
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(16)
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+
+    stats = after.compare_to(before, "lineno")
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-tracemalloc.txt"
+    with open(os.path.join(PROFILE_DIR, name), "w") as file:
+        for stat in stats:
+            file.write(f"{stat}\n")
+
+    sites = [
+        {"site": str(stat.traceback[0]), "size_kib": round(stat.size_diff / 1024, 1), "count": stat.count_diff}
+        for stat in stats[:top]
+    ]
+    return name, sites
+
+
+def authorized(headers):
+    """Returns True if profiling is enabled and the request carries the profiling token."""
+    if not PROFILING_ENABLED or not PROFILING_TOKEN:
+        return False
+    return hmac.compare_digest(headers.get("X-Profile-Token", ""), PROFILING_TOKEN)
+
+
+# === Shared Limiter for Request Profiles and Allocation Windows ===
+limiter = ProfileLimiter()
+
+
+def init_app(app):
+    """
+    Lets authorized requests ask for their own profile with an `X-Profile: cprofile` or
+    `X-Profile: sample` header. The artifact is stored in PROFILE_DIR and its name is
+    returned in the `X-Profile-Artifact` response header; requests arriving while another
+    profile runs or within PROFILE_MIN_INTERVAL are served unprofiled.
+    """
+    if not PROFILING_ENABLED:
+        return
+    from flask import g, request
+
+    @app.before_request
+    def start_profile():
+        mode = request.headers.get("X-Profile")
+        if mode not in PROFILE_MODES or not authorized(request.headers) or not limiter.acquire():
+            return
+        g.request_profile = RequestProfile(mode)
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop("request_profile", None)
+        if profile is not None:
+            try:
+                response.headers["X-Profile-Artifact"] = profile.finish(request.path)
+            finally:
+                limiter.release()
+        return response
+
+    @app.teardown_request
+    def abandon_profile(exception):
+        # Requests that failed before after_request still release the profiler
+        profile = g.pop("request_profile", None)
+        if profile is not None:
+            try:
+                profile.finish(request.path)
+            finally:
+                limiter.release()
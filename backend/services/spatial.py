@@ -0,0 +1,75 @@
+import numpy as np
+from utils import haversine_array
+from .live_stations import SnapshotCache
+
+# === Batch Lookup Settings ===
+MAX_POINTS = 10000  # Points accepted per request
+MAX_K = 20  # Nearest stations returned per point
+CHUNK_POINTS = 512  # Points per vectorized distance block, bounding temporary memory
+
+
+class StationIndex:
+    """
+    Station coordinates and availability of one snapshot as flat arrays, for
+    answering nearest-station queries for many points at once.
+
+    Points are processed in chunks: each chunk is one (points, stations) distance
+    block, a partial selection of the k smallest distances per row, and a sort
+    of those k only.
+    """
+
+    def __init__(self, stations):
+        self.stations = stations
+        self.ids = np.array([s["id"] for s in stations], dtype=np.int64)
+        self.lat = np.array([s["lat"] for s in stations], dtype=np.float64)
+        self.lon = np.array([s["lon"] for s in stations], dtype=np.float64)
+        self.bikes = np.array([s["details"]["available_bikes"] for s in stations])
+        self.stands = np.array([s["details"]["available_bike_stands"] for s in stations])
+
+    def query(self, lats, lons, k, min_bikes=0, min_stands=0, max_km=None):
+        """
+        Finds the `k` nearest stations to every point.
+
+        Parameters:
+            lats, lons (array): Point coordinates in decimal degrees, shape (P,).
+            k (int): Stations per point.
+            min_bikes (int): Skip stations with fewer available bikes.
+            min_stands (int): Skip stations with fewer available stands.
+            max_km (float): Skip stations further away than this.
+
+        Returns:
+            tuple: (positions, distances), both shape (P, k'), where k' = min(k, number of stations).
+            Positions index `self.stations`, nearest first; slots without a matching station
+            have position -1 and distance inf.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        k = min(k, len(self.stations))
+        positions = np.full((len(lats), k), -1, dtype=np.int64)
+        distances = np.full((len(lats), k), np.inf)
+        if k == 0:
+            return positions, distances
+
+        # Stations failing the availability filters are never selected
+        excluded = (self.bikes < min_bikes) | (self.stands < min_stands)
+
+        for start in range(0, len(lats), CHUNK_POINTS):
+            stop = min(start + CHUNK_POINTS, len(lats))
+            block = haversine_array(lats[start:stop, np.newaxis], lons[start:stop, np.newaxis], self.lat, self.lon)
+            block[:, excluded] = np.inf
+            if max_km is not None:
+                block[block > max_km] = np.inf
+
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+            nearest_distances = np.take_along_axis(block, nearest, axis=1)
+            order = np.argsort(nearest_distances, axis=1, kind="stable")
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            nearest_distances = np.take_along_axis(nearest_distances, order, axis=1)
+
+            positions[start:stop] = np.where(np.isfinite(nearest_distances), nearest, -1)
+            distances[start:stop] = nearest_distances
+        return positions, distances
+
+
+# === Shared Index for the Live Station Set ===
+station_indexes = SnapshotCache(StationIndex)
@@ -0,0 +1,112 @@
+from array import array
+import datetime
+import msgpack
+
+# Media types understood by `negotiate_format`
+COLUMNAR_MEDIA_TYPE = "application/vnd.dublinbikes.columnar+json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class StationTable:
+    """
+    Column-oriented container for station data.
+
+    Each field is stored once per table as a typed `array` (numbers) or a list
+    (strings), instead of one dictionary per station. The wire formats built
+    from it send every field name once, not once per station.
+    """
+
+    __slots__ = (
+        "ids", "names", "addresses", "lats", "lons", "statuses",
+        "last_updates", "available_bikes", "available_bike_stands", "capacities",
+    )
+
+    def __init__(self):
+        self.ids = array("i")
+        self.names = []
+        self.addresses = []
+        self.lats = array("d")
+        self.lons = array("d")
+        self.statuses = []
+        self.last_updates = array("q")  # Unix seconds
+        self.available_bikes = array("i")
+        self.available_bike_stands = array("i")
+        self.capacities = array("i")
+
+    @classmethod
+    def from_stations(cls, stations):
+        """
+        Builds a table from station dictionaries as returned by `get_all_stations()['data']`.
+
+        Parameters:
+            stations (list): Station dictionaries.
+
+        Returns:
+            StationTable: The columnar representation of `stations`.
+        """
+        table = cls()
+        for s in stations:
+            details = s["details"]
+            table.ids.append(s["id"])
+            table.names.append(s["name"])
+            table.addresses.append(s["address"])
+            table.lats.append(s["lat"])
+            table.lons.append(s["lon"])
+            table.statuses.append(details["status"])
+            table.last_updates.append(int(datetime.datetime.fromisoformat(details["last_update"]).timestamp()))
+            table.available_bikes.append(details["available_bikes"])
+            table.available_bike_stands.append(details["available_bike_stands"])
+            table.capacities.append(details.get("capacity", 0))
+        return table
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_columnar(self):
+        """
+        Returns the table as a dictionary of parallel lists, one per field.
+        """
+        return {
+            "id": self.ids.tolist(),
+            "name": self.names,
+            "address": self.addresses,
+            "lat": self.lats.tolist(),
+            "lon": self.lons.tolist(),
+            "status": self.statuses,
+            "last_update": self.last_updates.tolist(),
+            "available_bikes": self.available_bikes.tolist(),
+            "available_bike_stands": self.available_bike_stands.tolist(),
+            "capacity": self.capacities.tolist(),
+        }
+
+    def to_msgpack(self):
+        """
+        Returns the columnar representation encoded as MessagePack bytes.
+        """
+        return msgpack.packb({"data": self.to_columnar()})
+
+
+def negotiate_format(params, accept_header):
+    """
+    Chooses the wire format for a station response.
+
+    The `format` query parameter ("json", "columnar" or "msgpack") takes precedence
+    over the `Accept` header. Clients that ask for neither get the default JSON.
+
+    Parameters:
+        params (MultiDict): Request query parameters.
+        accept_header (str): Value of the request's `Accept` header.
+
+    Returns:
+        str: "json", "columnar" or "msgpack".
+    """
+    requested = params.get("format")
+    if requested in ("json", "columnar", "msgpack"):
+        return requested
+
+    accept = accept_header or ""
+    if any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        return "msgpack"
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return "columnar"
+    return "json"
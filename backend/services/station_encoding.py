@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class StationEncoding:
+    """
+    Station target encoding stored as one dense float64 array indexed by station id.
+
+    Replaces the pandas Series pickled by the training notebook. Lookups are plain
+    array indexing, the fallback for unknown stations is computed once, and the
+    values live in a single buffer that can be memory-mapped or shared between
+    forked workers without being copied.
+    """
+
+    def __init__(self, values, fallback=None):
+        # NaN marks station ids without an encoding
+        self.values = values
+        known = values[~np.isnan(values)]
+        self.fallback = float(known.mean()) if fallback is None and len(known) else fallback
+
+    @classmethod
+    def from_series(cls, series):
+        """Builds an encoding from a pandas Series mapping station_id to mean availability."""
+        ids = np.asarray(series.index, dtype=np.int64)
+        values = np.full(int(ids.max()) + 1 if len(ids) else 0, np.nan)
+        values[ids] = np.asarray(series.values, dtype=np.float64)
+        return cls(values, float(series.mean()))
+
+    @property
+    def index(self):
+        """Station ids that have an encoding, in ascending order."""
+        return np.flatnonzero(~np.isnan(self.values))
+
+    def get(self, station_id, default=None):
+        """Returns the encoding of one station, or `default` if it is unknown."""
+        if 0 <= station_id < len(self.values):
+            value = self.values[station_id]
+            if not np.isnan(value):
+                return float(value)
+        return default
+
+    def mean(self):
+        """Returns the fallback encoding used for unknown stations."""
+        return self.fallback
+
+    def lookup(self, station_ids):
+        """
+        Returns the encodings of many stations, using the fallback for unknown ids.
+
+        Parameters:
+            station_ids (array-like): Station ids.
+
+        Returns:
+            numpy.ndarray: One float64 encoding per id.
+        """
+        ids = np.asarray(station_ids, dtype=np.int64)
+        in_range = (ids >= 0) & (ids < len(self.values))
+        encoded = np.full(len(ids), self.fallback, dtype=np.float64)
+        encoded[in_range] = self.values[ids[in_range]]
+        encoded[np.isnan(encoded)] = self.fallback
+        return encoded
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import shutil
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from utils import haversine_array
+from .journey_ranking import RIDE_SPEED_KMH
+from .bike_api import DEFAULT_CONTRACT
+
+# Load environment variables from .env file
+load_dotenv()
+
+# === Matrix Settings ===
+MATRIX_DIR = os.getenv("STATION_MATRIX_DIR", os.path.join(os.getcwd(), "station_matrix"))  # One folder per station set
+NEIGHBOURS = int(os.getenv("STATION_MATRIX_NEIGHBOURS", 16))  # Nearest stations kept per station
+MATRIX_FILES = ("ids", "distance_km", "ride_minutes", "neighbours")
+
+
+def station_fingerprint(stations):
+    """
+    Returns a short hash of the station ids and coordinates. It changes only when a
+    station is added, removed or moved, which is when the matrix must be rebuilt.
+    """
+    digest = hashlib.sha256()
+    for station_id, lat, lon in sorted((s["id"], s["lat"], s["lon"]) for s in stations):
+        digest.update(f"{station_id}:{lat:.6f}:{lon:.6f};".encode())
+    return digest.hexdigest()[:16]
+
+
+class StationMatrix:
+    """
+    Precomputed station-to-station distances and ride times.
+
+    Rows and columns follow `ids` (ascending). Distances are great-circle
+    kilometres and ride times assume RIDE_SPEED_KMH, both stored as float32.
+    `neighbours[i]` lists the positions of the NEIGHBOURS stations closest to
+    station i, nearest first. Matrices loaded from disk are memory-mapped
+    read-only, so every worker process shares one copy.
+    """
+
+    def __init__(self, ids, distance_km, ride_minutes, neighbours, fingerprint):
+        self.ids = ids
+        self.distance_km = distance_km
+        self.ride_minutes = ride_minutes
+        self.neighbours = neighbours
+        self.fingerprint = fingerprint
+
+        # Dense station id -> row lookup; -1 marks unknown ids
+        self.positions = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int64)
+        self.positions[ids] = np.arange(len(ids))
+
+    @classmethod
+    def build(cls, stations, neighbours=NEIGHBOURS):
+        """
+        Computes the matrix for station dictionaries as returned by `get_all_stations()['data']`.
+        """
+        ordered = sorted(stations, key=lambda s: s["id"])
+        ids = np.array([s["id"] for s in ordered], dtype=np.int64)
+        lat = np.array([s["lat"] for s in ordered])
+        lon = np.array([s["lon"] for s in ordered])
+
+        # Haversine over all pairs
+        distance_km = haversine_array(lat[:, np.newaxis], lon[:, np.newaxis], lat, lon).astype(np.float32)
+        ride_minutes = distance_km * np.float32(60 / RIDE_SPEED_KMH)
+
+        # Nearest stations per row, excluding the station itself
+        k = min(neighbours, len(ids) - 1)
+        ranking = np.where(np.eye(len(ids), dtype=bool), np.inf, distance_km)
+        if k > 0:
+            nearest = np.argpartition(ranking, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(ranking, nearest, axis=1), axis=1, kind="stable")
+            nearest = np.take_along_axis(nearest, order, axis=1).astype(np.int32)
+        else:
+            nearest = np.empty((len(ids), 0), dtype=np.int32)
+
+        return cls(ids, distance_km, ride_minutes, nearest, station_fingerprint(stations))
+
+    def save(self, path):
+        """Writes the arrays as .npy files, under a temporary name renamed into place."""
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name in MATRIX_FILES:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another worker saved the same station set first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Memory-maps a matrix written by `save`."""
+        arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in MATRIX_FILES]
+        return cls(*arrays, fingerprint)
+
+    def index_of(self, station_ids):
+        """
+        Returns the matrix positions of `station_ids`.
+
+        Raises:
+            KeyError: If a station is not in the matrix.
+        """
+        ids = np.asarray(station_ids, dtype=np.int64)
+        in_range = (ids >= 0) & (ids < len(self.positions))
+        positions = np.full(ids.shape, -1, dtype=np.int64)
+        positions[in_range] = self.positions[ids[in_range]]
+        if (positions < 0).any():
+            raise KeyError(f"Unknown station id(s): {ids[positions < 0].tolist()}")
+        return positions
+
+    def pair(self, from_id, to_id):
+        """Returns (distance in km, ride time in minutes) between two stations."""
+        i, j = self.index_of([from_id, to_id])
+        return float(self.distance_km[i, j]), float(self.ride_minutes[i, j])
+
+    def distances(self, from_ids, to_ids):
+        """Returns the (len(from_ids), len(to_ids)) distance block in km."""
+        return self.distance_km[np.ix_(self.index_of(from_ids), self.index_of(to_ids))]
+
+    def nearest(self, station_id, k=None):
+        """
+        Returns up to `k` (default NEIGHBOURS) nearest stations as (station id, distance in km), nearest first.
+        """
+        i = self.index_of([station_id])[0]
+        positions = self.neighbours[i][:k]
+        return list(zip(self.ids[positions].tolist(), self.distance_km[i, positions].tolist()))
+
+
+class StationMatrixStore:
+    """
+    Serves the matrix of each contract's current station set.
+
+    Matrices are cached on disk under their station fingerprint, so a restart or
+    another worker reuses the saved copy, and a rebuild only happens when the
+    stations themselves change.
+    """
+
+    def __init__(self, matrix_dir=MATRIX_DIR):
+        self.matrix_dir = matrix_dir
+        self.current = {}  # contract -> (station list last checked, its matrix), each entry replaced as one reference
+        self._lock = threading.Lock()
+
+    def get(self, stations, contract=DEFAULT_CONTRACT):
+        """
+        Returns the matrix for `stations`, loading or building it if the station set changed.
+
+        Parameters:
+            stations (list): Station dictionaries, e.g. `get_station_snapshot()['data']`.
+            contract (str): Contract the stations belong to.
+
+        Returns:
+            StationMatrix: The matrix covering `stations`.
+        """
+        # The same snapshot list needs no fingerprint check
+        checked, matrix = self.current.get(contract, (None, None))
+        if stations is checked:
+            return matrix
+
+        with self._lock:
+            matrix = self.current.get(contract, (None, None))[1]
+            fingerprint = station_fingerprint(stations)
+            if matrix is None or matrix.fingerprint != fingerprint:
+                matrix = self.load_or_build(stations, fingerprint)
+            self.current[contract] = (stations, matrix)
+            return matrix
+
+    def load_or_build(self, stations, fingerprint):
+        path = os.path.join(self.matrix_dir, fingerprint)
+        if os.path.isdir(path):
+            return StationMatrix.load(path, fingerprint)
+
+        matrix = StationMatrix.build(stations)
+        try:
+            os.makedirs(self.matrix_dir, exist_ok=True)
+            matrix.save(path)
+            matrix = StationMatrix.load(path, fingerprint)
+        except OSError as e:
+            print(f"Could not save the station matrix to {path}: {e}")
+        print(f"Station matrix built for {len(matrix.ids)} stations ({fingerprint}).")
+        return matrix
+
+
+# === Shared Matrix for the Live Station Set ===
+station_matrices = StationMatrixStore()
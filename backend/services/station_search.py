@@ -0,0 +1,171 @@
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from .live_stations import SnapshotCache, station_feeds
+
+# === Search Settings ===
+FIELD_WEIGHTS = {"name": 1.0, "address": 0.6}  # Name matches rank above address matches
+PREFIX_WEIGHT = 0.8  # Share of an exact token match given to a prefix match
+FUZZY_THRESHOLD = 0.35  # Minimum trigram similarity between a misspelled word and a station word
+FUZZY_WEIGHT = 0.5  # Share of an exact token match given to a fuzzy match of similarity 1
+MAX_SEARCH_RESULTS = 50  # Largest `limit` accepted by the search endpoint
+
+
+def normalize_tokens(text):
+    """
+    Splits text into lowercase ASCII tokens: accents and apostrophes are removed and
+    other punctuation separates tokens, so "St. Stephen's Green" gives ["st", "stephens", "green"].
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return re.findall(r"[a-z0-9]+", re.sub(r"['’]", "", ascii_text))
+
+
+def trigrams(token):
+    """Returns the set of character trigrams of a token, padded so its start counts double."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def substring_grams(text):
+    """Returns every substring of length 1 to 3 of `text`."""
+    return {text[i:i + n] for n in (1, 2, 3) for i in range(len(text) - n + 1)}
+
+
+class StationSearchIndex:
+    """
+    Text lookup structures for one station snapshot.
+
+    - `by_id`: station id (as a string, like query parameters) -> position.
+    - `grams`: per field, every 1-3 character substring of the lowercased value -> positions,
+      so case-insensitive substring filters only verify stations containing all of the
+      query's trigrams.
+    - `prefixes`: every prefix of every normalized name and address token -> {position: weight},
+      for ranked autocomplete.
+    - `vocabulary`: every whole normalized token, and `vocabulary_trigrams`: trigram -> tokens,
+      for matching misspelled query words.
+
+    Positions index the snapshot list, so results keep the snapshot order where needed.
+    """
+
+    def __init__(self, stations):
+        self.stations = stations
+        self.by_id = {}
+        self.lowered = {field: [] for field in FIELD_WEIGHTS}
+        self.grams = {field: {} for field in FIELD_WEIGHTS}
+        self.prefixes = {}
+        self.vocabulary = set()
+        self.vocabulary_trigrams = {}
+
+        for position, station in enumerate(stations):
+            self.by_id[str(station["id"])] = position
+
+            for field, weight in FIELD_WEIGHTS.items():
+                value = station[field].lower()
+                self.lowered[field].append(value)
+                for gram in substring_grams(value):
+                    self.grams[field].setdefault(gram, set()).add(position)
+
+                for token in normalize_tokens(station[field]):
+                    # Whole tokens, not prefixes: "st" is a word of its own even after "street"
+                    if token not in self.vocabulary:
+                        self.vocabulary.add(token)
+                        for gram in trigrams(token):
+                            self.vocabulary_trigrams.setdefault(gram, set()).add(token)
+                    for end in range(1, len(token) + 1):
+                        score = weight if end == len(token) else weight * PREFIX_WEIGHT
+                        matches = self.prefixes.setdefault(token[:end], {})
+                        if score > matches.get(position, 0):
+                            matches[position] = score
+
+    def find_id(self, station_id):
+        """Returns the positions of the station with this id (as given in the query string)."""
+        position = self.by_id.get(station_id)
+        return set() if position is None else {position}
+
+    def find_substring(self, field, query):
+        """
+        Returns the positions whose `field` contains `query`, ignoring case; the same
+        result as `query.lower() in station[field].lower()` for every station.
+        """
+        query = query.lower()
+        if not query:
+            return set(range(len(self.stations)))
+
+        grams = self.grams[field]
+        if len(query) <= 3:
+            return set(grams.get(query, ()))
+
+        # Stations containing every trigram of the query (rarest first), then verified
+        query_grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        candidates = None
+        for gram in sorted(query_grams, key=lambda g: len(grams.get(g, ()))):
+            matches = grams.get(gram)
+            if not matches:
+                return set()
+            candidates = set(matches) if candidates is None else candidates & matches
+            if not candidates:
+                return set()
+        values = self.lowered[field]
+        return {p for p in candidates if query in values[p]}
+
+    def search(self, query, limit=10):
+        """
+        Ranks stations for an autocomplete query.
+
+        Every query word must match the start of a word in the station's name or
+        address; whole-word and name matches score higher. A query word that starts
+        no station word at all is treated as misspelled and matched against similarly
+        spelled words instead, at a lower score.
+
+        Returns:
+            list: (position, score) pairs, best first.
+        """
+        tokens = normalize_tokens(query)
+        if not tokens:
+            return []
+
+        # Sum of the best match per query word, over stations matching every word
+        scores = None
+        for token in tokens:
+            matches = self.prefixes.get(token) or self.fuzzy(token)
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {p: score + matches[p] for p, score in scores.items() if p in matches}
+            if not scores:
+                return []
+
+        names = self.lowered["name"]
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], len(names[item[0]]), item[0]))
+        return [(p, round(score, 3)) for p, score in ranked]
+
+    def fuzzy(self, token):
+        """
+        Returns {position: score} for stations with a word spelled like `token`,
+        scored by the trigram (Jaccard) similarity of the two words.
+        """
+        query_trigrams = trigrams(token)
+        shared = Counter()
+        for gram in query_trigrams:
+            shared.update(self.vocabulary_trigrams.get(gram, ()))
+
+        matches = {}
+        for word, count in shared.items():
+            similarity = count / (len(query_trigrams) + len(word) + 1 - count)  # A padded word has len + 1 trigrams
+            if similarity < FUZZY_THRESHOLD:
+                continue
+            for position, score in self.prefixes[word].items():
+                score *= FUZZY_WEIGHT * similarity
+                if score > matches.get(position, 0):
+                    matches[position] = score
+        return matches
+
+
+# === Shared Index for the Live Station Set ===
+station_search = SnapshotCache(StationSearchIndex)
+
+# Build the index of each new snapshot on the feed thread, not on the first request
+for feed in station_feeds.values():
+    feed.add_listener(lambda snapshot: station_search.get(snapshot.stations, snapshot.contract))
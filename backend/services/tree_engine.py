@@ -0,0 +1,210 @@
+import numpy as np
+
+# Number of (tree, sample) pairs traversed together on large batches
+LANES_PER_BLOCK = 16384
+
+# sklearn estimators that can be compiled (single-output trees and forests of them)
+SUPPORTED_MODELS = (
+    "DecisionTreeRegressor", "DecisionTreeClassifier",
+    "RandomForestRegressor", "RandomForestClassifier",
+    "ExtraTreesRegressor", "ExtraTreesClassifier",
+)
+
+
+def is_compilable(model):
+    """True if `model` is a tree model CompiledForest can represent."""
+    return type(model).__name__ in SUPPORTED_MODELS
+
+
+class CompiledForest:
+    """
+    A fitted sklearn tree or tree ensemble flattened into NumPy node arrays.
+
+    All trees share one set of arrays (feature, threshold, children, value),
+    with child indices offset to the start of each tree. Prediction walks every
+    (tree, sample) pair one level per step with vectorized indexing, so a batch
+    costs at most `max_depth` array operations instead of sklearn's per-call
+    validation and dispatch. Leaves point to themselves, so pairs that reached
+    a leaf can keep stepping without masking until they are dropped.
+
+    Results are bit-for-bit identical to the source model's `predict`: inputs are
+    cast to float32 like sklearn does, and tree outputs are accumulated in tree
+    order before dividing by the number of trees.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 feature_names, classes=None, average=True):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children  # Left and right child of node i at 2*i and 2*i + 1
+        self.is_leaf = children[0::2] == np.arange(len(feature))
+        self.value = value  # (nodes,) for regressors, (nodes, classes) probabilities for classifiers
+        self.roots = roots
+        self.max_depth = max_depth
+        self.feature_names = feature_names
+        self.classes = classes
+        self.average = average
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Flattens a fitted sklearn tree model.
+
+        Raises:
+            ValueError: If the model type or its configuration is not supported.
+        """
+        if not is_compilable(model):
+            raise ValueError(f"Cannot compile model of type {type(model).__name__}.")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output tree models can be compiled.")
+
+        is_forest = hasattr(model, "estimators_")
+        trees = [e.tree_ for e in model.estimators_] if is_forest else [model.tree_]
+        classes = getattr(model, "classes_", None)
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+
+            # Leaves loop back to themselves and compare feature 0 against any threshold
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            children.append(np.column_stack([left, right]).ravel())
+
+            if classes is None:
+                values.append(tree.value[:, 0, 0])
+            else:
+                # Same normalisation as DecisionTreeClassifier.predict_proba
+                proba = tree.value[:, 0, :len(classes)]
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                values.append(proba / normalizer)
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        feature_names = list(getattr(model, "feature_names_in_", [])) or None
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(children).astype(np.intp),
+            np.concatenate(values), np.asarray(roots, dtype=np.intp),
+            max(tree.max_depth for tree in trees), feature_names, classes, average=is_forest,
+        )
+
+    def _as_array(self, X):
+        # Select columns by name when given a DataFrame, as sklearn does
+        if hasattr(X, "columns") and self.feature_names is not None:
+            X = X[self.feature_names]
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _leaves(self, X, roots):
+        # Every (tree, sample) pair as one flat lane, tree-major
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        nodes = np.repeat(roots, n_samples)
+        row_offsets = np.tile(np.arange(n_samples, dtype=np.intp) * n_features, len(roots))
+        lanes = np.arange(len(nodes))
+        leaves = np.empty_like(nodes)
+
+        for step in range(self.max_depth):
+            go_right = flat_X.take(row_offsets + self.feature.take(nodes)) > self.threshold.take(nodes)
+            nodes = self.children.take(2 * nodes + go_right)
+
+            # Drop lanes that reached a leaf every few levels, so deep branches do not keep them busy
+            if step % 4 == 3:
+                done = self.is_leaf.take(nodes)
+                if done.any():
+                    leaves[lanes[done]] = nodes[done]
+                    active = ~done
+                    nodes, row_offsets, lanes = nodes[active], row_offsets[active], lanes[active]
+                    if len(nodes) == 0:
+                        break
+
+        leaves[lanes] = nodes
+        return leaves.reshape(len(roots), n_samples)
+
+    def _accumulate(self, X):
+        X = self._as_array(X)
+
+        # Walk a few trees at a time on large batches, so their nodes stay in cache
+        trees_per_block = max(1, LANES_PER_BLOCK // len(X))
+        leaves = np.concatenate([
+            self._leaves(X, self.roots[i:i + trees_per_block])
+            for i in range(0, len(self.roots), trees_per_block)
+        ])
+
+        # Sequential sum over trees (cumsum does not reorder additions, unlike sum)
+        total = np.cumsum(self.value[leaves], axis=0)[-1]
+        if self.average:
+            total /= len(self.roots)
+        return total
+
+    def predict(self, X):
+        """
+        Predicts targets (regressors) or class labels (classifiers) for a batch.
+
+        Parameters:
+            X (DataFrame or array-like): Input rows with the model's features.
+
+        Returns:
+            numpy.ndarray: One prediction per row.
+        """
+        if len(X) == 0:
+            return np.empty(0, dtype=np.float64 if self.classes is None else self.classes.dtype)
+        result = self._accumulate(X)
+        if self.classes is None:
+            return result
+        return self.classes.take(np.argmax(result, axis=1), axis=0)
+
+    def predict_proba(self, X):
+        """Returns class probabilities (classifiers only)."""
+        if self.classes is None:
+            raise AttributeError("predict_proba is only available for classifiers.")
+        return self._accumulate(X)
+
+
+def parity_sample(compiled, rows=1000, seed=0):
+    """
+    Builds inputs that exercise the model's split thresholds, including values
+    exactly on a threshold, for checking a compiled model against its source.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = len(compiled.feature_names) if compiled.feature_names else int(compiled.feature.max()) + 1
+    sample = np.empty((rows, n_features), dtype=np.float32)
+
+    for f in range(n_features):
+        splits = compiled.threshold[(compiled.feature == f) & ~compiled.is_leaf]
+        if len(splits) == 0:
+            sample[:, f] = rng.normal(size=rows)
+            continue
+        on_split = rng.choice(splits, rows).astype(np.float32)
+        spread = rng.uniform(splits.min() - 1, splits.max() + 1, rows).astype(np.float32)
+        sample[:, f] = np.where(rng.random(rows) < 0.5, on_split, spread)
+    return sample
+
+
+def compile_model(model):
+    """
+    Returns a CompiledForest for `model` if it is a supported tree model whose
+    compiled predictions match `model.predict` exactly; otherwise returns `model`.
+    """
+    if not is_compilable(model):
+        return model
+
+    try:
+        compiled = CompiledForest.from_sklearn(model)
+        sample = parity_sample(compiled)
+        if compiled.feature_names is not None:
+            import pandas as pd
+            sample = pd.DataFrame(sample, columns=compiled.feature_names)
+        if not np.array_equal(compiled.predict(sample), model.predict(sample)):
+            print(f"Compiled {type(model).__name__} does not match sklearn; keeping the sklearn model.")
+            return model
+    except ValueError as e:
+        print(f"{e} Keeping the sklearn model.")
+        return model
+
+    return compiled
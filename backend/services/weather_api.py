@@ -1,7 +1,7 @@
-import requests
 import os
 from dotenv import load_dotenv
 from flask import jsonify
+from .metrics import span
 
 # Load environment variables from .env file
 load_dotenv()
@@ -9,6 +9,9 @@ load_dotenv()
 # Retrieve the OpenWeather API key from environment variables
 API_KEY = os.getenv("WEATHER_API_KEY")
 
+# OpenWeather One Call base URL (overridable, e.g. with a local stub for load tests)
+ONECALL_URL = os.getenv("WEATHER_API_URL", "https://api.openweathermap.org/data/3.0")
+
 def get_weather_by_coordinate(lat=53.3476, lon=-6.2637):
     """
     Fetches the current weather data for a given latitude and longitude
@@ -28,7 +31,9 @@ def get_weather_by_coordinate(lat=53.3476, lon=-6.2637):
         raise ValueError("Missing Openweather API key.")
     
     # Make a request to the OpenWeather API for current weather data
-    res = requests.get(f'https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&appid={API_KEY}&exclude=minutely,hourly,daily,alerts&units=metric')
+    import requests  # Deferred to the first call: it takes ~130 ms to import
+    with span("upstream.openweather"):
+        res = requests.get(f'{ONECALL_URL}/onecall?lat={lat}&lon={lon}&appid={API_KEY}&exclude=minutely,hourly,daily,alerts&units=metric')
 
     # If the request is successful (status code 200), return the current weather data
     if res.status_code == 200:
@@ -48,7 +53,9 @@ def get_weather_by_coordinate_time(lat=53.3476,lon=-6.2637,timestamp=1744108800)
         raise ValueError("Missing Openweather API key.")
     
     # Make a request to the OpenWeather API for current weather data
-    res = requests.get(f'https://api.openweathermap.org/data/3.0/onecall/timemachine?lat={lat}&lon={lon}&dt={timestamp}&appid={API_KEY}&units=metric')
+    import requests  # Deferred to the first call: it takes ~130 ms to import
+    with span("upstream.openweather"):
+        res = requests.get(f'{ONECALL_URL}/onecall/timemachine?lat={lat}&lon={lon}&dt={timestamp}&appid={API_KEY}&units=metric')
 
     # If the request is successful (status code 200), return the current weather data
     if res.status_code == 200:
@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import brotli
+from flask import Response, request
+
+# File types worth compressing (images are already compressed)
+COMPRESSIBLE_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".txt")
+
+# Hashed asset URLs never change content, so browsers may cache them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class StaticAsset:
+    """
+    One static file held in memory, with its content hash and precompressed variants.
+    """
+
+    __slots__ = ("name", "hashed_name", "mimetype", "etag", "variants")
+
+    def __init__(self, name, content):
+        digest = hashlib.sha256(content).hexdigest()
+        root, ext = os.path.splitext(name)
+
+        self.name = name
+        self.hashed_name = f"{root}.{digest[:12]}{ext}"
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.etag = digest[:32]
+        self.variants = compress_variants(content) if ext in COMPRESSIBLE_EXTENSIONS else {"identity": content}
+
+
+def compress_variants(content):
+    """
+    Returns the identity, gzip and brotli encodings of `content`.
+
+    Compressed variants that are not smaller than the original are left out.
+    """
+    variants = {"identity": content}
+    for encoding, compressed in (
+        ("br", brotli.compress(content, quality=11)),
+        ("gzip", gzip.compress(content, compresslevel=9, mtime=0)),
+    ):
+        if len(compressed) < len(content):
+            variants[encoding] = compressed
+    return variants
+
+
+def send_variant(variants, mimetype, etag, cache_control):
+    """
+    Builds a response from precompressed variants, honouring `Accept-Encoding`
+    and `If-None-Match` of the current request.
+
+    Parameters:
+        variants (dict): Encoded bodies keyed by content encoding ("identity", "gzip", "br").
+        mimetype (str): Content type of the body.
+        etag (str): Strong validator for the uncompressed content.
+        cache_control (str): Value of the `Cache-Control` header.
+
+    Returns:
+        Response: A 200 response with the best accepted variant, or 304 if the client's copy is current.
+    """
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        accepted = request.accept_encodings
+        encoding = next((e for e in ("br", "gzip") if e in variants and accepted[e]), "identity")
+        response = Response(variants[encoding], mimetype=mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+class StaticPipeline:
+    """
+    Fingerprints and precompresses every file under the frontend static folder.
+
+    Files are served from memory under `<url_prefix>/<name>.<hash>.<ext>`, and
+    `rewrite_html` points page references at those URLs. Because the URL changes
+    whenever the content does, the responses can be cached indefinitely.
+    """
+
+    def __init__(self, static_dir, url_prefix="/assets"):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.assets = {}  # hashed name -> StaticAsset
+        self.manifest = {}  # original relative name -> hashed name
+
+    def build(self):
+        """Reads, hashes and compresses all static files. Returns the pipeline."""
+        assets = {}
+        manifest = {}
+        for root, _, files in os.walk(self.static_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.static_dir).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    asset = StaticAsset(name, f.read())
+                assets[asset.hashed_name] = asset
+                manifest[name] = asset.hashed_name
+
+        # Swap both maps at once so concurrent requests never see a partial build
+        self.assets, self.manifest = assets, manifest
+        print(f"Static pipeline built {len(assets)} assets.")
+        return self
+
+    def url_for(self, name):
+        """Returns the fingerprinted URL of a static file such as `index.js`."""
+        return f"{self.url_prefix}/{self.manifest[name]}"
+
+    def rewrite_html(self, html):
+        """Replaces `./static/<name>` references in `html` with fingerprinted URLs."""
+        for name in self.manifest:
+            html = html.replace(f"./static/{name}", self.url_for(name))
+        return html
+
+    def serve(self, hashed_name):
+        """
+        Returns the response for a fingerprinted asset, or None if it is unknown.
+        """
+        asset = self.assets.get(hashed_name)
+        if asset is None:
+            return None
+        return send_variant(asset.variants, asset.mimetype, asset.etag, IMMUTABLE_CACHE_CONTROL)
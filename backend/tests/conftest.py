@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Tests run from the `backend` folder; the local_db_setup scripts import each other by bare name
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "local_db_setup"))
+
+# No background refreshes or watchers while testing
+os.environ.setdefault("ENCODING_REFRESH_SECONDS", "0")
+os.environ.setdefault("MODEL_RELOAD_SECONDS", "0")
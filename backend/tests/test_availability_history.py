@@ -0,0 +1,48 @@
+import numpy as np
+from services.availability_history import AvailabilityHistory
+from services.live_stations import StationSnapshot
+
+
+def snapshot(fetched_at, counts):
+    """A snapshot with one station per (id, bikes, last_update) in `counts`."""
+    stations = [
+        {"id": station_id, "lat": 53.34, "lon": -6.26,
+         "details": {"available_bikes": bikes, "available_bike_stands": 10 - bikes, "last_update": last_update}}
+        for station_id, bikes, last_update in counts
+    ]
+    return StationSnapshot(0, stations, fetched_at)
+
+
+def test_samples_skip_repeated_reports_and_missing_columns():
+    history = AvailabilityHistory(capacity=4)
+    history.record(snapshot(0, [(1, 5, "2025-04-03 18:00:00"), (2, 1, "2025-04-03 18:00:00")]))
+    history.record(snapshot(30, [(1, 5, "2025-04-03 18:00:00")]))  # Station 2 missing, station 1 unchanged
+    history.record(snapshot(60, [(1, 4, "2025-04-03 18:01:00"), (2, 2, "2025-04-03 18:01:00")]))
+
+    updated, bikes, stands = history.samples(1)
+    assert bikes.tolist() == [5, 4] and stands.tolist() == [5, 6]
+    assert updated.tolist() == np.array(["2025-04-03T18:00:00", "2025-04-03T18:01:00"], dtype="datetime64[s]").astype(np.int64).tolist()
+    assert history.samples(2)[1].tolist() == [1, 2]
+    assert history.samples(3) is None
+
+
+def test_full_buffer_overwrites_the_oldest_column():
+    history = AvailabilityHistory(capacity=2)
+    for minute in range(3):
+        history.record(snapshot(minute * 60, [(1, minute, f"2025-04-03 18:0{minute}:00")]))
+
+    assert history.samples(1)[1].tolist() == [1, 2]
+    assert not history.covers(1, 0)
+
+
+def test_window_statistics_ignore_missing_samples():
+    history = AvailabilityHistory(capacity=4)
+    history.record(snapshot(0, [(1, 2, "2025-04-03 18:00:00"), (2, 8, "2025-04-03 18:00:00")]))
+    history.record(snapshot(3600, [(1, 4, "2025-04-03 19:00:00")]))
+
+    ids, bikes, stands = history.rolling_mean(7200)
+    assert ids.tolist() == [1, 2]
+    np.testing.assert_allclose(bikes, [3.0, 8.0])
+
+    _, bikes_per_hour, _ = history.trend(7200)
+    assert bikes_per_hour[0] == 2.0 and np.isnan(bikes_per_hour[1])
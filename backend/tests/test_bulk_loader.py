@@ -0,0 +1,110 @@
+import types
+import pandas as pd
+import pytest
+from pymysql.err import IntegrityError, OperationalError
+from bulk_loader import BulkLoader, infile_row, NULL
+
+
+class FakeCursor:
+    """Records statements; LOAD DATA reads its temporary file back before it is removed."""
+
+    def __init__(self, load_error=None, loaded_rows=None):
+        self.load_error = load_error
+        self.loaded_rows = loaded_rows
+        self.files, self.executemany_chunks, self.rowcount = [], [], 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if sql.startswith("SHOW COLUMNS"):
+            self.columns = [("id",), ("name",)]
+        elif sql.startswith("LOAD DATA"):
+            if self.load_error:
+                raise self.load_error
+            with open(params[0], newline="") as file:
+                self.files.append(file.read())
+            self.rowcount = self.loaded_rows if self.loaded_rows is not None else self.files[-1].count("\n")
+
+    def fetchall(self):
+        return self.columns
+
+    def executemany(self, sql, chunk):
+        self.executemany_chunks.append(list(chunk))
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = self.rollbacks = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+def make_loader(cursor, **kwargs):
+    loader = BulkLoader(dh=types.SimpleNamespace(connection_string="mysql+pymysql://user:pw@localhost:3306"), **kwargs)
+    connection = FakeConnection(cursor)
+    loader.engine = types.SimpleNamespace(raw_connection=lambda: connection)
+    return loader, connection
+
+
+def test_chunks_split_rows_and_commit_each_chunk():
+    cursor = FakeCursor()
+    loader, connection = make_loader(cursor, chunk_rows=2)
+    frame = pd.DataFrame({"id": [1, 2, 3, 4, 5], "name": ["a", "b", "c", "d", None]})
+
+    stats = loader.load_frames([frame.iloc[:3], frame.iloc[3:]], "bike.station")
+
+    assert stats["rows"] == 5
+    assert [f.count("\n") for f in cursor.files] == [2, 2, 1]
+    assert connection.commits == 3
+    assert cursor.files[-1] == "5,\\N\n"
+
+
+def test_infile_rows_escape_backslashes_and_mark_nulls():
+    assert infile_row(["C:\\data", None, 3]) == ["C:\\\\data", NULL, 3]
+
+    cursor = FakeCursor()
+    loader, _ = make_loader(cursor)
+    loader.load_frames([pd.DataFrame({"id": [1], "name": ['back\\slash "quoted", comma']})], "bike.station")
+    assert cursor.files == ['1,"back\\\\slash ""quoted"", comma"\n']
+
+
+def test_skipped_duplicates_raise_in_error_mode():
+    loader, _ = make_loader(FakeCursor(loaded_rows=1))
+    with pytest.raises(IntegrityError):
+        loader.load_frames([pd.DataFrame({"id": [1, 1], "name": ["a", "a"]})], "bike.station")
+
+    loader, _ = make_loader(FakeCursor(loaded_rows=1), on_duplicate="ignore")
+    assert loader.load_frames([pd.DataFrame({"id": [1, 1], "name": ["a", "a"]})], "bike.station")["rows"] == 2
+
+
+def test_auto_falls_back_only_when_local_infile_is_disabled():
+    cursor = FakeCursor(load_error=OperationalError(3948, "Loading local data is disabled"))
+    loader, connection = make_loader(cursor)
+    loader.load_frames([pd.DataFrame({"id": [1, 2], "name": ["a", "b"]})], "bike.station")
+    assert cursor.executemany_chunks == [[(1, "a"), (2, "b")]]
+    assert connection.rollbacks == 1
+
+    loader, _ = make_loader(FakeCursor(load_error=OperationalError(1366, "Incorrect integer value")))
+    with pytest.raises(OperationalError):
+        loader.load_frames([pd.DataFrame({"id": [1], "name": ["a"]})], "bike.station")
+
+
+def test_unknown_columns_are_rejected():
+    loader, _ = make_loader(FakeCursor())
+    with pytest.raises(ValueError):
+        loader.load_frames([pd.DataFrame({"id": [1], "capacity": [20]})], "bike.station")
@@ -0,0 +1,53 @@
+from db_setup import DBSetUp
+
+
+class FakeHelper:
+    """A table state per name; ALTER statements are recorded instead of run."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.statements = []
+
+    def column_exists(self, table_name, column):
+        return column in self.tables[table_name]["columns"]
+
+    def primary_key_columns(self, table_name):
+        return self.tables[table_name]["primary_key"]
+
+    def partition_expression(self, table_name):
+        return self.tables[table_name]["partitioning"]
+
+    def execute(self, sql):
+        self.statements.append(" ".join(sql.split()))
+
+
+def migrated(tables):
+    setup = DBSetUp.__new__(DBSetUp)
+    setup.dh = FakeHelper(tables)
+    setup.migrate_contract_columns()
+    return setup.dh.statements
+
+
+def test_half_migrated_table_is_still_partitioned():
+    # The column and key were added, but the partitioning ALTER of the earlier run failed
+    statements = migrated({
+        "bike.station": {"columns": ["contract", "id"], "primary_key": ["contract", "id"], "partitioning": ("KEY", "`contract`")},
+        "bike.availability": {"columns": ["contract", "station_id"], "primary_key": ["contract", "station_id", "record_time"],
+                              "partitioning": None},
+    })
+
+    assert statements == ["ALTER TABLE bike.availability PARTITION BY KEY (contract) PARTITIONS 8"]
+
+
+def test_legacy_table_gets_every_step():
+    statements = migrated({
+        "bike.station": {"columns": ["id"], "primary_key": ["id"], "partitioning": None},
+        "bike.availability": {"columns": ["contract"], "primary_key": ["contract", "station_id", "record_time"],
+                              "partitioning": ("KEY", "`contract`")},
+    })
+
+    assert statements[0].startswith("ALTER TABLE bike.station ADD COLUMN contract VARCHAR(32)")
+    assert statements[1:] == [
+        "ALTER TABLE bike.station DROP PRIMARY KEY, ADD PRIMARY KEY (contract, id)",
+        "ALTER TABLE bike.station PARTITION BY KEY (contract) PARTITIONS 8",
+    ]
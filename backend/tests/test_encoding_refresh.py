@@ -0,0 +1,64 @@
+import datetime
+import json
+import os
+import types
+import numpy as np
+from benchmarks.fixtures import make_forest_bundle
+from services import encoding_refresh
+from services.encoding_refresh import blend, changed, trained_until
+from services.model_registry import BUNDLE_FILES, LEGACY_VERSION, ModelRegistry
+from services.station_encoding import StationEncoding
+
+
+def test_blend_weights_the_trained_value_as_prior_rows():
+    prior = StationEncoding(np.array([10.0, np.nan, 4.0]))
+    sums = np.array([20.0, 9.0, 0.0, 6.0])
+    counts = np.array([2, 3, 0, 2])
+
+    blended = blend(prior, sums, counts, prior_rows=2)
+
+    # (10 * 2 + 20) / 4; unknown to the prior: plain mean; no new rows: unchanged; new station
+    np.testing.assert_allclose(blended.values, [10.0, 3.0, 4.0, 3.0])
+    assert blended.fallback == 5.0
+
+
+def test_blend_keeps_stations_without_rows_unknown():
+    blended = blend(StationEncoding(np.array([np.nan, 2.0])), np.zeros(3), np.zeros(3, dtype=np.int64))
+
+    assert np.isnan(blended.values[[0, 2]]).all()
+    assert blended.values[1] == 2.0
+
+
+def test_changed_ignores_small_moves():
+    old = StationEncoding(np.array([1.0, np.nan, 3.0]))
+
+    assert not changed(old, StationEncoding(np.array([1.05, np.nan, 2.95])), min_change=0.1)
+    assert changed(old, StationEncoding(np.array([1.2, np.nan, 3.0])), min_change=0.1)
+    assert changed(old, StationEncoding(np.array([1.0, 2.0, 3.0])), min_change=0.1)
+    assert changed(old, StationEncoding(np.array([1.0, np.nan, 3.0, 4.0])), min_change=0.1)
+
+
+def test_versioned_bundles_start_at_their_training_cutoff(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path), str(tmp_path / "artifacts"))
+    version_path = tmp_path / "artifacts" / "2026-10-19_140215"
+    version_path.mkdir(parents=True)
+    (version_path / "schema.json").write_text(json.dumps({"data": {"to": "2026-10-18 23:55:00"}}))
+    monkeypatch.setattr(encoding_refresh, "registry", registry)
+
+    # The bundle's own path is the shared copy in MODEL_SHARE_MODE=mmap
+    bundle = types.SimpleNamespace(version="2026-10-19_140215", path=str(version_path / "shared_sklearn_0"))
+
+    assert trained_until(bundle) == "2026-10-18 23:55:00"
+
+
+def test_legacy_bundles_start_when_their_encodings_were_pickled(tmp_path, monkeypatch):
+    make_forest_bundle(2, str(tmp_path))
+    pickled_at = datetime.datetime(2025, 4, 3, 18, 30, 5)
+    for target in ("bike", "stand"):
+        path = os.path.join(tmp_path, BUNDLE_FILES[f"{target}_encoding"])
+        os.utime(path, (pickled_at.timestamp(), pickled_at.timestamp()))
+    monkeypatch.setattr(encoding_refresh, "registry", ModelRegistry(str(tmp_path), str(tmp_path / "artifacts")))
+
+    bundle = types.SimpleNamespace(version=LEGACY_VERSION, path=str(tmp_path))
+
+    assert trained_until(bundle) == "2025-04-03 18:30:05"
@@ -0,0 +1,38 @@
+import threading
+import types
+from services import forecast
+from services.forecast import ForecastCache
+
+
+class SlowCache(ForecastCache):
+    """Counts builds; builds for "lyon" block until `release` is set."""
+
+    def __init__(self):
+        super().__init__(max_entries=4)
+        self.builds = []
+        self.release = threading.Event()
+
+    def build(self, engine, stations, start_hour, hours, bundle, contract):
+        self.builds.append(contract)
+        if contract == "lyon":
+            self.release.wait(5)
+        return {"contract": contract, "hours": hours}
+
+
+def test_slow_build_only_holds_up_its_own_key(monkeypatch):
+    monkeypatch.setattr(forecast, "registry", types.SimpleNamespace(active=types.SimpleNamespace(key=("v1", 0))))
+    cache = SlowCache()
+    results = []
+    waiting = [threading.Thread(target=lambda: results.append(cache.get(None, [], 24, contract="lyon"))) for _ in range(3)]
+    for thread in waiting:
+        thread.start()
+
+    # Another contract is answered while lyon is still being built
+    assert cache.get(None, [], 24, contract="dublin") == {"contract": "dublin", "hours": 24}
+
+    cache.release.set()
+    for thread in waiting:
+        thread.join(5)
+    assert results == [{"contract": "lyon", "hours": 24}] * 3
+    assert sorted(cache.builds) == ["dublin", "lyon"]
+    assert cache._building == {}
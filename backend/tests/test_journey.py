@@ -0,0 +1,34 @@
+import pytest
+from flask import Flask
+from routes import journey
+
+STATIONS = [
+    {"id": 1, "name": "A", "lat": 53.3400, "lon": -6.2600,
+     "details": {"available_bikes": 5, "available_bike_stands": 5, "status": "OPEN"}},
+    {"id": 2, "name": "B", "lat": 53.3410, "lon": -6.2610,
+     "details": {"available_bikes": 5, "available_bike_stands": 5, "status": "OPEN"}},
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(journey, "resolve_contract", lambda params, lat, lon: "dublin")
+    monkeypatch.setattr(journey, "get_station_snapshot", lambda contract: {"data": STATIONS})
+
+    def stalled(*args):
+        raise TimeoutError("Predictions were not ready within 5.0 s.")
+
+    monkeypatch.setattr(journey, "predict_nearby", stalled)
+    app = Flask(__name__)
+    app.register_blueprint(journey.journey_bp, url_prefix="/api")
+    return app.test_client()
+
+
+@pytest.mark.parametrize("extra", ["", "&top_k=2"])
+def test_stalled_predictions_answer_503(client, extra):
+    response = client.get(
+        f"/api/plan-journey?start_lat=53.3401&start_lon=-6.2601&dest_lat=53.3409&dest_lon=-6.2609&timestamp=1760000000{extra}"
+    )
+
+    assert response.status_code == 503
+    assert "error" in response.get_json()
@@ -0,0 +1,63 @@
+from services import live_stations
+from services.live_stations import StationFeed
+
+
+def station(station_id, bikes):
+    return {
+        "id": station_id,
+        "name": f"STATION {station_id}",
+        "lat": 53.34 + station_id / 1000,
+        "lon": -6.26,
+        "details": {"available_bikes": bikes},
+    }
+
+
+def refreshed_feed(monkeypatch, *rounds):
+    """Returns a feed that has published one snapshot per list of stations in `rounds`."""
+    feed = StationFeed(contract="dublin", buffer_size=4)
+    for stations in rounds:
+        monkeypatch.setattr(live_stations, "get_all_stations", lambda contract, stations=stations: {"data": stations})
+        feed.refresh()
+    return feed
+
+
+def test_delta_carries_only_changed_stations(monkeypatch):
+    feed = refreshed_feed(monkeypatch, [station(1, 5), station(2, 3)], [station(1, 4), station(2, 3)])
+
+    event, stations, version = feed.wait_for_update(1, timeout=0)
+
+    assert (event, version) == ("delta", 2)
+    assert stations == [station(1, 4)]
+
+
+def test_cursor_ahead_of_the_feed_gets_a_snapshot(monkeypatch):
+    feed = refreshed_feed(monkeypatch, [station(1, 5)], [station(1, 4)])
+
+    # A cursor counted by another process, past anything this feed has published
+    event, stations, version = feed.wait_for_update(40, timeout=0)
+
+    assert (event, version) == ("snapshot", 2)
+    assert stations == [station(1, 4)]
+
+
+def test_event_ids_from_another_process_reset_the_cursor(monkeypatch):
+    feed = refreshed_feed(monkeypatch, [station(1, 5)])
+    other = StationFeed(contract="dublin")
+    other.created = feed.created + 1
+
+    assert feed.parse_event_id(feed.event_id(7)) == 7
+    assert feed.parse_event_id(other.event_id(7)) == 0
+    assert feed.parse_event_id("7") == 0
+    assert feed.parse_event_id(None) == 0
+
+
+def test_points_of_an_unreachable_contract_are_not_routed_to_the_default(monkeypatch):
+    dublin = refreshed_feed(monkeypatch, [station(1, 5), station(2, 3)])
+    lyon = StationFeed(contract="lyon")
+    monkeypatch.setattr(live_stations, "station_feeds", {"dublin": dublin, "lyon": lyon})
+    monkeypatch.setattr(StationFeed, "start", lambda self: None)
+    monkeypatch.setattr(live_stations, "get_all_stations", lambda contract: {"status": 503})
+
+    contracts = live_stations.contracts_for_points([53.341, 45.76], [-6.26, 4.83])
+
+    assert contracts.tolist() == ["dublin", None]
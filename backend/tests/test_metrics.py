@@ -0,0 +1,49 @@
+from flask import Flask, request
+from services import metrics
+from services.metrics import MetricsRegistry
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    requests.inc('/api/"x"\\')
+    requests.inc('/api/"x"\\', amount=2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/api/\\"x\\"\\\\"} 3',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_count 3",
+        "latency_seconds_sum 5.55",
+    ]
+
+
+def test_request_timer_labels_requests_from_the_wsgi_call(monkeypatch):
+    histogram = metrics.MetricsRegistry().histogram("duration_seconds", "Duration.", ("method", "route", "status"))
+    monkeypatch.setattr(metrics, "request_duration", histogram)
+    app = Flask(__name__)
+
+    @app.route("/stations/<int:station_id>", methods=["GET", "POST"])
+    def station(station_id):
+        return {"id": station_id}, 201 if request.method == "POST" else 200
+
+    app.wsgi_app = metrics.RequestTimer(app.wsgi_app)
+    client = app.test_client()
+    client.get("/stations/1")
+    client.get("/stations/2")
+    client.post("/stations/3")
+    client.get("/nowhere")
+
+    assert {labels: sum(counts[0]) for labels, counts in histogram.values.items()} == {
+        ("GET", "/stations/<int:station_id>", "200"): 2,
+        ("POST", "/stations/<int:station_id>", "201"): 1,
+        ("GET", "unmatched", "404"): 1,
+    }
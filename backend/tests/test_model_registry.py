@@ -0,0 +1,52 @@
+import os
+import pickle
+import threading
+import pytest
+import sklearn.base
+from benchmarks.fixtures import make_forest_bundle
+from services.model_registry import BUNDLE_FILES, LEGACY_VERSION, ModelRegistry, load_bundle
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    make_forest_bundle(2, str(tmp_path))
+    return str(tmp_path)
+
+
+def test_shared_copy_follows_retrained_pickles(model_dir):
+    registry = ModelRegistry(model_dir, os.path.join(model_dir, "artifacts"), share_mode="mmap")
+    first = registry.load(LEGACY_VERSION)
+    assert registry.load(LEGACY_VERSION).path == first.path
+
+    # Retraining rewrites the pickles next to the notebooks
+    model_path = os.path.join(model_dir, BUNDLE_FILES["bike_model"])
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    second = registry.load(LEGACY_VERSION)
+    assert second.path != first.path
+    assert os.path.isdir(second.path)
+
+
+def test_models_saved_with_another_sklearn_version_fail_to_load(model_dir, monkeypatch):
+    model_path = os.path.join(model_dir, BUNDLE_FILES["stand_model"])
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    monkeypatch.setattr(sklearn.base, "__version__", "0.0.1")
+    with open(model_path, "wb") as f:
+        pickle.dump(model, f)
+    monkeypatch.undo()
+
+    with pytest.raises(RuntimeError, match="saved with scikit-learn 0.0.1"):
+        load_bundle(model_dir, LEGACY_VERSION)
+
+
+def test_forked_worker_restarts_a_background_load(model_dir):
+    registry = ModelRegistry(model_dir, os.path.join(model_dir, "artifacts"))
+    # As seen by a worker forked while the master's loader was running: the thread is gone
+    registry._loader = threading.Thread(target=lambda: None)
+
+    registry.after_fork()
+    registry._loader.join(timeout=30)
+
+    assert registry.active is not None and registry.active.version == LEGACY_VERSION
@@ -0,0 +1,47 @@
+import threading
+import pytest
+from services.prediction_batcher import PredictionBatcher
+
+
+def test_concurrent_requests_share_one_batch_per_model():
+    calls = []
+
+    def predict_batch(station_ids, timestamps, temps, target, contract):
+        calls.append((target, contract, list(station_ids)))
+        return [station_id * 10 for station_id in station_ids]
+
+    batcher = PredictionBatcher(predict_batch, max_wait_ms=50)
+    bikes = batcher.submit(1, 0, 10.0, "bike", "dublin")
+    stands = batcher.submit(2, 0, 10.0, "stand", "dublin")
+    more_bikes = batcher.submit(3, 0, 10.0, "bike", "dublin")
+
+    assert [bikes.result(5), stands.result(5), more_bikes.result(5)] == [10, 20, 30]
+    assert sorted(calls) == [("bike", "dublin", [1, 3]), ("stand", "dublin", [2])]
+
+
+def test_stalled_batch_times_out():
+    release = threading.Event()
+
+    def predict_batch(station_ids, timestamps, temps, target, contract):
+        release.wait(5)
+        return [0] * len(station_ids)
+
+    batcher = PredictionBatcher(predict_batch, timeout_seconds=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            batcher.predict_many([1, 2], 0, 10.0)
+    finally:
+        release.set()
+
+
+def test_wrong_number_of_predictions_fails_every_caller():
+    batcher = PredictionBatcher(lambda station_ids, *args: [1.0], max_wait_ms=50)
+
+    futures = [batcher.submit(station_id, 0, 10.0) for station_id in (1, 2)]
+
+    # The one-by-one retry returns one value per row again, so each caller gets its own
+    assert [future.result(5) for future in futures] == [1.0, 1.0]
+
+    batcher = PredictionBatcher(lambda station_ids, *args: [], max_wait_ms=50)
+    with pytest.raises(ValueError, match="0 predictions for 1 rows"):
+        batcher.predict_many([1], 0, 10.0)
@@ -0,0 +1,21 @@
+import os
+import sys
+import time
+import profiler
+
+
+def test_sample_mode_loads_the_shared_sampler_from_its_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.delitem(sys.modules, "sampling_profiler", raising=False)
+    path_before = list(sys.path)
+
+    with profiler.profile("sample", "scrape"):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+
+    assert sys.path == path_before
+    assert os.path.samefile(sys.modules["sampling_profiler"].__file__, profiler.SAMPLING_PROFILER_PATH)
+    [artifact] = os.listdir(tmp_path)
+    assert artifact.endswith("-scrape.folded")
+    assert "test_sample_mode_loads_the_shared_sampler_from_its_file" in (tmp_path / artifact).read_text()
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from machine_learning.train import measure_latency, unique_version
+
+
+def test_latency_is_labelled_with_the_engine_that_made_it():
+    X = pd.DataFrame(np.random.default_rng(0).random((200, 3)), columns=["a", "b", "c"])
+    model = RandomForestRegressor(n_estimators=3, random_state=0).fit(X, X["a"])
+
+    assert measure_latency(model, X, repeat=2, engine="sklearn")["engine"] == "sklearn"
+    assert measure_latency(model, X, repeat=2, engine="compiled")["engine"] == "compiled"
+
+
+def test_version_names_never_reuse_an_existing_bundle(tmp_path):
+    (tmp_path / "2026-10-19_140215").mkdir()
+    (tmp_path / "2026-10-19_140215-2").mkdir()
+
+    assert unique_version(str(tmp_path), "2026-10-19_140215") == "2026-10-19_140215-3"
+    assert unique_version(str(tmp_path), "2026-10-19_140216") == "2026-10-19_140216"
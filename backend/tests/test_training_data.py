@@ -0,0 +1,81 @@
+import datetime
+import os
+import sqlite3
+import pandas as pd
+import pytest
+from benchmarks.load_stubs import BIKE_TABLES, WEATHER_TABLES
+from machine_learning import training_data
+from services import db_config
+
+START = datetime.datetime(2025, 2, 23, 10, 0)
+
+
+def add_availability(directory, first, count, stations=(1, 2)):
+    rows = []
+    for i in range(count):
+        record_time = (first + datetime.timedelta(minutes=5 * i)).strftime("%Y-%m-%d %H:%M:%S")
+        rows += [("dublin", s, "OPEN", 10 + s, 20 - s, record_time, record_time) for s in stations]
+    with sqlite3.connect(os.path.join(directory, "bike.db")) as conn:
+        conn.executemany("INSERT INTO availability VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def add_weather(directory, hour, temp, station_id=1):
+    record_time = hour.strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(os.path.join(directory, "weather.db")) as conn:
+        conn.execute("INSERT INTO current_data VALUES (?, 53.3, -6.2, ?, ?, ?, ?, ?, ?, ?, 1000, 80, 0, 800, 3, 0, 0, 0)",
+                     (station_id, record_time, hour.date().isoformat(), hour.hour, record_time, record_time, temp, temp))
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    with sqlite3.connect(tmp_path / "bike.db") as conn:
+        conn.executescript(BIKE_TABLES)
+    with sqlite3.connect(tmp_path / "weather.db") as conn:
+        conn.executescript(WEATHER_TABLES)
+    monkeypatch.setattr(db_config, "DATABASE_URL", f"sqlite:///{tmp_path}/{{db_name}}.db")
+    return db_config.connect_to_db("bike")
+
+
+def test_join_weather_uses_the_station_temperature_or_the_citywide_mean():
+    availability = pd.DataFrame({
+        "contract": "dublin", "station_id": [1, 2, 3], "status": "OPEN",
+        "available_bikes": [5, 6, 7], "available_bike_stands": [15, 14, 13],
+        "last_update": ["2025-02-23 10:04:00"] * 3, "record_time": ["2025-02-23 10:05:00"] * 3,
+    })
+    weather = pd.DataFrame({"station_id": [1, 2], "record_date": ["2025-02-23"] * 2, "record_hour": [10, 10], "temp": [8.0, 10.0]})
+
+    frame = training_data.join_weather(availability, weather)
+
+    assert list(frame.columns) == training_data.SCHEMA.names
+    assert frame["max_air_temperature_celsius"].tolist() == [8.0, 10.0, 9.0]
+    assert frame["hour"].tolist() == [10] * 3
+    assert frame["day_of_week"].tolist() == [6] * 3
+
+
+def test_export_continues_from_a_settled_boundary_without_gaps_or_duplicates(engine, tmp_path):
+    directory = str(tmp_path / "training")
+    add_availability(tmp_path, START, 24)  # 10:00 - 11:55
+    add_weather(tmp_path, START, 8.0)
+    add_weather(tmp_path, START + datetime.timedelta(hours=1), 9.0)
+
+    first = training_data.export(engine, directory, chunk_rows=10, settle_minutes=5)
+    # Up to 11:50, five minutes before the newest row
+    assert first["watermark"] == "2025-02-23 11:50:00"
+    assert first["rows"] == 22 * 2
+
+    add_availability(tmp_path, START + datetime.timedelta(hours=2), 7)  # 12:00 - 12:30
+    add_weather(tmp_path, START + datetime.timedelta(hours=2), 10.0)
+    second = training_data.export(engine, directory, chunk_rows=10, settle_minutes=5)
+    assert second["watermark"] == "2025-02-23 12:25:00"
+    assert second["rows"] == 7 * 2  # 11:50 - 12:20
+
+    exported = training_data.load_training_data(directory)
+    assert len(exported) == len(exported.drop_duplicates(["station_id", "record_time"])) == 29 * 2
+    assert exported["record_time"].max() == pd.Timestamp("2025-02-23 12:20:00")
+    # Station 2 has no weather of its own and gets the city's mean
+    assert set(exported.loc[exported["record_time"].dt.hour == 11, "max_air_temperature_celsius"]) == {9.0}
+
+
+def test_watermark_files_of_earlier_exports_continue_after_their_last_row(tmp_path):
+    (tmp_path / training_data.WATERMARK_FILE).write_text('{"record_time": "2025-02-23 11:55:00", "rows": 1}')
+    assert training_data.read_watermark(str(tmp_path)) == datetime.datetime(2025, 2, 23, 11, 55, 1)
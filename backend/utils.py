@@ -1,4 +1,5 @@
 from math import radians, sin, cos, sqrt, atan2
+import numpy as np
 
 def haversine(lat1, lon1, lat2, lon2):
     """
@@ -37,4 +38,24 @@ def filter_nearby_stations(stations, lat, lon, max_distance_km):
     return [
         station for station in stations
         if haversine(lat, lon, station["lat"], station["lon"]) <= max_distance_km
-    ]
\ No newline at end of file
+    ]
+
+def haversine_array(lat1, lon1, lat2, lon2):
+    """
+    Vectorized `haversine` for NumPy arrays.
+
+    Inputs broadcast against each other, so passing column vectors for the first
+    points and row vectors for the second ones returns the full pairwise matrix.
+
+    Parameters:
+    - lat1, lon1: Latitudes and longitudes of the first points (in decimal degrees).
+    - lat2, lon2: Latitudes and longitudes of the second points (in decimal degrees).
+
+    Returns:
+    - numpy.ndarray: Distances in kilometers.
+    """
+    R = 6371  # Earth's radius in kilometers
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(np.minimum(a, 1.0)))